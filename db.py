@@ -2,17 +2,30 @@
 from __future__ import annotations
 
 import os
+import threading
+import time
 from dotenv import load_dotenv
 import mysql.connector
 from mysql.connector import MySQLConnection
-from mysql.connector.pooling import PooledMySQLConnection
+from mysql.connector.errors import PoolError
+from mysql.connector.pooling import PooledMySQLConnection, MySQLConnectionPool, CNX_POOL_MAXSIZE
 from mysql.connector.abstracts import MySQLConnectionAbstract
 
 # Carga variables del .env (si existe)
 load_dotenv()
 
-def get_connection() -> PooledMySQLConnection | MySQLConnection | MySQLConnectionAbstract:
-    return mysql.connector.connect(
+# ============================================================
+# CONFIGURACIÓN DEL POOL
+# ============================================================
+# DB_POOL_SIZE=0 desactiva el pool (una conexión nueva por llamada, como antes)
+DB_POOL_SIZE = min(int(os.getenv("DB_POOL_SIZE", "10")), CNX_POOL_MAXSIZE)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))      # segundos esperando un cupo libre
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))       # segundos de vida máxima por conexión
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") not in ("0", "false", "False")
+
+
+def _connect_args() -> dict:
+    return dict(
         host=os.getenv("DB_HOST", "127.0.0.1"),
         port=int(os.getenv("DB_PORT", "3306")),
         user=os.getenv("DB_USER", "root"),
@@ -20,3 +33,165 @@ def get_connection() -> PooledMySQLConnection | MySQLConnection | MySQLConnectio
         database=os.getenv("DB_NAME", "gym_rutinas"),
         auth_plugin="mysql_native_password",
     )
+
+
+class _ConexionPool:
+    """
+    Envoltura de una PooledMySQLConnection.
+
+    Se comporta igual que la conexión original (cursor, commit, rollback,
+    is_connected...), pero al cerrarla devuelve el cupo al pool y actualiza
+    las métricas de uso.
+    """
+
+    def __init__(self, cnx: PooledMySQLConnection, pool: "_PoolConexiones"):
+        self._cnx = cnx
+        self._pool = pool
+        self._cerrada = False
+
+    def close(self) -> None:
+        if self._cerrada:
+            return
+        self._cerrada = True
+        try:
+            self._cnx.close()
+        finally:
+            self._pool._liberar()
+
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+
+    def __del__(self):
+        # Si un router no llegó a cerrar (p.ej. is_connected() == False) no perdemos el cupo
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class _PoolConexiones:
+    """Pool de conexiones compartido por todo el proceso."""
+
+    def __init__(self, size: int, timeout: float, recycle: int, pre_ping: bool):
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self._pool = MySQLConnectionPool(
+            pool_name="fitman_pool",
+            pool_size=size,
+            pool_reset_session=True,
+            **_connect_args(),
+        )
+        self._cupos = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._nacimiento: dict[int, float] = {}
+        self._stats = {
+            "adquiridas": 0,
+            "en_uso": 0,
+            "max_en_uso": 0,
+            "esperas": 0,
+            "agotamientos": 0,
+            "reciclajes": 0,
+            "reconexiones": 0,
+            "espera_total_ms": 0.0,
+            "espera_max_ms": 0.0,
+        }
+
+    def adquirir(self) -> _ConexionPool:
+        inicio = time.perf_counter()
+        if not self._cupos.acquire(blocking=False):
+            with self._lock:
+                self._stats["esperas"] += 1
+            if not self._cupos.acquire(timeout=self.timeout):
+                with self._lock:
+                    self._stats["agotamientos"] += 1
+                print(f"❌ Pool de conexiones agotado ({self.size} en uso, espera {self.timeout}s)")
+                raise PoolError(f"Pool de conexiones agotado tras {self.timeout}s de espera")
+
+        try:
+            cnx = self._pool.get_connection()
+            self._preparar(cnx)
+        except Exception:
+            self._cupos.release()
+            raise
+
+        espera_ms = (time.perf_counter() - inicio) * 1000
+        with self._lock:
+            s = self._stats
+            s["adquiridas"] += 1
+            s["en_uso"] += 1
+            s["max_en_uso"] = max(s["max_en_uso"], s["en_uso"])
+            s["espera_total_ms"] += espera_ms
+            s["espera_max_ms"] = max(s["espera_max_ms"], espera_ms)
+        return _ConexionPool(cnx, self)
+
+    def _preparar(self, cnx: PooledMySQLConnection) -> None:
+        """Recicla conexiones viejas y verifica (pre-ping) que sigan vivas."""
+        raw = getattr(cnx, "_cnx", cnx)
+        ahora = time.monotonic()
+        nacimiento = self._nacimiento.setdefault(id(raw), ahora)
+
+        if self.recycle > 0 and ahora - nacimiento > self.recycle:
+            raw.reconnect(attempts=1, delay=0)
+            self._nacimiento[id(raw)] = ahora
+            with self._lock:
+                self._stats["reciclajes"] += 1
+            return
+
+        if self.pre_ping:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                raw.reconnect(attempts=2, delay=0)
+                self._nacimiento[id(raw)] = ahora
+                with self._lock:
+                    self._stats["reconexiones"] += 1
+
+    def _liberar(self) -> None:
+        with self._lock:
+            self._stats["en_uso"] = max(0, self._stats["en_uso"] - 1)
+        self._cupos.release()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+        s["espera_promedio_ms"] = round(s["espera_total_ms"] / s["adquiridas"], 3) if s["adquiridas"] else 0.0
+        s["espera_total_ms"] = round(s["espera_total_ms"], 3)
+        s["espera_max_ms"] = round(s["espera_max_ms"], 3)
+        s.update(size=self.size, timeout_s=self.timeout, recycle_s=self.recycle, pre_ping=self.pre_ping)
+        return s
+
+
+_pool: _PoolConexiones | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> _PoolConexiones:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _PoolConexiones(DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING)
+                print(f"✅ Pool MySQL inicializado (size={DB_POOL_SIZE}, timeout={DB_POOL_TIMEOUT}s, "
+                      f"recycle={DB_POOL_RECYCLE}s)")
+    return _pool
+
+
+def get_connection() -> PooledMySQLConnection | MySQLConnection | MySQLConnectionAbstract:
+    """
+    Devuelve una conexión del pool del proceso.
+    Al llamar a `close()` la conexión vuelve al pool en lugar de cerrarse.
+    """
+    if DB_POOL_SIZE <= 0:
+        return mysql.connector.connect(**_connect_args())
+    return _get_pool().adquirir()
+
+
+def get_pool_stats() -> dict:
+    """Métricas del pool (uso, esperas, agotamientos, reciclajes)."""
+    if DB_POOL_SIZE <= 0:
+        return {"habilitado": False}
+    if _pool is None:
+        return {"habilitado": True, "inicializado": False, "size": DB_POOL_SIZE}
+    return {"habilitado": True, "inicializado": True, **_pool.estadisticas()}
@@ -46,6 +46,7 @@ from routers import (
     resenas_router,
     mensajes_router,
     pagos_router,
+    jobs_router,
     cliente_entrenador
 )
 
@@ -53,6 +54,8 @@ from routers import (
 from utils.dependencies import get_db
 from utils.passwords import verify_password, hash_password
 from models.user import Usuario
+from services.jobs_service import iniciar_programador, detener_programador
+from services.ia_jobs import detener_cola_ia
 
 # Google OAuth
 from google.oauth2 import id_token
@@ -82,6 +85,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # cursor de la página siguiente (utils/campos.py)
 )
 
 # Carpeta de uploads
@@ -473,11 +477,30 @@ app.include_router(
 )
 print("✔ Progresión")
 
+# 13. Tareas programadas (admin)
+app.include_router(jobs_router)
+print("✔ Jobs")
+
 print("=" * 60)
 print("✔ Todos los routers registrados correctamente")
 print("=" * 60 + "\n")
 
 
+# ============================================================
+# PROGRAMADOR DE TAREAS
+# ============================================================
+
+@app.on_event("startup")
+def _iniciar_programador():
+    iniciar_programador()
+
+
+@app.on_event("shutdown")
+def _detener_programador():
+    detener_programador()
+    detener_cola_ia()
+
+
 # ============================================================
 # RUTAS BÁSICAS
 # ============================================================
@@ -525,6 +548,13 @@ def debug_routes():
     }
 
 
+@app.get("/debug/db-pool")
+def debug_db_pool():
+    """Métricas del pool de conexiones MySQL usado por los routers con SQL directo"""
+    from db import get_pool_stats
+    return get_pool_stats()
+
+
 @app.get("/debug/ia-status")
 def debug_ia_status():
     """Verifica el estado del router IA"""
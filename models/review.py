@@ -1,5 +1,5 @@
 # models/review.py
-from sqlalchemy import Integer, String, Float, ForeignKey, DateTime, Text
+from sqlalchemy import Integer, String, Float, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from config.database import Base
@@ -7,6 +7,11 @@ from config.database import Base
 
 class Resena(Base):
     __tablename__ = "resenas"
+    # Paginación por keyset de las reseñas de un entrenador; en BD existentes:
+    # python scripts/paginacion_indices.py create
+    __table_args__ = (
+        Index("idx_resenas_entrenador_fecha", "id_entrenador", "fecha_creacion", "id_resena"),
+    )
 
     id_resena: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     id_entrenador: Mapped[int] = mapped_column(Integer, ForeignKey("usuarios.id_usuario"), nullable=False)
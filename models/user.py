@@ -1,6 +1,6 @@
 # models/user.py
 from __future__ import annotations
-from sqlalchemy import Integer, String, DateTime, Text, Enum as SAEnum
+from sqlalchemy import Integer, String, DateTime, Text, Index, Enum as SAEnum
 from sqlalchemy.dialects.mysql import DECIMAL, TINYINT
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
@@ -22,6 +22,15 @@ class SexoEnum(str, enum.Enum):
 
 class Usuario(Base):
     __tablename__ = "usuarios"
+    # Búsqueda de entrenadores (routers/usuarios.py listar_entrenadores); en BD existentes:
+    # python scripts/entrenadores_indices.py create
+    __table_args__ = (
+        Index("idx_usuarios_rol_rating", "rol", "rating"),
+        Index("idx_usuarios_rol_precio", "rol", "precio_mensual"),
+        Index("idx_usuarios_rol_experiencia", "rol", "experiencia"),
+        Index("idx_usuarios_rol_ciudad", "rol", "ciudad"),
+        Index("idx_usuarios_rol_especialidad", "rol", "especialidad"),
+    )
 
     id_usuario: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     nombre: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -13,6 +13,7 @@ from .pagos import router as pagos_router
 from .ia import router as ia_router
 
 from .progresion import router as progresion_router
+from .jobs import router as jobs_router
 
 __all__ = [
     "usuarios_router",
@@ -25,4 +26,5 @@ __all__ = [
     "pagos_router",
     "ia_router",             # ← correcto
     "progresion_router",
+    "jobs_router",
 ]
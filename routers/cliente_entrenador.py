@@ -9,14 +9,15 @@
 
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from datetime import datetime
+from sqlalchemy import and_, text, bindparam
+from datetime import datetime, timedelta
 from typing import Optional, List
 from pydantic import BaseModel
 
 from utils.dependencies import get_db
 from models.user import Usuario
 from models.cliente_entrenador import ClienteEntrenador
+from services.progreso_service import roster_cache
 
 router = APIRouter(prefix="/cliente-entrenador", tags=["Cliente-Entrenador"])
 
@@ -88,6 +89,21 @@ class EntrenadorConRelacionOut(BaseModel):
     notas: Optional[str] = None
 
 
+class ResumenClienteOut(BaseModel):
+    id_cliente: int
+    nombre: str
+    email: str
+    foto_url: Optional[str] = None
+    fecha_contratacion: str
+    ultima_sesion: Optional[str] = None
+    sesiones_semana: int = 0
+    alertas_pendientes: int = 0
+    rutina_activa: Optional[str] = None
+    rutina_vence: Optional[str] = None
+    dias_para_vencer: Optional[int] = None
+    cumplimiento: Optional[float] = None
+
+
 class ClienteEntrenadorOut(BaseModel):
     id_relacion: int
     id_cliente: int
@@ -205,6 +221,117 @@ def _entrenador_out(u: Usuario) -> EntrenadorOut:
     )
 
 
+def _relaciones_activas(db: Session, id_entrenador: int) -> list[tuple[ClienteEntrenador, Usuario]]:
+    """Relaciones activas del entrenador junto con el usuario del cliente (un solo JOIN)."""
+    return (
+        db.query(ClienteEntrenador, Usuario)
+        .join(Usuario, Usuario.id_usuario == ClienteEntrenador.id_cliente)
+        .filter(
+            and_(
+                ClienteEntrenador.id_entrenador == id_entrenador,
+                ClienteEntrenador.activo == True,
+                ClienteEntrenador.estado == "activo"
+            )
+        )
+        .order_by(ClienteEntrenador.fecha_contratacion)
+        .all()
+    )
+
+
+# Última sesión y días entrenados en la semana en curso (lunes 00:00)
+_ROSTER_SESIONES_SQL = text("""
+    SELECT
+        id_cliente,
+        MAX(fecha_sesion) AS ultima_sesion,
+        COUNT(DISTINCT CASE WHEN fecha_sesion >= :inicio_semana
+                            THEN DATE(fecha_sesion) END) AS sesiones_semana
+    FROM progreso_ejercicios
+    WHERE id_cliente IN :ids
+    GROUP BY id_cliente
+""").bindparams(bindparam("ids", expanding=True))
+
+_ROSTER_ALERTAS_SQL = text("""
+    SELECT id_cliente, COUNT(*) AS pendientes
+    FROM alertas_progresion
+    WHERE id_cliente IN :ids AND estado = 'pendiente'
+    GROUP BY id_cliente
+""").bindparams(bindparam("ids", expanding=True))
+
+# Rutina activa más reciente de cada cliente y días entrenados desde su inicio
+_ROSTER_RUTINAS_SQL = text("""
+    SELECT
+        hr.id_cliente, hr.nombre_rutina, hr.fecha_inicio, hr.fecha_fin, hr.dias_semana,
+        COUNT(DISTINCT DATE(pe.fecha_sesion)) AS dias_entrenados
+    FROM (
+        SELECT
+            id_cliente, nombre_rutina, fecha_inicio, fecha_fin, dias_semana,
+            ROW_NUMBER() OVER (PARTITION BY id_cliente ORDER BY fecha_inicio DESC) AS rn
+        FROM historial_rutinas
+        WHERE id_cliente IN :ids
+          AND estado = 'activa'
+          AND (fecha_fin IS NULL OR fecha_fin > NOW())
+    ) hr
+    LEFT JOIN progreso_ejercicios pe
+        ON pe.id_cliente = hr.id_cliente
+       AND pe.fecha_sesion >= hr.fecha_inicio
+    WHERE hr.rn = 1
+    GROUP BY hr.id_cliente, hr.nombre_rutina, hr.fecha_inicio, hr.fecha_fin, hr.dias_semana
+""").bindparams(bindparam("ids", expanding=True))
+
+
+def _cumplimiento(fila, ahora: datetime) -> Optional[float]:
+    """Días entrenados frente a los esperados desde el inicio de la rutina (máx. 100%)."""
+    if not fila.fecha_inicio:
+        return None
+    dias = max((ahora - fila.fecha_inicio).days + 1, 1)
+    dias_semana = int(fila.dias_semana or 0)
+    esperados = max(dias * dias_semana / 7 if dias_semana else dias, 1)
+    return round(min(fila.dias_entrenados / esperados * 100, 100.0), 1)
+
+
+def _resumen_roster(db: Session, id_entrenador: int) -> List[ResumenClienteOut]:
+    """
+    Resumen de todos los clientes activos con 4 consultas agrupadas,
+    independientemente del tamaño de la cartera.
+    """
+    relaciones = _relaciones_activas(db, id_entrenador)
+    if not relaciones:
+        return []
+
+    ids = [relacion.id_cliente for relacion, _ in relaciones]
+    ahora = datetime.now()
+    inicio_semana = (ahora - timedelta(days=ahora.weekday())).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+    sesiones = {
+        f.id_cliente: f
+        for f in db.execute(_ROSTER_SESIONES_SQL, {"ids": ids, "inicio_semana": inicio_semana})
+    }
+    alertas = {f.id_cliente: int(f.pendientes) for f in db.execute(_ROSTER_ALERTAS_SQL, {"ids": ids})}
+    rutinas = {f.id_cliente: f for f in db.execute(_ROSTER_RUTINAS_SQL, {"ids": ids})}
+
+    resumen = []
+    for relacion, u in relaciones:
+        s = sesiones.get(u.id_usuario)
+        r = rutinas.get(u.id_usuario)
+        resumen.append(ResumenClienteOut(
+            id_cliente=int(u.id_usuario),
+            nombre=_nombre_completo(u),
+            email=u.email,
+            foto_url=getattr(u, "foto_url", None),
+            fecha_contratacion=relacion.fecha_contratacion.isoformat(),
+            ultima_sesion=s.ultima_sesion.isoformat() if s and s.ultima_sesion else None,
+            sesiones_semana=int(s.sesiones_semana or 0) if s else 0,
+            alertas_pendientes=alertas.get(u.id_usuario, 0),
+            rutina_activa=r.nombre_rutina if r else None,
+            rutina_vence=r.fecha_fin.isoformat() if r and r.fecha_fin else None,
+            dias_para_vencer=(r.fecha_fin - ahora).days if r and r.fecha_fin else None,
+            cumplimiento=_cumplimiento(r, ahora) if r else None,
+        ))
+    return resumen
+
+
 # ============================================================
 # ENDPOINTS
 # ============================================================
@@ -271,6 +398,7 @@ def contratar_entrenador(payload: ClienteEntrenadorCreate, db: Session = Depends
         db.commit()
         db.refresh(relacion)
 
+        roster_cache.invalidar(relacion.id_entrenador)
         print(f"✅ Relación creada: {relacion.id_relacion}")
 
         return ClienteEntrenadorOut(
@@ -304,44 +432,43 @@ def mis_clientes(id_entrenador: int, db: Session = Depends(get_db)):
     print(f"🔍 [MIS-CLIENTES] Entrenador {id_entrenador} obtiene sus clientes")
 
     try:
-        # ✅ Obtener todas las relaciones activas
-        relaciones = db.query(ClienteEntrenador).filter(
-            and_(
-                ClienteEntrenador.id_entrenador == id_entrenador,
-                ClienteEntrenador.activo == True,
-                ClienteEntrenador.estado == "activo"
+        # ✅ Relaciones activas y sus usuarios en una sola consulta
+        filas = _relaciones_activas(db, id_entrenador)
+
+        print(f"📊 Se encontraron {len(filas)} clientes")
+
+        return [
+            ClienteConRelacionOut(
+                cliente=_cliente_out(cliente_user),
+                fecha_contratacion=relacion.fecha_contratacion.isoformat(),
+                estado=relacion.estado,
+                notas=relacion.notas,
             )
-        ).all()
-
-        print(f"📊 Se encontraron {len(relaciones)} clientes")
-
-        resultado = []
-        for relacion in relaciones:
-            # ✅ Obtener datos del cliente
-            cliente_user = db.query(Usuario).filter(
-                Usuario.id_usuario == relacion.id_cliente
-            ).first()
-
-            if cliente_user:
-                cliente_out = _cliente_out(cliente_user)
-                resultado.append(
-                    ClienteConRelacionOut(
-                        cliente=cliente_out,
-                        fecha_contratacion=relacion.fecha_contratacion.isoformat(),
-                        estado=relacion.estado,
-                        notas=relacion.notas,
-                    )
-                )
-            else:
-                print(f"⚠️ Cliente {relacion.id_cliente} no encontrado")
-
-        return resultado
+            for relacion, cliente_user in filas
+        ]
 
     except Exception as e:
         print(f"❌ Error en mis_clientes: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
+@router.get(
+    "/mis-clientes/{id_entrenador}/resumen",
+    response_model=List[ResumenClienteOut]
+)
+def resumen_mis_clientes(id_entrenador: int, db: Session = Depends(get_db)):
+    """
+    ✅ Cartera completa del entrenador en una sola llamada:
+    última sesión, sesiones de la semana, alertas pendientes,
+    vencimiento de la rutina activa y cumplimiento.
+    """
+    try:
+        return roster_cache.get_or_load(id_entrenador, lambda: _resumen_roster(db, id_entrenador))
+    except Exception as e:
+        print(f"❌ Error en resumen_mis_clientes: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+
 @router.get(
     "/mi-entrenador/{id_cliente}",
     response_model=Optional[EntrenadorConRelacionOut]
@@ -462,6 +589,7 @@ def cancelar_relacion(id_relacion: int, db: Session = Depends(get_db)):
 
         db.add(relacion)
         db.commit()
+        roster_cache.invalidar(relacion.id_entrenador)
 
         print(f"✅ Relación cancelada")
         return None
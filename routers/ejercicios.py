@@ -3,6 +3,7 @@ from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel, HttpUrl
 from typing import List, Optional, Any, Dict
 from db import get_connection
+from services.catalogo_ejercicios import catalogo_ejercicios
 
 router = APIRouter()
 
@@ -41,6 +42,7 @@ def crear_ejercicio(payload: EjercicioCreate):
         cur.execute(sql, values)
         cn.commit()
         new_id = cur.lastrowid
+        catalogo_ejercicios.invalidar()
         return {"id": new_id, "mensaje": "Ejercicio creado"}
     except Exception:
         raise HTTPException(status_code=500, detail="Error al crear ejercicio")
@@ -1,17 +1,32 @@
 # routers/ia.py - Router IA V5 (Gemini + OpenAI + Grok + Vigencia de Rutinas)
 
 from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field, field_validator
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 from typing import List, Optional, Dict, Any, Literal
 import google.generativeai as genai
 import os
 import json
 import re
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, date
 
+from config.database import SessionLocal
 from utils.dependencies import get_db
+from utils.cola_trabajos import ColaLlena
+from utils.json_incremental import ExtractorArrayJSON
+from services.progreso_service import invalidar_cliente
+from services.ia_jobs import cola_ia
+from services.ia_orquestador import OrquestadorIA, SinProveedorDisponible
+from services.ia_plan_cache import cache_planes, clave_plan
+from services.ia_simulado import Grabaciones, ProveedorSimulado
+from services.catalogo_ejercicios import (
+    GRUPOS_GENERADOR, catalogo_ejercicios, resolver_ejercicios, normalizar_nombre
+)
 
 # ============================================================
 # ROUTER CON PREFIJO INTERNO - NO AÑADIR PREFIJO EN main.py
@@ -222,7 +237,12 @@ else:
         nivel: str  # "principiante" | "intermedio" | "avanzado"
         grupo_muscular_foco: Optional[str] = "general"
         perfil_salud: Optional[PerfilSalud] = None
-        proveedor: Literal["auto", "gemini", "openai", "grok", "local"] = "auto"
+        proveedor: Literal["auto", "gemini", "openai", "grok", "simulado", "local"] = "auto"
+        usar_cache: bool = Field(default=True, description="Reutilizar un plan de IA cacheado si existe")
+        usar_catalogo: bool = Field(
+            default=True,
+            description="Enviar al modelo el catálogo filtrado y exigir id_ejercicio del catálogo"
+        )
         duracion_meses: int = Field(
             default=1,
             ge=1,
@@ -237,6 +257,20 @@ else:
             return v
 
 
+    class SolicitudLoteRutinas(BaseModel):
+        """Mismos parámetros para todos los clientes; perfil de salud opcional por cliente."""
+        ids_clientes: List[int] = Field(..., min_length=1, max_length=200)
+        objetivos: str
+        dias: int = Field(..., ge=2, le=7, description="Días de entrenamiento por semana (2-7)")
+        nivel: str
+        grupo_muscular_foco: Optional[str] = "general"
+        proveedor: Literal["auto", "gemini", "openai", "grok", "simulado", "local"] = "auto"
+        usar_cache: bool = True
+        usar_catalogo: bool = True
+        duracion_meses: int = Field(default=1, ge=1, le=12)
+        perfiles: Dict[int, PerfilSalud] = Field(default_factory=dict, description="id_cliente -> perfil de salud")
+
+
     # ============================================================
     # PLANES (fallback local)
     # ============================================================
@@ -298,6 +332,21 @@ else:
     PALABRAS_MAQUINAS_GYM = ["máquina", "prensa", "polea", "cable", "smith", "hack", "leg press", "prensa 45"]
     PALABRAS_BARRA = ["barra", "barbell"]
 
+    # Los ejercicios del catálogo no traen tags: detonantes -> palabras en el nombre/descripcion
+    PALABRAS_DETONANTES = {
+        "valsalva": ["1rm", "máximo", "maximo"],
+        "cargas_maximas": ["1rm", "máximo", "maximo"],
+        "hiit_alto_impacto": ["hiit", "burpee", "salto", "jump"],
+        "impacto_alto": ["burpee", "salto", "jump", "pliométric", "pliometric"],
+        "carga_compresiva_lumbar_alta": ["peso muerto", "buenos días", "good morning", "sentadilla con barra"],
+        "hiperextension_lumbar": ["hiperextensi", "superman"],
+        "rotacion_lumbar": ["giro ruso", "russian twist", "leñador", "woodchop"],
+        "press_por_encima": ["press militar", "overhead", "por encima", "press de hombro", "arnold"],
+        "abduccion_90_mas": ["elevaciones laterales", "elevación lateral", "remo al mentón"],
+        "rotacion_externa_cargada": ["rotación externa", "rotacion externa"],
+        "supino_prolongado": ["press banca", "press de banca", "supino"],
+    }
+
     # === Selector de modelo robusto para Google Generative AI ===
     PREFERRED_MODELS = [
         "models/gemini-2.5-flash",
@@ -489,7 +538,7 @@ else:
     def guardar_rutina_bd(db, base_rutina):
         """
         Guarda la rutina generada por IA dentro de la tabla 'rutinas'.
-        Retorna el id_rutina generado.
+        Retorna el id_rutina generado. No confirma la transacción.
         """
 
         query = text("""
@@ -511,7 +560,7 @@ else:
             )
         """)
 
-        db.execute(query, {
+        res = db.execute(query, {
             "nombre": base_rutina.nombre,
             "descripcion": base_rutina.descripcion,
             "creado_por": base_rutina.id_cliente,
@@ -529,76 +578,62 @@ else:
             "contenido_dias": json.dumps([d.model_dump() for d in base_rutina.dias])
         })
 
-        db.commit()
-        return db.execute(text("SELECT LAST_INSERT_ID()")).scalar()
+        return res.lastrowid
 
 
     def guardar_ejercicios_rutina(db, id_rutina, dias):
         """
         Guarda los ejercicios generados por IA en la BD.
-        Si un ejercicio NO existe en la tabla `ejercicios`,
-        lo crea automáticamente.
-        """
-
-        for dia in dias:
-            for ej in dia.ejercicios:
-
-                # Buscar si el ejercicio ya existe (por nombre)
-                row = db.execute(text("""
-                    SELECT id_ejercicio 
-                    FROM ejercicios 
-                    WHERE LOWER(nombre) = LOWER(:nombre)
-                    LIMIT 1
-                """), {
-                    "nombre": ej.nombre.strip()
-                }).fetchone()
-
-                # SI NO EXISTE → CREARLO
-                if not row:
-                    db.execute(text("""
-                        INSERT INTO ejercicios (
-                            nombre, descripcion, grupo_muscular, 
-                            dificultad, tipo
-                        )
-                        VALUES (:n, :d, :g, :dif, :t)
-                    """), {
-                        "n": ej.nombre,
-                        "d": ej.descripcion or "",
-                        "g": ej.grupo_muscular or "GENERAL",
-                        "dif": ej.dificultad or "intermedio",
-                        "t": ej.tipo or "general"
-                    })
-
-                    # Recuperar el ID recién creado
-                    new_id = db.execute(text("SELECT LAST_INSERT_ID()")).scalar()
-                    ej_id = new_id
-
-                    print(f"✨ Ejercicio creado automáticamente: {ej.nombre} (ID {ej_id})")
+        Los que ya traen un id del catálogo (prompt con catálogo) se usan tal
+        cual; el resto se resuelve junto por nombre normalizado, los que NO
+        existen en `ejercicios` se crean en un solo INSERT, y las filas de
+        rutina_ejercicios se escriben con un INSERT multi-fila.
+        No confirma la transacción; devuelve cuántos ejercicios se crearon.
+        """
+        ejercicios = [ej for dia in dias for ej in dia.ejercicios]
+        if not ejercicios:
+            return 0
 
-                else:
-                    ej_id = row[0]
+        # El id solo es fiable si el catálogo tiene ese id con el mismo nombre
+        # (en el prompt libre la IA inventa id_ejercicio)
+        del_catalogo = {}
+        for ej in ejercicios:
+            ficha = catalogo_ejercicios.obtener(ej.id_ejercicio) if ej.id_ejercicio else None
+            if ficha and normalizar_nombre(ficha.nombre) == normalizar_nombre(ej.nombre):
+                del_catalogo[id(ej)] = ficha.id_ejercicio
+
+        por_nombre = [ej for ej in ejercicios if id(ej) not in del_catalogo]
+        ids, creados = resolver_ejercicios(db, por_nombre) if por_nombre else ({}, 0)
+
+        valores, params = [], {"rutina": id_rutina}
+        for i, ej in enumerate(ejercicios):
+            ej_id = del_catalogo.get(id(ej)) or ids.get(normalizar_nombre(ej.nombre))
+            if ej_id is None:
+                print(f"⚠️ Ejercicio sin nombre válido, se omite: {ej.nombre!r}")
+                continue
+            valores.append(f"(:rutina, :ej{i}, :s{i}, :r{i}, :d{i})")
+            params.update({
+                f"ej{i}": ej_id,
+                f"s{i}": ej.series,
+                f"r{i}": ej.repeticiones,
+                f"d{i}": ej.descanso_segundos
+            })
 
-                # Insertar en rutina_ejercicios
-                db.execute(text("""
-                    INSERT INTO rutina_ejercicios(
-                        id_rutina, id_ejercicio, series, 
-                        repeticiones, descanso_segundos
-                    )
-                    VALUES (:rutina, :ej, :s, :r, :d)
-                """), {
-                    "rutina": id_rutina,
-                    "ej": ej_id,
-                    "s": ej.series,
-                    "r": ej.repeticiones,
-                    "d": ej.descanso_segundos
-                })
+        if valores:
+            db.execute(text(f"""
+                INSERT INTO rutina_ejercicios(
+                    id_rutina, id_ejercicio, series, 
+                    repeticiones, descanso_segundos
+                )
+                VALUES {", ".join(valores)}
+            """), params)
 
-        db.commit()
+        return creados
 
 
     def crear_historial_rutina(db, id_rutina, base):
         """
-        Crea registro en historial_rutinas
+        Crea registro en historial_rutinas (sin confirmar) y devuelve su id
         """
         query = text("""
             INSERT INTO historial_rutinas (
@@ -613,7 +648,7 @@ else:
             )
         """)
 
-        db.execute(query, {
+        res = db.execute(query, {
             "rutina": id_rutina,
             "cliente": base.id_cliente,
             "nombre": base.nombre,
@@ -624,8 +659,7 @@ else:
             "dias_semana": base.dias_semana
         })
 
-        db.commit()
-        return db.execute(text("SELECT LAST_INSERT_ID()")).scalar()
+        return res.lastrowid
 
 
     def copiar_ejercicios_historial(db, id_historial, id_rutina):
@@ -641,7 +675,6 @@ else:
             WHERE id_rutina = :rutina
         """)
         db.execute(query, {"historial": id_historial, "rutina": id_rutina})
-        db.commit()
 
 
     def crear_objetivo_automatico(db, id_cliente: int, tipo: str):
@@ -734,6 +767,7 @@ else:
             **data
         })
         db.commit()
+        invalidar_cliente(id_cliente)
 
         return {"ok": True, "mensaje": "Objetivo creado automáticamente"}
 
@@ -750,41 +784,6 @@ else:
         semanas_total = rutina.duracion_meses * 4  # aproximado
         objetivo_usuario = rutina.objetivo.lower()
 
-        # --- OBJETIVO 1: COMPLETAR DIAS ---
-        db.execute(text("""
-            INSERT INTO objetivos_cliente (
-                id_cliente, tipo_objetivo, titulo,
-                valor_objetivo, valor_actual, unidad,
-                estado, porcentaje_completado, fecha_inicio, fecha_limite
-            )
-            VALUES (
-                :cliente, 'progreso', 'Completar los días de entrenamiento',
-                :meta, 0, 'dias',
-                'pendiente', 0, NOW(), DATE_ADD(NOW(), INTERVAL 30 DAY)
-            )
-        """), {
-            "cliente": id_cliente,
-            "meta": dias_total
-        })
-
-        # --- OBJETIVO 2: COMPLETAR SEMANAS ---
-        db.execute(text("""
-            INSERT INTO objetivos_cliente (
-                id_cliente, tipo_objetivo, titulo,
-                valor_objetivo, valor_actual, unidad,
-                estado, porcentaje_completado, fecha_inicio, fecha_limite
-            )
-            VALUES (
-                :cliente, 'progreso', 'Terminar todas las semanas de la rutina',
-                :meta, 0, 'semanas',
-                'pendiente', 0, NOW(), DATE_ADD(NOW(), INTERVAL :meses MONTH)
-            )
-        """), {
-            "cliente": id_cliente,
-            "meta": semanas_total,
-            "meses": rutina.duracion_meses
-        })
-
         # --- OBJETIVO 3: DINÁMICO SEGÚN META DEL CLIENTE ---
         titulo_obj = "Mejorar condición física"
         unidad = "%"
@@ -805,13 +804,25 @@ else:
             unidad = "%"
             meta_valor = 10
 
+        # Los 3 objetivos en un solo INSERT (sin confirmar)
         db.execute(text("""
             INSERT INTO objetivos_cliente (
                 id_cliente, tipo_objetivo, titulo,
                 valor_objetivo, valor_actual, unidad,
                 estado, porcentaje_completado, fecha_inicio, fecha_limite
             )
-            VALUES (
+            VALUES
+            (
+                :cliente, 'progreso', 'Completar los días de entrenamiento',
+                :meta_dias, 0, 'dias',
+                'pendiente', 0, NOW(), DATE_ADD(NOW(), INTERVAL 30 DAY)
+            ),
+            (
+                :cliente, 'progreso', 'Terminar todas las semanas de la rutina',
+                :meta_semanas, 0, 'semanas',
+                'pendiente', 0, NOW(), DATE_ADD(NOW(), INTERVAL :meses MONTH)
+            ),
+            (
                 :cliente, 'objetivo', :titulo,
                 :meta, 0, :unidad,
                 'pendiente', 0,
@@ -819,17 +830,18 @@ else:
             )
         """), {
             "cliente": id_cliente,
+            "meta_dias": dias_total,
+            "meta_semanas": semanas_total,
+            "meses": rutina.duracion_meses,
             "titulo": titulo_obj,
             "meta": meta_valor,
             "unidad": unidad
         })
 
-        db.commit()
-
 
     def crear_alertas_iniciales(db, id_cliente):
         """
-        Crea alerta inicial cuando se asigna rutina
+        Crea alerta inicial cuando se asigna rutina (sin confirmar)
         """
         db.execute(text("""
             INSERT INTO alertas_progresion (
@@ -842,7 +854,53 @@ else:
                 'Se ha asignado una nueva rutina al cliente'
             )
         """), {"cliente": id_cliente})
-        db.commit()
+
+
+    def persistir_rutina_generada(db: Session, base: RutinaCompleta, confirmar: bool = True) -> Dict[str, Any]:
+        """
+        Guarda la rutina generada en UNA transacción:
+        rutina → ejercicios → historial → ejercicios del historial → objetivos → alerta.
+        Si cualquier etapa falla se hace rollback completo (no quedan rutinas a medias).
+        Con confirmar=False no hace commit/rollback ni invalida cachés: lo hace el
+        llamador (lotes con varias rutinas por transacción).
+        Devuelve ids, ejercicios creados y el tiempo (ms) de cada etapa.
+        """
+        tiempos: Dict[str, float] = {}
+        t_total = time.perf_counter()
+
+        def _etapa(nombre: str, funcion, *args):
+            t0 = time.perf_counter()
+            resultado = funcion(*args)
+            tiempos[nombre] = round((time.perf_counter() - t0) * 1000, 2)
+            return resultado
+
+        try:
+            id_rutina = _etapa("rutina", guardar_rutina_bd, db, base)
+            creados = _etapa("ejercicios", guardar_ejercicios_rutina, db, id_rutina, base.dias)
+            id_historial = _etapa("historial", crear_historial_rutina, db, id_rutina, base)
+            _etapa("historial_ejercicios", copiar_ejercicios_historial, db, id_historial, id_rutina)
+            _etapa("objetivos", crear_objetivos_iniciales, db, base.id_cliente, id_rutina, base)
+            _etapa("alertas", crear_alertas_iniciales, db, base.id_cliente)
+            if confirmar:
+                _etapa("commit", db.commit)
+        except Exception:
+            if confirmar:
+                db.rollback()
+            raise
+
+        if confirmar:
+            invalidar_cliente(base.id_cliente)
+            if creados:
+                catalogo_ejercicios.invalidar()
+
+        tiempos["total"] = round((time.perf_counter() - t_total) * 1000, 2)
+        print(f"💾 Rutina {id_rutina} persistida en {tiempos['total']} ms {tiempos}")
+        return {
+            "id_rutina": id_rutina,
+            "id_historial": id_historial,
+            "ejercicios_creados": creados,
+            "tiempos_ms": tiempos
+        }
 
     def _is_quota_error(err: Exception) -> bool:
         msg = f"{type(err).__name__}: {err}"
@@ -1006,31 +1064,9 @@ else:
     # ============================================================
 
     def obtener_ejercicios_por_grupo(db: Session, nivel: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Ejercicios por grupo desde el índice en memoria (sin SQL por petición)."""
         print(f"\n🔍 Buscando ejercicios para nivel: {nivel}")
-        grupos = ["PECHO", "ESPALDA", "BRAZOS", "PIERNAS", "HOMBROS", "CORE", "CARDIO"]
-        out: Dict[str, List[Dict[str, Any]]] = {}
-        for g in grupos:
-            q = text("""
-                SELECT id_ejercicio, nombre, descripcion, grupo_muscular, dificultad, tipo
-                FROM ejercicios
-                WHERE grupo_muscular = :grupo AND dificultad = :nivel
-                LIMIT 100
-            """)
-            res = db.execute(q, {"grupo": g, "nivel": nivel}).fetchall()
-            if not res:
-                q2 = text("""
-                    SELECT id_ejercicio, nombre, descripcion, grupo_muscular, dificultad, tipo
-                    FROM ejercicios
-                    WHERE grupo_muscular = :grupo
-                    ORDER BY dificultad ASC
-                    LIMIT 100
-                """)
-                res = db.execute(q2, {"grupo": g}).fetchall()
-            out[g] = [{
-                "id_ejercicio": r[0], "nombre": r[1], "descripcion": r[2] or "", "grupo_muscular": r[3],
-                "dificultad": r[4], "tipo": r[5] or "general"
-            } for r in res]
-        return out
+        return catalogo_ejercicios.por_grupo(nivel)
 
 
     def distribuir_ejercicios_inteligente(
@@ -1210,6 +1246,161 @@ else:
     """
 
 
+    # ============================================================
+    # PROMPT CON CATÁLOGO (la IA elige id_ejercicio del catálogo real)
+    # ============================================================
+
+    IA_CATALOGO_TOKENS = int(os.getenv("IA_CATALOGO_TOKENS", "1200"))
+    IA_CATALOGO_POR_GRUPO = int(os.getenv("IA_CATALOGO_POR_GRUPO", "15"))
+
+    # Etiquetas de los splits de glúteo que no son grupos del catálogo
+    _ALIAS_SPLIT = {
+        "QUADS": ["PIERNAS"],
+        "ISQUIOS": ["PIERNAS"],
+        "UPPER": ["PECHO", "ESPALDA", "HOMBROS", "BRAZOS"],
+        "ESTABILIDAD": ["CORE"],
+    }
+
+
+    def _grupos_split(dias: int, objetivos: str, foco: Optional[str]) -> List[str]:
+        """Grupos del catálogo que usa el split, en orden de aparición."""
+        grupos: List[str] = []
+        for dia in _split_por_objetivo(dias, objetivos, foco):
+            for etiqueta in dia:
+                for parte in re.split(r"[/\s()]+", etiqueta.upper()):
+                    for g in _ALIAS_SPLIT.get(parte, [MAPEO_GRUPOS_SECUNDARIOS.get(parte, parte)]):
+                        if g in GRUPOS_GENERADOR and g not in grupos:
+                            grupos.append(g)
+        return grupos or list(GRUPOS_GENERADOR)
+
+
+    def _catalogo_para_prompt(
+            perfil: Optional[PerfilSalud],
+            nivel: str,
+            dias: int,
+            objetivos: str,
+            foco: Optional[str]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Porción del catálogo que se envía al modelo: filtrada por nivel, equipo
+        (casa sin equipo), detonantes de salud y disgustos, y recortada por
+        presupuesto de tokens repartiendo por turnos entre los grupos del split.
+        """
+        grupos = _grupos_split(dias, objetivos, foco)
+        por_grupo = catalogo_ejercicios.por_grupo(nivel, grupos, limite=IA_CATALOGO_POR_GRUPO * 3)
+
+        pref = perfil.preferencias if perfil else None
+        sin_equipo = _es_casa_sin_equipo(pref)
+        disgustos = [d.lower() for d in (pref.disgustos if pref else []) if d]
+        palabras_evitar = [
+            kw for tag in perf_to_riesgo(perfil).detonantes_evitar
+            for kw in PALABRAS_DETONANTES.get(tag, [])
+        ]
+        es_gluteo = _objetivo_es_gluteos(objetivos, foco)
+
+        candidatos: Dict[str, List[Dict[str, Any]]] = {}
+        for g in grupos:
+            lista = []
+            for ej in por_grupo.get(g, []):
+                t = f"{ej['nombre']} {ej['descripcion']}".lower()
+                if sin_equipo and _descarta_por_equipo_si_casa_sin_equipo(ej):
+                    continue
+                if any(kw in t for kw in palabras_evitar) or any(d in t for d in disgustos):
+                    continue
+                lista.append(ej)
+            if es_gluteo and g == "PIERNAS":
+                lista.sort(key=_score_prioridad_gluteo, reverse=True)
+            candidatos[g] = lista[:IA_CATALOGO_POR_GRUPO]
+
+        # Reparto por turnos (~4 caracteres por token)
+        seleccion: Dict[str, List[Dict[str, Any]]] = {g: [] for g in grupos}
+        presupuesto = IA_CATALOGO_TOKENS
+        ronda = 0
+        while presupuesto > 0 and any(ronda < len(c) for c in candidatos.values()):
+            for g, lista in candidatos.items():
+                if ronda < len(lista):
+                    coste = len(f"{lista[ronda]['id_ejercicio']}={lista[ronda]['nombre']}; ") // 4 + 1
+                    if coste > presupuesto:
+                        presupuesto = 0
+                        break
+                    seleccion[g].append(lista[ronda])
+                    presupuesto -= coste
+            ronda += 1
+
+        return {g: lista for g, lista in seleccion.items() if lista}
+
+
+    def _build_ai_prompt_catalogo(
+            perfil: Optional[PerfilSalud],
+            dias: int,
+            nivel: str,
+            objetivos: str,
+            seleccion: Dict[str, List[Dict[str, Any]]]
+    ) -> str:
+        catalogo_txt = "\n".join(
+            f"    {g}: " + "; ".join(f"{ej['id_ejercicio']}={ej['nombre']}" for ej in lista)
+            for g, lista in seleccion.items()
+        )
+
+        return f"""
+    Eres un generador de rutinas de ejercicio.
+    Responde ÚNICAMENTE con JSON válido, sin explicación ni markdown.
+
+    Usa SOLO ejercicios de este catálogo (formato id=nombre). No inventes ejercicios:
+
+{catalogo_txt}
+
+    Estructura EXACTA (cada ejercicio solo con su id del catálogo y la carga):
+
+    {{
+      "nombre": "string",
+      "descripcion": "string",
+      "dias": [
+        {{
+          "numero_dia": 1,
+          "nombre_dia": "Lunes",
+          "descripcion": "string",
+          "grupos_enfoque": ["PECHO","ESPALDA"],
+          "ejercicios": [
+            {{"id_ejercicio": 12, "series": 4, "repeticiones": 10, "descanso_segundos": 75}}
+          ]
+        }}
+      ]
+    }}
+
+    Requisitos del usuario:
+    - Objetivo: {objetivos}
+    - Nivel: {nivel}
+    - Días por semana: {dias}
+    - Asegura que "dias" tenga exactamente {dias} elementos.
+    """
+
+
+    def _prompt_solicitud(
+            solicitud: SolicitudGenerarRutina,
+            nivel_norm: str
+    ) -> tuple[str, Optional[Dict[int, Dict[str, Any]]]]:
+        """
+        (prompt, permitidos): con usar_catalogo, `permitidos` son los ejercicios
+        enviados al modelo por id; None si se usa el prompt libre (o el catálogo
+        filtrado quedó vacío).
+        """
+        if solicitud.usar_catalogo:
+            seleccion = _catalogo_para_prompt(
+                solicitud.perfil_salud, nivel_norm, solicitud.dias,
+                solicitud.objetivos, solicitud.grupo_muscular_foco
+            )
+            if seleccion:
+                permitidos = {ej["id_ejercicio"]: ej for lista in seleccion.values() for ej in lista}
+                prompt = _build_ai_prompt_catalogo(
+                    solicitud.perfil_salud, solicitud.dias, nivel_norm, solicitud.objetivos, seleccion
+                )
+                return prompt, permitidos
+            print("⚠️ Catálogo filtrado vacío; se usa el prompt libre")
+
+        return _build_ai_prompt(solicitud.perfil_salud, solicitud.dias, nivel_norm, solicitud.objetivos), None
+
+
     # ============================================================
     # AI GENERATORS (GEMINI + OPENAI + GROK) - CON TIMEOUT
     # ============================================================
@@ -1277,7 +1468,8 @@ else:
         return str(resp)
 
 
-    def _gemini_generate_plan(perfil: Optional[PerfilSalud], dias: int, nivel: str, objetivos: str) -> Dict[str, Any]:
+    def _gemini_generate_plan(perfil: Optional[PerfilSalud], dias: int, nivel: str, objetivos: str,
+                                     prompt: Optional[str] = None) -> Dict[str, Any]:
         """
         Genera un plan de entrenamiento usando Gemini AI con timeout configurado.
         """
@@ -1329,7 +1521,7 @@ else:
         if not GEMINI_API_KEY:
             raise RuntimeError("GEMINI_API_KEY no configurada")
 
-        prompt = _build_ai_prompt(perfil, dias, nivel, objetivos)
+        prompt = prompt or _build_ai_prompt(perfil, dias, nivel, objetivos)
 
         max_tokens = int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS", "4096"))
 
@@ -1509,7 +1701,8 @@ else:
             )
 
 
-    def _openai_generate_plan(perfil: Optional[PerfilSalud], dias: int, nivel: str, objetivos: str) -> Dict[str, Any]:
+    def _openai_generate_plan(perfil: Optional[PerfilSalud], dias: int, nivel: str, objetivos: str,
+                                     prompt: Optional[str] = None) -> Dict[str, Any]:
         """
         Genera plan usando OpenAI ChatGPT API
         """
@@ -1519,7 +1712,7 @@ else:
         if not openai_client:
             raise RuntimeError("Cliente OpenAI no disponible. Instala con: pip install openai")
 
-        prompt = _build_ai_prompt(perfil, dias, nivel, objetivos)
+        prompt = prompt or _build_ai_prompt(perfil, dias, nivel, objetivos)
 
         try:
             response = openai_client.chat.completions.create(
@@ -1556,7 +1749,8 @@ else:
             raise RuntimeError(f"Fallo en _openai_generate_plan: {type(e).__name__}: {str(e)}")
 
 
-    def _grok_generate_plan(perfil: Optional[PerfilSalud], dias: int, nivel: str, objetivos: str) -> Dict[str, Any]:
+    def _grok_generate_plan(perfil: Optional[PerfilSalud], dias: int, nivel: str, objetivos: str,
+                                   prompt: Optional[str] = None) -> Dict[str, Any]:
         """
         Genera plan usando Grok (xAI) API
         """
@@ -1566,7 +1760,7 @@ else:
         if not grok_client:
             raise RuntimeError("Cliente Grok no disponible. Instala con: pip install openai")
 
-        prompt = _build_ai_prompt(perfil, dias, nivel, objetivos)
+        prompt = prompt or _build_ai_prompt(perfil, dias, nivel, objetivos)
 
         try:
             response = grok_client.chat.completions.create(
@@ -1601,6 +1795,190 @@ else:
             raise RuntimeError(f"Fallo en _grok_generate_plan: {type(e).__name__}: {str(e)}")
 
 
+    # ============================================================
+    # ORQUESTADOR DE PROVEEDORES (circuit breaker + hedging)
+    # ============================================================
+
+    IA_ORDEN_PROVEEDORES = [
+        p.strip() for p in os.getenv("IA_PROVEEDORES_ORDEN", "gemini,openai,grok").split(",") if p.strip()
+    ]
+    # 0 = sin hedging; si no, ms antes de lanzar el siguiente proveedor en paralelo
+    IA_HEDGE_S = int(os.getenv("IA_HEDGE_MS", "0")) / 1000
+
+    DESCRIPCION_PROVEEDOR = {
+        "gemini": "Rutina generada por Gemini IA",
+        "openai": "Rutina generada por OpenAI",
+        "grok": "Rutina generada por Grok",
+    }
+
+    orquestador_ia = OrquestadorIA(
+        {
+            "gemini": lambda: bool(GEMINI_API_KEY),
+            "openai": lambda: bool(OPENAI_API_KEY and openai_client),
+            "grok": lambda: bool(GROK_API_KEY and grok_client),
+        },
+        es_cuota=_is_quota_error,
+        umbral_fallos=int(os.getenv("IA_CB_FALLOS", "3")),
+        enfriamiento_s=float(os.getenv("IA_CB_ENFRIAMIENTO_S", "120")),
+        timeout_s=GEMINI_TIMEOUT_SECONDS,
+    )
+
+    # Proveedores enchufables: nombre -> generador(perfil, dias, nivel, objetivos, prompt=None) -> plan
+    GENERADORES_IA = {
+        "gemini": _gemini_generate_plan,
+        "openai": _openai_generate_plan,
+        "grok": _grok_generate_plan,
+    }
+    # nombre -> fragmentos(prompt) para los que no usan el SDK de Gemini/OpenAI
+    STREAMS_IA = {}
+
+
+    def registrar_proveedor_ia(nombre: str, generador, configurado, descripcion: str, fragmentos=None):
+        """Agrega un proveedor al pipeline (orquestador, streaming y descripción)."""
+        GENERADORES_IA[nombre] = generador
+        DESCRIPCION_PROVEEDOR[nombre] = descripcion
+        orquestador_ia.registrar(nombre, configurado)
+        if fragmentos:
+            STREAMS_IA[nombre] = fragmentos
+
+
+    # ============================================================
+    # PROVEEDOR SIMULADO + GRABACIÓN (pruebas de carga sin red)
+    # ============================================================
+
+    IA_SIMULADO = os.getenv("IA_SIMULADO", "0") == "1"
+    grabaciones_ia = Grabaciones() if os.getenv("IA_GRABAR", "0") == "1" else None
+    proveedor_simulado = ProveedorSimulado.desde_entorno() if IA_SIMULADO else None
+
+    if proveedor_simulado:
+        registrar_proveedor_ia(
+            "simulado",
+            lambda perfil, dias, nivel, objetivos, prompt=None: proveedor_simulado.generar(
+                prompt or _build_ai_prompt(perfil, dias, nivel, objetivos)
+            ),
+            lambda: True,
+            "Rutina generada por el proveedor simulado",
+            proveedor_simulado.fragmentos,
+        )
+        if "simulado" not in IA_ORDEN_PROVEEDORES:
+            IA_ORDEN_PROVEEDORES.insert(0, "simulado")
+        print(f"⚠️ Proveedor IA simulado activo (orden: {IA_ORDEN_PROVEEDORES})")
+
+    if grabaciones_ia:
+        print(f"🎙️ Grabando respuestas de IA en {grabaciones_ia.directorio}")
+
+
+    def _grabar_respuesta(proveedor: str, prompt: str, plan_json: Dict[str, Any]):
+        if grabaciones_ia and proveedor != "simulado":
+            grabaciones_ia.guardar(proveedor, prompt, plan_json)
+
+
+    def _plan_validado(
+            proveedor: str,
+            solicitud: SolicitudGenerarRutina,
+            nivel_norm: str,
+            prompt: str,
+            permitidos: Optional[Dict[int, Dict[str, Any]]] = None
+    ):
+        """Pide el plan a un proveedor y lo valida; devuelve (plan crudo, días, seguridad)."""
+        plan_json = GENERADORES_IA[proveedor](
+            perfil=solicitud.perfil_salud,
+            dias=solicitud.dias,
+            nivel=nivel_norm,
+            objetivos=solicitud.objetivos,
+            prompt=prompt
+        )
+        dias, seguridad = _plan_a_dias(plan_json, nivel_norm, solicitud.perfil_salud, permitidos)
+        if not dias:
+            raise ValueError(f"{proveedor} no generó días válidos")
+        _grabar_respuesta(proveedor, prompt, plan_json)
+        return plan_json, dias, seguridad
+
+
+    # ============================================================
+    # STREAMING DE PROVEEDORES (texto del plan por fragmentos)
+    # ============================================================
+
+    def _stream_fragmentos(proveedor: str, prompt: str):
+        """
+        Genera el texto del plan a medida que llega, con la API de streaming del proveedor.
+        Un stream que se detiene o que pasa de orquestador_ia.timeout_s en total lanza
+        TimeoutError (el llamador lo trata como falla del proveedor y hace failover).
+        """
+        if proveedor in STREAMS_IA:
+            yield from STREAMS_IA[proveedor](prompt)
+            return
+
+        limite = time.monotonic() + orquestador_ia.timeout_s
+
+        def _verificar_plazo():
+            if time.monotonic() > limite:
+                raise TimeoutError(f"{proveedor}: stream sin terminar en {orquestador_ia.timeout_s:.0f}s")
+
+        if proveedor == "gemini":
+            if not GEMINI_API_KEY:
+                raise RuntimeError("GEMINI_API_KEY no configurada")
+            model = genai.GenerativeModel(_normalize_model_name(GEMINI_MODEL))
+            resp = model.generate_content(
+                prompt,
+                generation_config={
+                    "response_mime_type": "application/json",
+                    "temperature": 0.2,
+                    "max_output_tokens": int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS", "4096"))
+                },
+                safety_settings=[
+                    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+                    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+                    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+                    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_ONLY_HIGH"}
+                ],
+                request_options={"timeout": GEMINI_TIMEOUT_SECONDS},
+                stream=True
+            )
+            for chunk in resp:
+                _verificar_plazo()
+                try:
+                    texto = chunk.text
+                except ValueError:
+                    # Fragmento sin partes (finish_reason / safety)
+                    texto = ""
+                if texto:
+                    yield texto
+            return
+
+        clientes = {
+            "openai": (OPENAI_API_KEY and openai_client, OPENAI_MODEL),
+            "grok": (GROK_API_KEY and grok_client, GROK_MODEL),
+        }
+        cliente, modelo = clientes[proveedor]
+        if not cliente:
+            raise RuntimeError(f"Cliente {proveedor} no configurado")
+
+        extra = {"response_format": {"type": "json_object"}} if proveedor == "openai" else {}
+        stream = cliente.chat.completions.create(
+            model=modelo,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "Eres un entrenador profesional experto en crear rutinas de ejercicio personalizadas. Debes responder ÚNICAMENTE con JSON válido, sin texto adicional."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=0.2,
+            max_tokens=2048,
+            stream=True,
+            timeout=orquestador_ia.timeout_s,
+            **extra
+        )
+        for chunk in stream:
+            _verificar_plazo()
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
     # ============================================================
     # CONVERSION FROM AI TO PYDANTIC
     # ============================================================
@@ -1729,6 +2107,55 @@ else:
         return dias_py, seguridad
 
 
+    def _resolver_plan_catalogo(plan: Dict[str, Any], permitidos: Dict[int, Dict[str, Any]]):
+        """
+        Sustituye cada ejercicio {id_ejercicio, series, ...} por la ficha del
+        catálogo (nombre, descripción, grupo, dificultad, tipo) conservando la
+        carga. Los id que no se enviaron en el prompt se descartan.
+        Devuelve (plan resuelto, descartados).
+        """
+        dias_brutos = plan.get("dias") or plan.get("rutina") or plan.get("dias_rutina") or []
+        if isinstance(dias_brutos, dict):
+            dias_brutos = [dias_brutos]
+        if not isinstance(dias_brutos, list):
+            return plan, 0
+
+        descartados = 0
+        dias_out = []
+        for d in dias_brutos:
+            if not isinstance(d, dict):
+                continue
+            ejercicios_in = d.get("ejercicios") or []
+            if isinstance(ejercicios_in, dict):
+                ejercicios_in = [ejercicios_in]
+
+            ejercicios_out = []
+            for e in ejercicios_in:
+                ficha = permitidos.get(_parse_int_value(e.get("id_ejercicio"))) if isinstance(e, dict) else None
+                if not ficha:
+                    descartados += 1
+                    continue
+                carga = {k: e[k] for k in ("series", "repeticiones", "descanso_segundos", "notas") if k in e}
+                ejercicios_out.append({**ficha, **carga})
+            dias_out.append({**d, "ejercicios": ejercicios_out})
+
+        return {**plan, "dias": dias_out}, descartados
+
+
+    def _plan_a_dias(
+            plan: Dict[str, Any],
+            nivel_norm: str,
+            perfil: Optional[PerfilSalud],
+            permitidos: Optional[Dict[int, Dict[str, Any]]] = None
+    ):
+        """_from_ai_to_pydantic, resolviendo antes los id contra el catálogo si el prompt lo usó."""
+        if permitidos is not None:
+            plan, descartados = _resolver_plan_catalogo(plan, permitidos)
+            if descartados:
+                print(f"⚠️ {descartados} ejercicios fuera del catálogo enviado, descartados")
+        return _from_ai_to_pydantic(plan, nivel_norm, perfil)
+
+
 
     # ============================================================
     # ENDPOINTS
@@ -1738,224 +2165,173 @@ else:
     def generar_rutina_distribuida(
             solicitud: SolicitudGenerarRutina,
             db: Session = Depends(get_db),
-            activar_vigencia: bool = Query(False, description="Activar vigencia inmediatamente")
+            activar_vigencia: bool = Query(False, description="Activar vigencia inmediatamente"),
+            asincrono: bool = Query(False, description="Encolar y devolver un id de trabajo (202)")
     ):
-        dias = []
-        seguridad = None
-        generada_por = "local"
-        descripcion = "Rutina generada localmente"
+        if not asincrono:
+            return _generar_rutina(solicitud, db, activar_vigencia)
 
         try:
-            # VALIDACIONES
-            if not (2 <= solicitud.dias <= 7):
-                raise HTTPException(status_code=422, detail="Días debe estar entre 2 y 7")
-
-            if not (1 <= solicitud.duracion_meses <= 12):
-                raise HTTPException(status_code=422, detail="Duración debe estar entre 1 y 12 meses")
-
-            # NIVEL NORMALIZADO
-            nivel_map = {
-                "principiante": "principiante",
-                "intermedio": "intermedio",
-                "avanzado": "avanzado"
-            }
-            nivel_norm = nivel_map.get(solicitud.nivel.lower(), "intermedio")
+            trabajo = cola_ia.encolar(
+                "generar_rutina",
+                lambda: _trabajo_generar_rutina(solicitud, activar_vigencia)
+            )
+        except ColaLlena as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "10"})
+
+        print(f"📥 Trabajo IA {trabajo.id} encolado (cliente {solicitud.id_cliente})")
+        return JSONResponse(status_code=202, content={
+            "status": "en_cola",
+            "id_trabajo": trabajo.id,
+            "estado_url": f"/api/ia/trabajos/{trabajo.id}",
+            "eventos_url": f"/api/ia/trabajos/{trabajo.id}/eventos",
+            "profundidad_cola": cola_ia.metricas()["profundidad"],
+        })
 
-            # ======================================================
-            # PROVEEDOR NORMALIZADO (ÚNICO LUGAR)
-            # ======================================================
-            prov_raw = (solicitud.proveedor or "").strip()
-            print(f"🔥 PROVEEDOR RECIBIDO DESDE ANGULAR: {prov_raw}")
 
-            prov = prov_raw.lower()
+    def _trabajo_generar_rutina(solicitud: SolicitudGenerarRutina, activar_vigencia: bool) -> Dict[str, Any]:
+        """Ejecución en el pool de la cola: usa su propia sesión de BD."""
+        db = SessionLocal()
+        try:
+            return _generar_rutina(solicitud, db, activar_vigencia)
+        finally:
+            db.close()
 
-            if prov in ["auto", "ia", "inteligente", "fitman", "default", ""]:
-                prov = "gemini"
 
-            print(f"🔥 PROVEEDOR NORMALIZADO: {prov}")
+    def _normalizar_solicitud(solicitud: SolicitudGenerarRutina) -> tuple[str, str]:
+        """Valida días / duración y devuelve (nivel normalizado, proveedor normalizado)."""
+        # VALIDACIONES
+        if not (2 <= solicitud.dias <= 7):
+            raise HTTPException(status_code=422, detail="Días debe estar entre 2 y 7")
 
-            # ======================================================
-            # 1) GENERAR LA RUTINA SEGÚN PROVEEDOR
-            # ======================================================
+        if not (1 <= solicitud.duracion_meses <= 12):
+            raise HTTPException(status_code=422, detail="Duración debe estar entre 1 y 12 meses")
 
-            if prov == "local":
-                generada_por = "local"
-                descripcion = "Rutina generada localmente"
+        # NIVEL NORMALIZADO
+        nivel_map = {
+            "principiante": "principiante",
+            "intermedio": "intermedio",
+            "avanzado": "avanzado"
+        }
+        nivel_norm = nivel_map.get(solicitud.nivel.lower(), "intermedio")
 
-                ejercicios_por_grupo = obtener_ejercicios_por_grupo(db, nivel_norm)
-                if not any(ejercicios_por_grupo.values()):
-                    raise HTTPException(status_code=400, detail="No hay ejercicios disponibles en BD")
+        # ======================================================
+        # PROVEEDOR NORMALIZADO (ÚNICO LUGAR)
+        # ======================================================
+        prov_raw = (solicitud.proveedor or "").strip()
+        print(f"🔥 PROVEEDOR RECIBIDO DESDE ANGULAR: {prov_raw}")
 
-                dias, seguridad = distribuir_ejercicios_inteligente(
-                    ejercicios_por_grupo,
-                    solicitud.dias,
-                    nivel_norm,
-                    solicitud.objetivos,
-                    solicitud.perfil_salud
-                )
+        prov = prov_raw.lower()
 
-            elif prov == "gemini":
-                print("🔥 LLAMANDO A _gemini_generate_plan() …")
+        if prov in ["auto", "ia", "inteligente", "fitman", "default", ""]:
+            prov = "auto"
 
-                plan_json = _gemini_generate_plan(
-                    perfil=solicitud.perfil_salud,
-                    dias=solicitud.dias,
-                    nivel=nivel_norm,
-                    objetivos=solicitud.objetivos
-                )
-
-                print("\n================ RAW GEMINI RESPONSE ================")
-                try:
-                    print(json.dumps(plan_json, indent=4, ensure_ascii=False))
-                except:
-                    print(plan_json)
-                print("=====================================================\n")
-
-                dias, seguridad = _from_ai_to_pydantic(plan_json, nivel_norm, solicitud.perfil_salud)
-                generada_por = "gemini"
-                descripcion = "Rutina generada por Gemini IA"
-
-            elif prov == "openai":
-                plan_json = _openai_generate_plan(
-                    perfil=solicitud.perfil_salud,
-                    dias=solicitud.dias,
-                    nivel=nivel_norm,
-                    objetivos=solicitud.objetivos
-                )
-                dias, seguridad = _from_ai_to_pydantic(plan_json, nivel_norm, solicitud.perfil_salud)
-                generada_por = "openai"
-                descripcion = "Rutina generada por OpenAI"
-
-            elif prov == "grok":
-                plan_json = _grok_generate_plan(
-                    perfil=solicitud.perfil_salud,
-                    dias=solicitud.dias,
-                    nivel=nivel_norm,
-                    objetivos=solicitud.objetivos
-                )
-                dias, seguridad = _from_ai_to_pydantic(plan_json, nivel_norm, solicitud.perfil_salud)
-                generada_por = "grok"
-                descripcion = "Rutina generada por Grok"
+        print(f"🔥 PROVEEDOR NORMALIZADO: {prov}")
 
-            # FALLBACK LOCAL
-            else:
-                print("⚠ PROVEEDOR DESCONOCIDO, USANDO LOCAL")
-                generada_por = "local"
-                descripcion = "Rutina generada localmente"
+        return nivel_norm, prov
 
-                ejercicios_por_grupo = obtener_ejercicios_por_grupo(db, nivel_norm)
-                dias, seguridad = distribuir_ejercicios_inteligente(
-                    ejercicios_por_grupo,
-                    solicitud.dias,
-                    nivel_norm,
-                    solicitud.objetivos,
-                    solicitud.perfil_salud
-                )
-            # ======================================================
-            # 2) CALCULAR MINUTOS Y DATOS
-            # ======================================================
-            # ======================================================
-            # Validación crítica: asegurar que 'dias' no esté vacío
-            # ======================================================
-            if len(dias) == 0:
-                print("❌ Gemini no generó días válidos — abortando IA y usando fallback REAL")
-
-                # Usamos el generador local real
-                ejercicios_por_grupo = obtener_ejercicios_por_grupo(db, nivel_norm)
 
-                dias, seguridad = distribuir_ejercicios_inteligente(
-                    ejercicios_por_grupo,
-                    solicitud.dias,
-                    nivel_norm,
-                    solicitud.objetivos,
-                    solicitud.perfil_salud
-                )
+    def _generar_dias(
+            solicitud: SolicitudGenerarRutina,
+            nivel_norm: str,
+            prov: str,
+            db: Optional[Session] = None
+    ):
+        """
+        Genera los días según el proveedor (caché de planes → orquestador → local).
+        Devuelve (dias, seguridad, generada_por, descripcion, plan_desde_cache);
+        `dias` vacío si la IA falló (el fallback local lo aplica _armar_rutina).
+        """
+        dias = []
+        seguridad = None
+        generada_por = "local"
+        descripcion = "Rutina generada localmente"
+        plan_desde_cache = False
+
+        # ======================================================
+        # 1) GENERAR LA RUTINA SEGÚN PROVEEDOR
+        # ======================================================
+
+        if prov == "local":
+            generada_por = "local"
+            descripcion = "Rutina generada localmente"
+
+            ejercicios_por_grupo = obtener_ejercicios_por_grupo(db, nivel_norm)
+            if not any(ejercicios_por_grupo.values()):
+                raise HTTPException(status_code=400, detail="No hay ejercicios disponibles en BD")
+
+            dias, seguridad = distribuir_ejercicios_inteligente(
+                ejercicios_por_grupo,
+                solicitud.dias,
+                nivel_norm,
+                solicitud.objetivos,
+                solicitud.perfil_salud
+            )
 
-                generada_por = "local"
-                descripcion = "Rutina generada localmente (fallback por fallo de IA)"
-
-            # Asegura que dias exista y sea lista
-            if not isinstance(dias, list):
-                dias = []
-
-            # Si sigue vacío, crear fallback
-            if len(dias) == 0:
-                dias = [
-                    DiaRutinaDetallado(
-                        numero_dia=1,
-                        nombre_dia="Día 1",
-                        descripcion="Fallback: sin ejercicios",
-                        grupos_enfoque=["GENERAL"],
-                        ejercicios=[]
+        elif prov == "auto" or prov in GENERADORES_IA:
+            prompt, permitidos = _prompt_solicitud(solicitud, nivel_norm)
+            clave_cache = clave_plan(prompt, prov)
+
+            # Caché de planes: el filtrado de seguridad del usuario se aplica igualmente
+            cacheado = cache_planes.obtener(clave_cache) if solicitud.usar_cache else None
+            if cacheado:
+                dias, seguridad = _plan_a_dias(cacheado["plan"], nivel_norm, solicitud.perfil_salud, permitidos)
+                if dias:
+                    plan_desde_cache = True
+                    generada_por = cacheado["proveedor"]
+                    descripcion = DESCRIPCION_PROVEEDOR.get(generada_por, descripcion)
+                    print(f"♻️ Plan IA desde caché ({cacheado['nivel']}) {clave_cache[:12]}")
+
+            if not plan_desde_cache:
+                # "auto": orden configurado con hedging; explícito: solo ese proveedor
+                orden = IA_ORDEN_PROVEEDORES if prov == "auto" else [prov]
+                try:
+                    generada_por, (plan_json, dias, seguridad) = orquestador_ia.generar(
+                        orden,
+                        lambda p: _plan_validado(p, solicitud, nivel_norm, prompt, permitidos),
+                        hedge_s=IA_HEDGE_S if prov == "auto" else 0
                     )
-                ]
-
-            total_ejercicios = sum(len(d.ejercicios) for d in dias)
-
-            minutos = calcular_minutos_rutina(dias)
-
-            vigencia_info = calcular_fechas_vigencia(solicitud.duracion_meses)
-
-            estado_vigencia = "pendiente"
-            fecha_inicio_v = None
-
-            if activar_vigencia:
-                estado_vigencia = "activa"
-                fecha_inicio_v = vigencia_info["inicio"]
-
-            base = RutinaCompleta(
-                nombre=f"Rutina {nivel_norm.title()} - {solicitud.objetivos}",
-                descripcion=descripcion,
-                id_cliente=solicitud.id_cliente,
-                objetivo=solicitud.objetivos,
-                grupo_muscular=solicitud.grupo_muscular_foco,
-                nivel=nivel_norm,
-                dias_semana=solicitud.dias,
-                total_ejercicios=total_ejercicios,
-                minutos_aproximados=minutos,
-                duracion_meses=solicitud.duracion_meses,
-                fecha_inicio_vigencia=fecha_inicio_v.isoformat() if fecha_inicio_v else None,
-                fecha_fin_vigencia=vigencia_info["fin"].isoformat(),
-                estado_vigencia=estado_vigencia,
-                dias=dias,
-                fecha_creacion=datetime.now().isoformat(),
-                generada_por=generada_por
+                    descripcion = DESCRIPCION_PROVEEDOR[generada_por]
+                    if solicitud.usar_cache:
+                        cache_planes.guardar(clave_cache, generada_por, plan_json)
+                except SinProveedorDisponible as e:
+                    # Se resuelve abajo con el generador local
+                    print(f"⚠️ {e}")
+                    dias = []
+
+        # FALLBACK LOCAL
+        else:
+            print("⚠ PROVEEDOR DESCONOCIDO, USANDO LOCAL")
+            generada_por = "local"
+            descripcion = "Rutina generada localmente"
+
+            ejercicios_por_grupo = obtener_ejercicios_por_grupo(db, nivel_norm)
+            dias, seguridad = distribuir_ejercicios_inteligente(
+                ejercicios_por_grupo,
+                solicitud.dias,
+                nivel_norm,
+                solicitud.objetivos,
+                solicitud.perfil_salud
             )
 
-            # ======================================================
-            # 4) GUARDAR EN BD (rutina + ejercicios)
-            # ======================================================
-
-            id_rutina = guardar_rutina_bd(db, base)
-            guardar_ejercicios_rutina(db, id_rutina, dias)
+        return dias, seguridad, generada_por, descripcion, plan_desde_cache
 
-            # ======================================================
-            # 5) CREAR HISTORIAL Y COPIAR EJERCICIOS
-            # ======================================================
 
-            id_historial = crear_historial_rutina(db, id_rutina, base)
-            copiar_ejercicios_historial(db, id_historial, id_rutina)
-
-            # ======================================================
-            # 6) CREAR OBJETIVOS Y ALERTAS INICIALES
-            # ======================================================
-
-            crear_objetivos_iniciales(db, solicitud.id_cliente, id_rutina, base)
-            crear_alertas_iniciales(db, solicitud.id_cliente)
-
-            # ======================================================
-            # 7) RESPUESTA COMPLETA
-            # ======================================================
+    def _generar_rutina(
+            solicitud: SolicitudGenerarRutina,
+            db: Session,
+            activar_vigencia: bool
+    ) -> Dict[str, Any]:
+        try:
+            nivel_norm, prov = _normalizar_solicitud(solicitud)
 
-            return {
-                "status": "ok",
-                "mensaje": "Rutina generada y guardada exitosamente",
-                "id_rutina": id_rutina,
-                "id_historial": id_historial,
-                "rutina": base.model_dump(),
-                "seguridad": seguridad.model_dump() if seguridad else None,
-                "proveedor": generada_por
-            }
+            dias, seguridad, generada_por, descripcion, plan_desde_cache = _generar_dias(
+                solicitud, nivel_norm, prov, db
+            )
+            return _completar_rutina(
+                solicitud, db, activar_vigencia, nivel_norm,
+                dias, seguridad, generada_por, descripcion, plan_desde_cache
+            )
 
 
         except HTTPException:
@@ -1990,6 +2366,550 @@ else:
             )
 
 
+    def _completar_rutina(
+            solicitud: SolicitudGenerarRutina,
+            db: Session,
+            activar_vigencia: bool,
+            nivel_norm: str,
+            dias: List[DiaRutinaDetallado],
+            seguridad: Optional[SeguridadOut],
+            generada_por: str,
+            descripcion: str,
+            plan_desde_cache: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Arma la RutinaCompleta, la persiste en una transacción y devuelve la
+        respuesta. Compartido por la generación normal y la de streaming.
+        """
+        base, seguridad = _armar_rutina(
+            solicitud, activar_vigencia, nivel_norm, dias, seguridad, generada_por, descripcion
+        )
+
+        # ======================================================
+        # 4) GUARDAR EN BD: rutina, ejercicios, historial,
+        #    objetivos y alertas en UNA transacción
+        # ======================================================
+
+        persistido = persistir_rutina_generada(db, base)
+
+        return _respuesta_rutina(base, seguridad, persistido, plan_desde_cache)
+
+
+    def _armar_rutina(
+            solicitud: SolicitudGenerarRutina,
+            activar_vigencia: bool,
+            nivel_norm: str,
+            dias: List[DiaRutinaDetallado],
+            seguridad: Optional[SeguridadOut],
+            generada_por: str,
+            descripcion: str
+    ):
+        """Fallback local si no hay días y construcción de la RutinaCompleta; (base, seguridad)."""
+        # ======================================================
+        # 2) CALCULAR MINUTOS Y DATOS
+        # ======================================================
+        # ======================================================
+        # Validación crítica: asegurar que 'dias' no esté vacío
+        # ======================================================
+        if len(dias) == 0:
+            print("❌ Gemini no generó días válidos — abortando IA y usando fallback REAL")
+
+            # Usamos el generador local real
+            ejercicios_por_grupo = obtener_ejercicios_por_grupo(None, nivel_norm)
+
+            dias, seguridad = distribuir_ejercicios_inteligente(
+                ejercicios_por_grupo,
+                solicitud.dias,
+                nivel_norm,
+                solicitud.objetivos,
+                solicitud.perfil_salud
+            )
+
+            generada_por = "local"
+            descripcion = "Rutina generada localmente (fallback por fallo de IA)"
+
+        # Asegura que dias exista y sea lista
+        if not isinstance(dias, list):
+            dias = []
+
+        # Si sigue vacío, crear fallback
+        if len(dias) == 0:
+            dias = [
+                DiaRutinaDetallado(
+                    numero_dia=1,
+                    nombre_dia="Día 1",
+                    descripcion="Fallback: sin ejercicios",
+                    grupos_enfoque=["GENERAL"],
+                    ejercicios=[]
+                )
+            ]
+
+        total_ejercicios = sum(len(d.ejercicios) for d in dias)
+
+        minutos = calcular_minutos_rutina(dias)
+
+        vigencia_info = calcular_fechas_vigencia(solicitud.duracion_meses)
+
+        estado_vigencia = "pendiente"
+        fecha_inicio_v = None
+
+        if activar_vigencia:
+            estado_vigencia = "activa"
+            fecha_inicio_v = vigencia_info["inicio"]
+
+        base = RutinaCompleta(
+            nombre=f"Rutina {nivel_norm.title()} - {solicitud.objetivos}",
+            descripcion=descripcion,
+            id_cliente=solicitud.id_cliente,
+            objetivo=solicitud.objetivos,
+            grupo_muscular=solicitud.grupo_muscular_foco,
+            nivel=nivel_norm,
+            dias_semana=solicitud.dias,
+            total_ejercicios=total_ejercicios,
+            minutos_aproximados=minutos,
+            duracion_meses=solicitud.duracion_meses,
+            fecha_inicio_vigencia=fecha_inicio_v.isoformat() if fecha_inicio_v else None,
+            fecha_fin_vigencia=vigencia_info["fin"].isoformat(),
+            estado_vigencia=estado_vigencia,
+            dias=dias,
+            fecha_creacion=datetime.now().isoformat(),
+            generada_por=generada_por
+        )
+        return base, seguridad
+
+
+    def _respuesta_rutina(
+            base: RutinaCompleta,
+            seguridad: Optional[SeguridadOut],
+            persistido: Dict[str, Any],
+            plan_desde_cache: bool
+    ) -> Dict[str, Any]:
+        # ======================================================
+        # 5) RESPUESTA COMPLETA
+        # ======================================================
+
+        return {
+            "status": "ok",
+            "mensaje": "Rutina generada y guardada exitosamente",
+            "id_rutina": persistido["id_rutina"],
+            "id_historial": persistido["id_historial"],
+            "rutina": base.model_dump(),
+            "seguridad": seguridad.model_dump() if seguridad else None,
+            "proveedor": base.generada_por,
+            "plan_desde_cache": plan_desde_cache,
+            "tiempos_persistencia_ms": persistido["tiempos_ms"]
+        }
+
+
+    # ============================================================
+    # TRABAJOS ASÍNCRONOS DE GENERACIÓN
+    # ============================================================
+
+    @router.get("/trabajos/cola")
+    def metricas_cola_ia():
+        """Profundidad de la cola, trabajos en proceso y latencias (espera / ejecución)."""
+        return cola_ia.metricas()
+
+
+    @router.get("/trabajos/{id_trabajo}")
+    def estado_trabajo_ia(id_trabajo: str):
+        trabajo = cola_ia.obtener(id_trabajo)
+        if not trabajo:
+            raise HTTPException(status_code=404, detail="Trabajo no encontrado o expirado")
+        return trabajo.to_dict()
+
+
+    @router.get("/trabajos/{id_trabajo}/eventos")
+    async def eventos_trabajo_ia(id_trabajo: str):
+        """
+        Server-Sent Events: un evento por cambio de estado y el resultado final
+        en el evento `completado` (o `error`). Cierra el stream al terminar.
+        """
+        if not cola_ia.obtener(id_trabajo):
+            raise HTTPException(status_code=404, detail="Trabajo no encontrado o expirado")
+
+        async def _stream():
+            ultimo_estado = None
+            ultimo_envio = 0.0
+            while True:
+                trabajo = cola_ia.obtener(id_trabajo)
+                if not trabajo:
+                    yield "event: error\ndata: {\"error\": \"Trabajo expirado\"}\n\n"
+                    return
+
+                ahora = asyncio.get_running_loop().time()
+                if trabajo.estado != ultimo_estado:
+                    ultimo_estado = trabajo.estado
+                    ultimo_envio = ahora
+                    datos = json.dumps(trabajo.to_dict(), ensure_ascii=False, default=str)
+                    yield f"event: {trabajo.estado}\ndata: {datos}\n\n"
+                elif ahora - ultimo_envio >= 15:
+                    ultimo_envio = ahora
+                    yield ": ping\n\n"
+
+                if trabajo.finalizado:
+                    return
+                await asyncio.sleep(0.5)
+
+        return StreamingResponse(
+            _stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
+    # ============================================================
+    # GENERACIÓN EN STREAMING (SSE)
+    # ============================================================
+
+    def _evento_sse(evento: str, datos: Any) -> str:
+        return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False, default=str)}\n\n"
+
+
+    def _dia_desde_crudo(
+            crudo: Dict[str, Any],
+            numero: int,
+            nivel_norm: str,
+            perfil: Optional[PerfilSalud],
+            permitidos: Optional[Dict[int, Dict[str, Any]]] = None
+    ):
+        """Valida y filtra por seguridad un día suelto; (DiaRutinaDetallado | None, advertencias)."""
+        crudo.setdefault("numero_dia", numero)
+        dias, seg = _plan_a_dias({"dias": [crudo]}, nivel_norm, perfil, permitidos)
+        return (dias[0] if dias else None), seg.advertencias
+
+
+    @router.post("/generar-rutina/stream")
+    def generar_rutina_stream(
+            solicitud: SolicitudGenerarRutina,
+            activar_vigencia: bool = Query(False, description="Activar vigencia inmediatamente")
+    ):
+        """
+        Server-Sent Events: `inicio` con el proveedor, un evento `dia` por cada
+        DiaRutinaDetallado en cuanto el proveedor cierra su objeto JSON, y
+        `completado` con la misma respuesta que /generar-rutina una vez guardada la
+        rutina (una transacción al terminar el stream). Si un proveedor falla a
+        mitad, se emite `reinicio` y los días se vuelven a enviar desde el
+        siguiente proveedor (o el generador local).
+        """
+        # Errores de validación como 422 normal, antes de abrir el stream
+        nivel_norm, prov = _normalizar_solicitud(solicitud)
+
+        return StreamingResponse(
+            _stream_generar_rutina(solicitud, nivel_norm, prov, activar_vigencia),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
+    def _stream_generar_rutina(
+            solicitud: SolicitudGenerarRutina,
+            nivel_norm: str,
+            prov: str,
+            activar_vigencia: bool
+    ):
+        perfil = solicitud.perfil_salud
+        dias: List[DiaRutinaDetallado] = []
+        advertencias: List[str] = []
+        seguridad = None
+        generada_por = "local"
+        descripcion = "Rutina generada localmente"
+        plan_desde_cache = False
+        t0 = time.perf_counter()
+
+        try:
+            if prov == "auto" or prov in GENERADORES_IA:
+                prompt, permitidos = _prompt_solicitud(solicitud, nivel_norm)
+                clave_cache = clave_plan(prompt, prov)
+
+                cacheado = cache_planes.obtener(clave_cache) if solicitud.usar_cache else None
+                if cacheado:
+                    dias_cache, seg_cache = _plan_a_dias(cacheado["plan"], nivel_norm, perfil, permitidos)
+                    if dias_cache:
+                        plan_desde_cache = True
+                        generada_por = cacheado["proveedor"]
+                        descripcion = DESCRIPCION_PROVEEDOR.get(generada_por, descripcion)
+                        dias, advertencias = dias_cache, seg_cache.advertencias
+                        yield _evento_sse("inicio", {"proveedor": generada_por, "plan_desde_cache": True})
+                        for d in dias:
+                            yield _evento_sse("dia", d.model_dump())
+
+                if not plan_desde_cache:
+                    orden = IA_ORDEN_PROVEEDORES if prov == "auto" else [prov]
+                    for proveedor in orquestador_ia.candidatos(orden):
+                        estado = orquestador_ia.estados[proveedor]
+                        if not estado.permitir():
+                            continue
+
+                        yield _evento_sse("inicio", {"proveedor": proveedor, "plan_desde_cache": False})
+                        extractor = ExtractorArrayJSON("dias")
+                        dias, advertencias = [], []
+                        estado.registrar_inicio()
+                        t_prov = time.perf_counter()
+                        try:
+                            for fragmento in _stream_fragmentos(proveedor, prompt):
+                                for crudo in extractor.alimentar(fragmento):
+                                    dia, adv = _dia_desde_crudo(crudo, len(dias) + 1, nivel_norm, perfil, permitidos)
+                                    if dia:
+                                        dias.append(dia)
+                                        advertencias.extend(adv)
+                                        yield _evento_sse("dia", dia.model_dump())
+
+                            # Respuesta cortada (MAX_TOKENS, corte de red): el arreglo nunca se cerró
+                            if not dias or not extractor.arreglo_cerrado:
+                                raise ValueError(f"{proveedor} no completó el arreglo de días")
+                        except Exception as e:
+                            orquestador_ia.registrar_error(proveedor, e)
+                            print(f"⚠️ Streaming de {proveedor} falló: {e}")
+                            yield _evento_sse("reinicio", {"proveedor": proveedor, "motivo": str(e)[:200]})
+                            dias = []
+                            continue
+
+                        estado.registrar_exito((time.perf_counter() - t_prov) * 1000)
+                        generada_por = proveedor
+                        descripcion = DESCRIPCION_PROVEEDOR[proveedor]
+                        try:
+                            plan_json = extract_json_safe(extractor.texto)
+                        except ValueError:
+                            plan_json = {"dias": []}
+                        if plan_json.get("dias"):
+                            _grabar_respuesta(proveedor, prompt, plan_json)
+                            if solicitud.usar_cache:
+                                cache_planes.guardar(clave_cache, proveedor, plan_json)
+                        break
+
+            # Local (pedido explícito, proveedor desconocido o todos los de IA fallaron)
+            if not dias:
+                yield _evento_sse("inicio", {"proveedor": "local", "plan_desde_cache": False})
+                dias, seguridad = distribuir_ejercicios_inteligente(
+                    obtener_ejercicios_por_grupo(None, nivel_norm),
+                    solicitud.dias,
+                    nivel_norm,
+                    solicitud.objetivos,
+                    perfil
+                )
+                generada_por = "local"
+                descripcion = (
+                    "Rutina generada localmente" if prov != "auto" and prov not in GENERADORES_IA
+                    else "Rutina generada localmente (fallback por fallo de IA)"
+                )
+                for d in dias:
+                    yield _evento_sse("dia", d.model_dump())
+
+        except Exception as e:
+            print(f"❌ Error en generación streaming: {e}")
+            yield _evento_sse("error", {"status_code": 500, "detail": f"Error al generar rutina: {str(e)}"})
+            return
+
+        if seguridad is None:
+            seguridad = SeguridadOut(
+                nivel_riesgo="bajo",
+                detonantes_evitar=[],
+                advertencias=advertencias,
+                validada_por_reglas=(len(advertencias) == 0)
+            )
+
+        # Persistencia al cerrar el stream: una sesión propia (la del request ya no aplica)
+        db = SessionLocal()
+        try:
+            resultado = _completar_rutina(
+                solicitud, db, activar_vigencia, nivel_norm,
+                dias, seguridad, generada_por, descripcion, plan_desde_cache
+            )
+            resultado["duracion_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            yield _evento_sse("completado", resultado)
+        except HTTPException as e:
+            yield _evento_sse("error", {"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Error al guardar rutina generada en streaming: {e}")
+            yield _evento_sse("error", {"status_code": 500, "detail": f"Error al guardar rutina: {str(e)}"})
+        finally:
+            db.close()
+
+
+    # ============================================================
+    # GENERACIÓN EN LOTE (todos los clientes de un entrenador)
+    # ============================================================
+
+    # Generaciones simultáneas por lote (limita la presión sobre los proveedores)
+    IA_LOTE_CONCURRENCIA = int(os.getenv("IA_LOTE_CONCURRENCIA", "3"))
+    # Rutinas por transacción al guardar
+    IA_LOTE_TAMANO_TX = int(os.getenv("IA_LOTE_TAMANO_TX", "10"))
+
+
+    @router.post("/entrenador/{id_entrenador}/generar-rutinas")
+    def generar_rutinas_lote(
+            id_entrenador: int,
+            lote: SolicitudLoteRutinas,
+            activar_vigencia: bool = Query(False, description="Activar vigencia inmediatamente"),
+            db: Session = Depends(get_db)
+    ):
+        """
+        Genera una rutina por cliente y transmite el progreso por SSE:
+        `inicio`, un evento `cliente` por cada cambio (generado / guardado / error)
+        y `completado` con el resumen. Clientes con el mismo perfil comparten una
+        sola generación (más la caché de planes); las rutinas se guardan en
+        transacciones de IA_LOTE_TAMANO_TX.
+        """
+        ids = list(dict.fromkeys(lote.ids_clientes))
+        q = text("""
+            SELECT DISTINCT id_cliente FROM cliente_entrenador
+            WHERE id_entrenador = :entrenador
+              AND activo = TRUE AND estado = 'activo'
+              AND id_cliente IN :ids
+        """).bindparams(bindparam("ids", expanding=True))
+        asignados = {f.id_cliente for f in db.execute(q, {"entrenador": id_entrenador, "ids": ids}).fetchall()}
+        if not asignados:
+            raise HTTPException(status_code=404, detail="Ninguno de los clientes está asignado a este entrenador")
+
+        comunes = lote.model_dump(exclude={"ids_clientes", "perfiles"})
+        solicitudes = [
+            SolicitudGenerarRutina(id_cliente=c, perfil_salud=lote.perfiles.get(c), **comunes)
+            for c in ids if c in asignados
+        ]
+        rechazados = [c for c in ids if c not in asignados]
+
+        # Parámetros compartidos: se validan una vez, antes de abrir el stream
+        nivel_norm, prov = _normalizar_solicitud(solicitudes[0])
+
+        return StreamingResponse(
+            _stream_lote(id_entrenador, solicitudes, rechazados, nivel_norm, prov, activar_vigencia),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+
+    def _guardar_tanda(tanda: list) -> List[Dict[str, Any]]:
+        """
+        Persiste varias rutinas en una transacción, cada una en su SAVEPOINT para
+        que un fallo no arrastre al resto. Devuelve un resultado por cliente.
+        """
+        resultados: List[Dict[str, Any]] = []
+        guardados = []
+        db = SessionLocal()
+        try:
+            for base, compartido in tanda:
+                try:
+                    with db.begin_nested():
+                        persistido = persistir_rutina_generada(db, base, confirmar=False)
+                    guardados.append((base, persistido, compartido))
+                except Exception as e:
+                    print(f"❌ Lote: no se pudo guardar la rutina del cliente {base.id_cliente}: {e}")
+                    resultados.append({"id_cliente": base.id_cliente, "estado": "error", "detail": str(e)[:200]})
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Lote: falló el commit de la tanda: {e}")
+            return resultados + [
+                {"id_cliente": base.id_cliente, "estado": "error", "detail": f"Error al guardar: {str(e)[:200]}"}
+                for base, _, _ in guardados
+            ]
+        finally:
+            db.close()
+
+        for base, persistido, compartido in guardados:
+            invalidar_cliente(base.id_cliente)
+            resultados.append({
+                "id_cliente": base.id_cliente,
+                "estado": "guardado",
+                "id_rutina": persistido["id_rutina"],
+                "id_historial": persistido["id_historial"],
+                "proveedor": base.generada_por,
+                "plan_compartido": compartido,
+            })
+        if any(p["ejercicios_creados"] for _, p, _ in guardados):
+            catalogo_ejercicios.invalidar()
+        return resultados
+
+
+    def _stream_lote(
+            id_entrenador: int,
+            solicitudes: List[SolicitudGenerarRutina],
+            rechazados: List[int],
+            nivel_norm: str,
+            prov: str,
+            activar_vigencia: bool
+    ):
+        t0 = time.perf_counter()
+        total = len(solicitudes) + len(rechazados)
+        resumen = {"guardadas": 0, "errores": len(rechazados), "generaciones": 0, "desde_cache": 0}
+
+        # Con los parámetros comunes, el prompt solo cambia con el perfil de salud
+        grupos: Dict[str, List[SolicitudGenerarRutina]] = {}
+        for sol in solicitudes:
+            clave = sol.perfil_salud.model_dump_json() if sol.perfil_salud else ""
+            grupos.setdefault(clave, []).append(sol)
+
+        yield _evento_sse("inicio", {
+            "id_entrenador": id_entrenador,
+            "clientes": total,
+            "generaciones": len(grupos),
+            "concurrencia": IA_LOTE_CONCURRENCIA,
+        })
+        for c in rechazados:
+            yield _evento_sse("cliente", {"id_cliente": c, "estado": "error",
+                                          "detail": "Cliente no asignado a este entrenador"})
+
+        def _progreso(evento: Dict[str, Any]) -> str:
+            hechos = resumen["guardadas"] + resumen["errores"]
+            return _evento_sse("cliente", {**evento, "progreso": f"{hechos}/{total}"})
+
+        pool = ThreadPoolExecutor(max_workers=max(1, IA_LOTE_CONCURRENCIA), thread_name_prefix="ia_lote")
+        pendientes: list = []
+        try:
+            futuros = {
+                pool.submit(_generar_dias, grupo[0], nivel_norm, prov): grupo
+                for grupo in grupos.values()
+            }
+            for futuro in as_completed(futuros):
+                grupo = futuros[futuro]
+                try:
+                    dias, seguridad, generada_por, descripcion, desde_cache = futuro.result()
+                    resumen["generaciones"] += 1
+                    resumen["desde_cache"] += int(desde_cache)
+
+                    base, seguridad = _armar_rutina(
+                        grupo[0], activar_vigencia, nivel_norm, dias, seguridad, generada_por, descripcion
+                    )
+                    for i, sol in enumerate(grupo):
+                        base_cliente = base if i == 0 else _armar_rutina(
+                            sol, activar_vigencia, nivel_norm, base.dias, seguridad,
+                            base.generada_por, base.descripcion
+                        )[0]
+                        pendientes.append((base_cliente, desde_cache or i > 0))
+                        yield _evento_sse("cliente", {
+                            "id_cliente": sol.id_cliente,
+                            "estado": "generado",
+                            "proveedor": base.generada_por,
+                            "dias": len(base.dias),
+                        })
+                except Exception as e:
+                    print(f"❌ Lote: falló la generación para {[s.id_cliente for s in grupo]}: {e}")
+                    for sol in grupo:
+                        resumen["errores"] += 1
+                        yield _progreso({"id_cliente": sol.id_cliente, "estado": "error",
+                                         "detail": str(getattr(e, "detail", None) or e)[:200]})
+
+                if len(pendientes) >= IA_LOTE_TAMANO_TX:
+                    tanda, pendientes = pendientes, []
+                    for r in _guardar_tanda(tanda):
+                        resumen["guardadas" if r["estado"] == "guardado" else "errores"] += 1
+                        yield _progreso(r)
+
+            if pendientes:
+                tanda, pendientes = pendientes, []
+                for r in _guardar_tanda(tanda):
+                    resumen["guardadas" if r["estado"] == "guardado" else "errores"] += 1
+                    yield _progreso(r)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        resumen["duracion_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        print(f"📦 Lote de rutinas del entrenador {id_entrenador}: {resumen}")
+        yield _evento_sse("completado", resumen)
+
+
     # ============================================================
     # NUEVOS ENDPOINTS - GESTIÓN DE VIGENCIA
     # ============================================================
@@ -2425,25 +3345,41 @@ else:
 
     @router.get("/ai/status")
     def ai_providers_status():
-        """Endpoint para ver el estado de todos los proveedores de IA"""
+        """Estado de los proveedores de IA: configuración, circuito, latencias y errores"""
+        metricas = orquestador_ia.estado()
         return {
             "gemini": {
                 "configured": bool(GEMINI_API_KEY),
                 "model": GEMINI_MODEL if GEMINI_API_KEY else None,
-                "timeout_seconds": GEMINI_TIMEOUT_SECONDS
+                "timeout_seconds": GEMINI_TIMEOUT_SECONDS,
+                "metricas": metricas["gemini"]
             },
             "openai": {
                 "configured": bool(OPENAI_API_KEY),
                 "model": OPENAI_MODEL if OPENAI_API_KEY else None,
-                "client_available": openai_client is not None
+                "client_available": openai_client is not None,
+                "metricas": metricas["openai"]
             },
             "grok": {
                 "configured": bool(GROK_API_KEY),
                 "model": GROK_MODEL if GROK_API_KEY else None,
-                "client_available": grok_client is not None
+                "client_available": grok_client is not None,
+                "metricas": metricas["grok"]
+            },
+            "simulado": {
+                "configured": proveedor_simulado is not None,
+                "metricas": metricas.get("simulado"),
+                "estadisticas": proveedor_simulado.estadisticas() if proveedor_simulado else None,
+                "grabando": grabaciones_ia is not None
             },
             "local": {
                 "available": True,
                 "description": "Fallback local siempre disponible"
-            }
+            },
+            "orquestador": {
+                "orden": IA_ORDEN_PROVEEDORES,
+                "hedge_ms": int(IA_HEDGE_S * 1000),
+                "timeout_seconds": orquestador_ia.timeout_s
+            },
+            "cache_planes": cache_planes.estadisticas()
         }
\ No newline at end of file
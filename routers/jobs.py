@@ -0,0 +1,63 @@
+# routers/jobs.py
+"""
+Administración de las tareas periódicas (ver services/jobs_service.py).
+
+Se exige el header `X-Admin-Token` igual a ADMIN_TOKEN; si ADMIN_TOKEN no está
+definido los endpoints responden 403 (nadie puede disparar tareas).
+"""
+
+import hmac
+import os
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Header, Depends, Query
+
+from services.jobs_service import programador, SCHEDULER_ENABLED
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def _verificar_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Administración de tareas deshabilitada (ADMIN_TOKEN no definido)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Token de administración inválido")
+
+
+router = APIRouter(prefix="/admin/jobs", tags=["Jobs"], dependencies=[Depends(_verificar_admin)])
+
+
+@router.get("")
+def listar_jobs():
+    """Estado, próxima ejecución, latencias e historial reciente de cada tarea (este worker)."""
+    return {
+        "habilitado": SCHEDULER_ENABLED,
+        "activo": programador.activo,
+        "jobs": [job.estado() for job in programador.jobs()],
+    }
+
+
+@router.get("/historial")
+def historial_jobs(job: Optional[str] = None, limite: int = Query(50, ge=1, le=500)):
+    """Últimas ejecuciones registradas en la BD por cualquier worker."""
+    try:
+        return programador.historial_bd(job, limite)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al leer historial: {str(e)}")
+
+
+@router.post("/{nombre}/ejecutar")
+def ejecutar_job(nombre: str, esperar: bool = False, timeout: float = Query(120, gt=0, le=600)):
+    """Dispara una tarea ahora. Con `esperar=true` devuelve el resultado de la ejecución."""
+    try:
+        futuro = programador.ejecutar_ahora(nombre)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Tarea '{nombre}' no existe")
+
+    if not esperar:
+        return {"success": True, "mensaje": f"Tarea '{nombre}' encolada"}
+
+    try:
+        return {"success": True, "ejecucion": futuro.result(timeout=timeout)}
+    except TimeoutError:
+        return {"success": True, "mensaje": f"Tarea '{nombre}' sigue en ejecución"}
@@ -1,6 +1,6 @@
 # routers/progresion.py - VERSIÓN MEJORADA Y COMPLETA
-from fastapi import APIRouter, HTTPException, Query, status, Depends
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query, status, Depends, Response
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 
@@ -9,7 +9,16 @@ from sqlalchemy import text
 from db import get_connection
 from sqlalchemy.orm import Session
 from utils.dependencies import get_db
+from utils.cursor import codificar_cursor, decodificar_cursor, fecha_id_cursor
+from utils.campos import HEADER_CURSOR, parsear_campos, proyectar, respuesta_proyectada
+from services.alertas_service import generar_alertas_retrasadas, ALERTAS_SHARDS
+from services.progreso_service import (
+    dashboard_cache, invalidar_cliente, siguiente_sesion, registrar_en_stats, insertar_progresos_lote
+)
+from services.analitica_progreso import cargar_serie, analizar, reducir_serie
+from services.detector_progreso import analizar_clientes
 import json
+import uuid
 
 router = APIRouter()
 
@@ -142,6 +151,54 @@ class RegistrarProgresoRequest(BaseModel):
     dolor_molestias: Optional[str] = None
 
 
+class EjercicioLoteRequest(BaseModel):
+    """Un ejercicio (o serie) dentro de una sesión registrada en lote"""
+    id_ejercicio: int
+    peso_kg: Optional[float] = None
+    series_completadas: int
+    repeticiones_completadas: int
+    tiempo_descanso_segundos: Optional[int] = None
+    rpe: Optional[int] = None
+    calidad_tecnica: Optional[str] = None
+    notas: Optional[str] = None
+    dolor_molestias: Optional[str] = None
+
+
+class SesionLoteRequest(BaseModel):
+    """Request para registrar una sesión completa de una sola vez"""
+    id_historial: int
+    fecha_sesion: str
+    dia_rutina: Optional[str] = None
+    estado_animo: Optional[str] = None
+    ejercicios: List[EjercicioLoteRequest] = Field(..., min_length=1, max_length=200)
+
+
+class RegistroSyncRequest(BaseModel):
+    """Registro de progreso generado offline por la app, con su clave de idempotencia"""
+    clave_idempotencia: str = Field(..., min_length=1, max_length=64)
+    id_historial: int
+    id_ejercicio: int
+    fecha_sesion: str
+    dia_rutina: Optional[str] = None
+    peso_kg: Optional[float] = None
+    series_completadas: int
+    repeticiones_completadas: int
+    tiempo_descanso_segundos: Optional[int] = None
+    rpe: Optional[int] = None
+    calidad_tecnica: Optional[str] = None
+    estado_animo: Optional[str] = None
+    notas: Optional[str] = None
+    dolor_molestias: Optional[str] = None
+
+
+class SyncProgresoRequest(BaseModel):
+    """Cola de registros offline + cursor de la última sincronización"""
+    id_cliente: int
+    cursor: Optional[str] = None
+    registros: List[RegistroSyncRequest] = Field(default_factory=list, max_length=500)
+    limite_cambios: int = Field(500, ge=1, le=2000)
+
+
 # ============================================================
 # 🔹 ENDPOINTS - DASHBOARD
 # ============================================================
@@ -150,119 +207,93 @@ class RegistrarProgresoRequest(BaseModel):
 def obtener_dashboard_completo(id_cliente: int):
     """
     ✅ Dashboard completo con todas las métricas del cliente
+
+    Todas las métricas se calculan en una sola consulta y el resultado se guarda
+    en `dashboard_cache` hasta que una escritura del cliente lo invalida.
     """
+    cacheado = dashboard_cache.get(id_cliente)
+    if cacheado is not None:
+        return cacheado
+
     cn = None
     try:
         cn = get_connection()
         cur = cn.cursor(dictionary=True)
 
-        # 1. Verificar que el cliente existe
         cur.execute("""
-            SELECT id_usuario, nombre, apellido
-            FROM usuarios
-            WHERE id_usuario = %s AND rol = 'alumno'
-        """, (id_cliente,))
-        cliente = cur.fetchone()
+            SELECT
+                u.id_usuario, u.nombre, u.apellido,
+                pe.dias_entrenados, pe.total_sesiones, pe.primera_sesion, pe.ultima_sesion,
+                pe.records_mes,
+                (SELECT COUNT(*)
+                   FROM historial_rutinas
+                  WHERE id_cliente = u.id_usuario
+                    AND estado = 'activa'
+                    AND fecha_fin > NOW()) AS rutinas_activas,
+                (SELECT nombre_rutina
+                   FROM historial_rutinas
+                  WHERE id_cliente = u.id_usuario
+                  ORDER BY fecha_inicio DESC
+                  LIMIT 1) AS ultima_rutina,
+                (SELECT AVG(porcentaje_cumplimiento)
+                   FROM historial_rutinas
+                  WHERE id_cliente = u.id_usuario) AS cumplimiento_promedio,
+                (SELECT COUNT(*)
+                   FROM alertas_progresion
+                  WHERE id_cliente = u.id_usuario AND estado = 'pendiente') AS alertas_pendientes,
+                (SELECT COUNT(*)
+                   FROM objetivos_cliente
+                  WHERE id_cliente = u.id_usuario
+                    AND estado IN ('pendiente', 'en_progreso')) AS objetivos_activos
+            FROM usuarios u
+            CROSS JOIN (
+                SELECT
+                    COUNT(DISTINCT DATE(fecha_sesion)) AS dias_entrenados,
+                    COUNT(*) AS total_sesiones,
+                    MIN(fecha_sesion) AS primera_sesion,
+                    MAX(fecha_sesion) AS ultima_sesion,
+                    SUM(es_record_personal = TRUE
+                        AND fecha_sesion >= DATE_FORMAT(NOW(), '%%Y-%%m-01')) AS records_mes
+                FROM progreso_ejercicios
+                WHERE id_cliente = %s
+            ) pe
+            WHERE u.id_usuario = %s AND u.rol = 'alumno'
+        """, (id_cliente, id_cliente))
+        fila = cur.fetchone()
 
-        if not cliente:
+        if not fila:
             raise HTTPException(404, f"Cliente {id_cliente} no encontrado")
 
-        # 2. Estadísticas generales
-        cur.execute("""
-            SELECT 
-                COUNT(DISTINCT DATE(fecha_sesion)) AS dias_entrenados,
-                COUNT(*) AS total_sesiones,
-                MIN(fecha_sesion) AS primera_sesion
-            FROM progreso_ejercicios
-            WHERE id_cliente = %s
-        """, (id_cliente,))
-        stats = cur.fetchone()
-
-        # 3. Rutinas activas
-        cur.execute("""
-            SELECT COUNT(*) AS rutinas_activas
-            FROM historial_rutinas
-            WHERE id_cliente = %s
-              AND estado = 'activa'
-              AND fecha_fin > NOW()
-        """, (id_cliente,))
-        rutinas = cur.fetchone()
-
-        # 4. Última rutina y entrenamiento
-        cur.execute("""
-            SELECT hr.nombre_rutina, pe.fecha_sesion
-            FROM historial_rutinas hr
-            LEFT JOIN progreso_ejercicios pe ON pe.id_cliente = hr.id_cliente
-            WHERE hr.id_cliente = %s
-            ORDER BY pe.fecha_sesion DESC
-            LIMIT 1
-        """, (id_cliente,))
-        ultima = cur.fetchone()
-
-        # 5. Alertas pendientes
-        cur.execute("""
-            SELECT COUNT(*) AS pendientes
-            FROM alertas_progresion
-            WHERE id_cliente = %s AND estado = 'pendiente'
-        """, (id_cliente,))
-        alertas = cur.fetchone()
-
-        # 6. Records este mes
-        cur.execute("""
-            SELECT COUNT(*) AS records
-            FROM progreso_ejercicios
-            WHERE id_cliente = %s
-              AND es_record_personal = TRUE
-              AND MONTH(fecha_sesion) = MONTH(NOW())
-              AND YEAR(fecha_sesion) = YEAR(NOW())
-        """, (id_cliente,))
-        records = cur.fetchone()
-
-        # 7. Objetivos activos
-        cur.execute("""
-            SELECT COUNT(*) AS activos
-            FROM objetivos_cliente
-            WHERE id_cliente = %s
-              AND estado IN ('pendiente', 'en_progreso')
-        """, (id_cliente,))
-        objetivos = cur.fetchone()
-
-        # 8. Cumplimiento promedio
-        cur.execute("""
-            SELECT AVG(porcentaje_cumplimiento) AS promedio
-            FROM historial_rutinas
-            WHERE id_cliente = %s
-        """, (id_cliente,))
-        cumplimiento = cur.fetchone()
-
-        # 9. Calcular días entrenando
         dias_entrenando = 0
-        if stats["primera_sesion"]:
-            dias_entrenando = (datetime.now() - stats["primera_sesion"]).days
+        if fila["primera_sesion"]:
+            dias_entrenando = (datetime.now() - fila["primera_sesion"]).days
 
-        # 10. Progreso general (basado en cumplimiento)
-        progreso_general = cumplimiento["promedio"] or 0.0
+        # Progreso general (basado en cumplimiento)
+        progreso_general = float(fila["cumplimiento_promedio"] or 0.0)
+        ultima_sesion = fila["ultima_sesion"].isoformat() if fila["ultima_sesion"] else None
 
-        return DashboardProgreso(
+        dashboard = DashboardProgreso(
             id_cliente=id_cliente,
-            nombre_cliente=f"{cliente['nombre']} {cliente['apellido']}",
+            nombre_cliente=f"{fila['nombre']} {fila['apellido']}",
             dias_entrenando=dias_entrenando,
-            sesiones_completadas=stats["total_sesiones"] or 0,
-            rutinas_activas=rutinas["rutinas_activas"] or 0,
-            ultima_rutina=ultima["nombre_rutina"] if ultima else None,
-            ultimo_entrenamiento=ultima["fecha_sesion"].isoformat() if ultima and ultima["fecha_sesion"] else None,
+            sesiones_completadas=fila["total_sesiones"] or 0,
+            rutinas_activas=fila["rutinas_activas"] or 0,
+            ultima_rutina=fila["ultima_rutina"],
+            ultimo_entrenamiento=ultima_sesion,
             progreso_general=min(progreso_general, 100.0),
             resumen={
-                "total_rutinas": rutinas["rutinas_activas"] or 0,
+                "total_rutinas": fila["rutinas_activas"] or 0,
                 "rutinas_completadas": 0,  # Se puede calcular si es necesario
-                "total_sesiones": stats["total_sesiones"] or 0,
+                "total_sesiones": fila["total_sesiones"] or 0,
                 "cumplimiento_promedio": progreso_general,
-                "ultima_sesion": ultima["fecha_sesion"].isoformat() if ultima and ultima["fecha_sesion"] else None
+                "ultima_sesion": ultima_sesion
             },
-            alertas_pendientes=alertas["pendientes"] or 0,
-            records_este_mes=records["records"] or 0,
-            objetivos_activos=objetivos["activos"] or 0
+            alertas_pendientes=fila["alertas_pendientes"] or 0,
+            records_este_mes=int(fila["records_mes"] or 0),
+            objetivos_activos=fila["objetivos_activos"] or 0
         )
+        dashboard_cache.set(id_cliente, dashboard)
+        return dashboard
 
     except HTTPException:
         raise
@@ -282,11 +313,39 @@ def obtener_dashboard_completo(id_cliente: int):
 # 🔹 ENDPOINTS - HISTORIAL
 # ============================================================
 
+# Campos de HistorialProgreso que necesitan unir progreso_ejercicios / usuarios
+_CAMPOS_HISTORIAL_PROGRESO = {"dias_entrenados", "sesiones_completadas", "porcentaje_cumplimiento",
+                              "peso_inicial", "peso_final"}
+CAMPOS_HISTORIAL = list(HistorialProgreso.model_fields)
+
+
 @router.get("/historial/cliente/{id_cliente}", response_model=List[HistorialProgreso])
-def obtener_historial_completo(id_cliente: int, limit: int = 30, offset: int = 0):
+def obtener_historial_completo(
+        id_cliente: int,
+        response: Response,
+        limit: int = 30,
+        offset: int = 0,
+        cursor: Optional[str] = Query(None, description="Header X-Next-Cursor de la página anterior"),
+        fields: Optional[str] = Query(None, description="Campos separados por coma, p. ej. id_historial,rutina,estado"),
+):
     """
     ✅ Historial completo de rutinas con métricas de cumplimiento
+
+    Paginación por keyset (fecha_inicio, id_historial): si hay más filas, el
+    header X-Next-Cursor trae el cursor de la siguiente página (`offset` se
+    ignora cuando llega `cursor`). Con `fields` solo se calculan esos campos;
+    sin métricas pedidas no se une progreso_ejercicios.
     """
+    try:
+        campos = parsear_campos(fields, CAMPOS_HISTORIAL)
+        desde = fecha_id_cursor(decodificar_cursor(cursor))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    pedidos = set(campos or CAMPOS_HISTORIAL)
+    con_progreso = bool(pedidos & _CAMPOS_HISTORIAL_PROGRESO)
+    con_entrenador = "entrenador" in pedidos
+
     cn = None
     try:
         cn = get_connection()
@@ -300,39 +359,58 @@ def obtener_historial_completo(id_cliente: int, limit: int = 30, offset: int = 0
         if not cur.fetchone():
             raise HTTPException(404, f"Cliente {id_cliente} no encontrado")
 
-        # Obtener historial con métricas calculadas
-        cur.execute("""
-            SELECT 
-                hr.id_historial,
-                hr.nombre_rutina,
-                hr.objetivo,
-                hr.fecha_inicio,
-                hr.fecha_fin,
-                hr.estado,
-                DATEDIFF(hr.fecha_fin, hr.fecha_inicio) AS duracion_dias,
-                COUNT(DISTINCT DATE(pe.fecha_sesion)) AS dias_entrenados,
-                COUNT(pe.id_progreso) AS sesiones_completadas,
-                CONCAT(u.nombre, ' ', u.apellido) AS entrenador,
-                MIN(pe.peso_kg) AS peso_inicial,
-                MAX(pe.peso_kg) AS peso_final
+        columnas = [
+            "hr.id_historial", "hr.nombre_rutina", "hr.objetivo", "hr.fecha_inicio", "hr.fecha_fin", "hr.estado",
+            "DATEDIFF(hr.fecha_fin, hr.fecha_inicio) AS duracion_dias",
+        ]
+        joins = ""
+        if con_entrenador:
+            columnas.append("CONCAT(u.nombre, ' ', u.apellido) AS entrenador")
+            joins += " LEFT JOIN usuarios u ON hr.id_entrenador = u.id_usuario"
+        if con_progreso:
+            columnas += [
+                "COUNT(DISTINCT DATE(pe.fecha_sesion)) AS dias_entrenados",
+                "COUNT(pe.id_progreso) AS sesiones_completadas",
+                "MIN(pe.peso_kg) AS peso_inicial",
+                "MAX(pe.peso_kg) AS peso_final",
+            ]
+            joins += " LEFT JOIN progreso_ejercicios pe ON pe.id_historial = hr.id_historial"
+
+        sql = f"""
+            SELECT {", ".join(columnas)}
             FROM historial_rutinas hr
-            LEFT JOIN usuarios u ON hr.id_entrenador = u.id_usuario
-            LEFT JOIN progreso_ejercicios pe ON pe.id_historial = hr.id_historial
+            {joins}
             WHERE hr.id_cliente = %s
-            GROUP BY hr.id_historial
-            ORDER BY hr.fecha_inicio DESC
-            LIMIT %s OFFSET %s
-        """, (id_cliente, limit, offset))
+        """
+        params: list = [id_cliente]
+        if desde:
+            sql += " AND (hr.fecha_inicio < %s OR (hr.fecha_inicio = %s AND hr.id_historial < %s))"
+            params += [desde[0], desde[0], desde[1]]
+        if con_progreso:
+            sql += " GROUP BY hr.id_historial"
+        sql += " ORDER BY hr.fecha_inicio DESC, hr.id_historial DESC LIMIT %s"
+        params.append(limit + 1)
+        if not desde:
+            sql += " OFFSET %s"
+            params.append(offset)
 
+        # Obtener historial con métricas calculadas
+        cur.execute(sql, tuple(params))
         data = cur.fetchall()
+
+        siguiente = None
+        if len(data) > limit:
+            data = data[:limit]
+            siguiente = codificar_cursor({"fecha": data[-1]["fecha_inicio"], "id": data[-1]["id_historial"]})
+
         historial = []
 
         for row in data:
             duracion = row["duracion_dias"] or 1
-            dias_entrenados = row["dias_entrenados"] or 0
+            dias_entrenados = row.get("dias_entrenados") or 0
             porcentaje = (dias_entrenados / duracion * 100) if duracion > 0 else 0
 
-            historial.append(HistorialProgreso(
+            fila = dict(
                 id_historial=row["id_historial"],
                 fecha_inicio=row["fecha_inicio"].isoformat(),
                 fecha_fin=row["fecha_fin"].isoformat(),
@@ -340,14 +418,19 @@ def obtener_historial_completo(id_cliente: int, limit: int = 30, offset: int = 0
                 objetivo=row["objetivo"],
                 duracion_dias=duracion,
                 dias_entrenados=dias_entrenados,
-                sesiones_completadas=row["sesiones_completadas"] or 0,
+                sesiones_completadas=row.get("sesiones_completadas") or 0,
                 porcentaje_cumplimiento=min(porcentaje, 100.0),
                 estado=row["estado"],
-                entrenador=row["entrenador"],
-                peso_inicial=row["peso_inicial"],
-                peso_final=row["peso_final"]
-            ))
+                entrenador=row.get("entrenador"),
+                peso_inicial=row.get("peso_inicial"),
+                peso_final=row.get("peso_final")
+            )
+            historial.append(HistorialProgreso(**fila) if campos is None else proyectar(fila, campos))
 
+        if campos is not None:
+            return respuesta_proyectada(historial, siguiente)
+        if siguiente:
+            response.headers[HEADER_CURSOR] = siguiente
         return historial
 
     except HTTPException:
@@ -399,18 +482,23 @@ def obtener_ejercicios_con_progreso(id_historial: int, id_cliente: int):
                 COUNT(DISTINCT pe.id_progreso) AS total_sesiones,
                 MIN(pe.peso_kg) AS peso_inicial,
                 MAX(pe.peso_kg) AS peso_maximo,
-                (SELECT peso_kg 
-                 FROM progreso_ejercicios 
-                 WHERE id_ejercicio = hre.id_ejercicio AND id_cliente = %s
-                 ORDER BY fecha_sesion DESC LIMIT 1) AS peso_actual,
+                COALESCE(
+                    MAX(s.peso_ultimo),
+                    (SELECT peso_kg
+                     FROM progreso_ejercicios
+                     WHERE id_ejercicio = hre.id_ejercicio AND id_cliente = %s
+                     ORDER BY fecha_sesion DESC LIMIT 1)
+                ) AS peso_actual,
                 MAX(pe.fecha_sesion) AS ultima_sesion
             FROM historial_rutina_ejercicios hre
             INNER JOIN ejercicios e ON e.id_ejercicio = hre.id_ejercicio
+            LEFT JOIN progreso_stats_ejercicio s ON s.id_cliente = %s
+                AND s.id_ejercicio = hre.id_ejercicio
             LEFT JOIN progreso_ejercicios pe ON pe.id_ejercicio = hre.id_ejercicio 
                 AND pe.id_historial = %s
             WHERE hre.id_historial = %s
             GROUP BY hre.id_ejercicio, e.nombre, e.grupo_muscular
-        """, (id_cliente, id_historial, id_historial))
+        """, (id_cliente, id_cliente, id_historial, id_historial))
 
         ejercicios = []
         for row in cur.fetchall():
@@ -518,6 +606,57 @@ def obtener_progreso_ejercicio(id_ejercicio: int, id_cliente: int, limite: int =
             cn.close()
 
 
+@router.get("/ejercicio/{id_ejercicio}/cliente/{id_cliente}/serie")
+def obtener_serie_ejercicio(
+    id_ejercicio: int,
+    id_cliente: int,
+    desde: Optional[datetime] = Query(None),
+    hasta: Optional[datetime] = Query(None),
+    puntos: int = Query(200, ge=3, le=2000),
+    modo: str = Query("lttb"),
+    metrica: str = Query("e1rm"),
+    ventana: int = Query(5, ge=2, le=50),
+):
+    """
+    Serie temporal reducida en el servidor + analítica de tendencia.
+    - modo=lttb: muestras reales elegidas por LTTB sobre `metrica` (e1rm | peso | volumen)
+    - modo=intervalos: `puntos` intervalos de tiempo con promedio/máximo/volumen
+    """
+    if modo not in ("lttb", "intervalos"):
+        raise HTTPException(400, "modo debe ser 'lttb' o 'intervalos'")
+    if metrica not in ("e1rm", "peso", "volumen"):
+        raise HTTPException(400, "metrica debe ser 'e1rm', 'peso' o 'volumen'")
+    if desde and hasta and desde > hasta:
+        raise HTTPException(400, "'desde' debe ser anterior a 'hasta'")
+
+    cn = None
+    try:
+        cn = get_connection()
+        cur = cn.cursor()
+
+        serie = cargar_serie(cur, id_cliente, id_ejercicio, desde, hasta)
+
+        return {
+            "id_cliente": id_cliente,
+            "id_ejercicio": id_ejercicio,
+            "modo": modo,
+            "metrica": metrica,
+            "total_sesiones": int(serie["t"].size),
+            "puntos": reducir_serie(serie, puntos, modo, metrica),
+            "analitica": analizar(serie, ventana),
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print("❌ Error en serie de ejercicio:", e)
+        raise HTTPException(500, f"Error: {str(e)}")
+    finally:
+        if cn and cn.is_connected():
+            cur.close()
+            cn.close()
+
+
 # ============================================================
 # 🔹 ENDPOINTS - ALERTAS
 # ============================================================
@@ -650,12 +789,13 @@ def obtener_alertas_cliente(id_cliente: int):
 def analizar_progresion_cliente(id_cliente: int):
     """
     ✅ Analiza la progresión del cliente y genera alertas automáticas
+    (estancamiento por racha de peso igual y récords personales recientes)
     """
     cn = None
     try:
         print(f"\n🔍 DEBUG: POST /progresion/alertas/analizar/{id_cliente}")
         cn = get_connection()
-        cur = cn.cursor(dictionary=True)
+        cur = cn.cursor()
 
         # Verificar que el cliente existe
         cur.execute("""
@@ -666,114 +806,10 @@ def analizar_progresion_cliente(id_cliente: int):
         if not cur.fetchone():
             raise HTTPException(status_code=404, detail=f"Cliente {id_cliente} no encontrado")
 
-        alertas_generadas = 0
-
-        # 1. Detectar ejercicios con estancamiento (mismo peso por 3+ sesiones)
-        cur.execute("""
-            SELECT 
-                pe.id_ejercicio,
-                e.nombre,
-                pe.peso_kg AS peso_actual,
-                COUNT(*) AS sesiones_mismo_peso,
-                LAG(pe.peso_kg, 3) OVER (
-                    PARTITION BY pe.id_ejercicio 
-                    ORDER BY pe.fecha_sesion
-                ) AS peso_hace_3_sesiones
-            FROM progreso_ejercicios pe
-            INNER JOIN ejercicios e ON e.id_ejercicio = pe.id_ejercicio
-            WHERE pe.id_cliente = %s
-              AND pe.fecha_sesion >= DATE_SUB(NOW(), INTERVAL 30 DAY)
-            GROUP BY pe.id_ejercicio, e.nombre, pe.peso_kg
-            HAVING sesiones_mismo_peso >= 3
-              AND peso_actual = peso_hace_3_sesiones
-        """, (id_cliente,))
-
-        for row in cur.fetchall():
-            # Verificar si ya existe una alerta similar
-            cur.execute("""
-                SELECT id_alerta FROM alertas_progresion
-                WHERE id_cliente = %s
-                  AND id_ejercicio = %s
-                  AND tipo_alerta = 'estancamiento'
-                  AND estado = 'pendiente'
-                  AND DATE(fecha_generacion) >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-            """, (id_cliente, row["id_ejercicio"]))
-
-            if not cur.fetchone():  # Solo crear si no existe
-                peso_sugerido = row["peso_actual"] * 1.05  # Sugerir 5% más
-
-                cur.execute("""
-                    INSERT INTO alertas_progresion (
-                        id_cliente, id_ejercicio, tipo_alerta, prioridad,
-                        titulo, mensaje, recomendacion,
-                        nombre_ejercicio, peso_actual, peso_sugerido,
-                        sesiones_sin_progreso, estado
-                    ) VALUES (
-                        %s, %s, 'estancamiento', 'media',
-                        'Estancamiento detectado',
-                        %s,
-                        %s,
-                        %s, %s, %s, %s, 'pendiente'
-                    )
-                """, (
-                    id_cliente,
-                    row["id_ejercicio"],
-                    f"No has progresado en {row['nombre']} en las últimas {row['sesiones_mismo_peso']} sesiones",
-                    f"Intenta aumentar el peso a {peso_sugerido:.1f}kg o aumentar las repeticiones",
-                    row["nombre"],
-                    row["peso_actual"],
-                    peso_sugerido,
-                    row["sesiones_mismo_peso"]
-                ))
-
-                alertas_generadas += 1
-
-        # 2. Detectar records personales recientes (últimos 7 días)
-        cur.execute("""
-            SELECT 
-                pe.id_ejercicio,
-                e.nombre,
-                pe.peso_kg
-            FROM progreso_ejercicios pe
-            INNER JOIN ejercicios e ON e.id_ejercicio = pe.id_ejercicio
-            WHERE pe.id_cliente = %s
-              AND pe.es_record_personal = TRUE
-              AND pe.fecha_sesion >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-        """, (id_cliente,))
-
-        for row in cur.fetchall():
-            cur.execute("""
-                SELECT id_alerta FROM alertas_progresion
-                WHERE id_cliente = %s
-                  AND id_ejercicio = %s
-                  AND tipo_alerta = 'record_personal'
-                  AND DATE(fecha_generacion) >= DATE_SUB(NOW(), INTERVAL 7 DAY)
-            """, (id_cliente, row["id_ejercicio"]))
-
-            if not cur.fetchone():
-                cur.execute("""
-                    INSERT INTO alertas_progresion (
-                        id_cliente, id_ejercicio, tipo_alerta, prioridad,
-                        titulo, mensaje, recomendacion,
-                        nombre_ejercicio, peso_actual, estado
-                    ) VALUES (
-                        %s, %s, 'record_personal', 'baja',
-                        '🏆 ¡Nuevo Record Personal!',
-                        %s,
-                        'Sigue así, estás haciendo un excelente progreso',
-                        %s, %s, 'pendiente'
-                    )
-                """, (
-                    id_cliente,
-                    row["id_ejercicio"],
-                    f"Has establecido un nuevo récord en {row['nombre']} con {row['peso_kg']}kg",
-                    row["nombre"],
-                    row["peso_kg"]
-                ))
-
-                alertas_generadas += 1
+        alertas_generadas = analizar_clientes(cur, [id_cliente])[id_cliente]
 
         cn.commit()
+        invalidar_cliente(id_cliente)
 
         return {
             "success": True,
@@ -797,6 +833,57 @@ def analizar_progresion_cliente(id_cliente: int):
                 pass
 
 
+@router.post("/alertas/analizar/entrenador/{id_entrenador}")
+def analizar_progresion_entrenador(id_entrenador: int):
+    """
+    ✅ Analiza en una sola pasada a todos los clientes activos del entrenador
+    """
+    cn = None
+    try:
+        cn = get_connection()
+        cur = cn.cursor()
+
+        cur.execute("""
+            SELECT DISTINCT id_cliente
+            FROM cliente_entrenador
+            WHERE id_entrenador = %s AND activo = TRUE AND estado = 'activo'
+        """, (id_entrenador,))
+        ids_clientes = [fila[0] for fila in cur.fetchall()]
+
+        por_cliente = analizar_clientes(cur, ids_clientes)
+        total = sum(por_cliente.values())
+
+        cn.commit()
+        for id_cliente, generadas in por_cliente.items():
+            if generadas:
+                invalidar_cliente(id_cliente)
+
+        print(f"✅ Análisis entrenador {id_entrenador}: {len(ids_clientes)} clientes, {total} alertas")
+        return {
+            "success": True,
+            "id_entrenador": id_entrenador,
+            "clientes_analizados": len(ids_clientes),
+            "alertas_generadas": total,
+            "por_cliente": [
+                {"id_cliente": id_cliente, "alertas_generadas": generadas}
+                for id_cliente, generadas in por_cliente.items()
+            ]
+        }
+
+    except Exception as e:
+        print(f"❌ Error en análisis del entrenador: {str(e)}")
+        if cn:
+            cn.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al analizar progresión: {str(e)}")
+    finally:
+        if cn and cn.is_connected():
+            try:
+                cur.close()
+                cn.close()
+            except:
+                pass
+
+
 # ============================================================
 # 🔹 ENDPOINTS - OBJETIVOS
 # ============================================================
@@ -953,23 +1040,8 @@ def registrar_progreso(progreso: RegistrarProgresoRequest):
 
         id_cliente = historial["id_cliente"]
 
-        # Obtener número de sesión
-        cur.execute("""
-            SELECT COALESCE(MAX(numero_sesion), 0) + 1 AS siguiente_sesion
-            FROM progreso_ejercicios
-            WHERE id_ejercicio = %s AND id_cliente = %s
-        """, (progreso.id_ejercicio, id_cliente))
-
-        numero_sesion = cur.fetchone()["siguiente_sesion"]
-
-        # Obtener peso máximo histórico para detectar records
-        cur.execute("""
-            SELECT COALESCE(MAX(peso_kg), 0) AS peso_maximo
-            FROM progreso_ejercicios
-            WHERE id_ejercicio = %s AND id_cliente = %s
-        """, (progreso.id_ejercicio, id_cliente))
-
-        peso_maximo = cur.fetchone()["peso_maximo"]
+        # Número de sesión y peso máximo histórico (fila de estadísticas bloqueada)
+        numero_sesion, peso_maximo = siguiente_sesion(cur, id_cliente, progreso.id_ejercicio)
         es_record = False
 
         if progreso.peso_kg and progreso.peso_kg > peso_maximo:
@@ -1006,7 +1078,11 @@ def registrar_progreso(progreso: RegistrarProgresoRequest):
         ))
 
         id_progreso = cur.lastrowid
+
+        registrar_en_stats(cur, id_cliente, progreso.id_ejercicio, numero_sesion,
+                           progreso.peso_kg, progreso.fecha_sesion)
         cn.commit()
+        invalidar_cliente(id_cliente)
 
         return {
             "success": True,
@@ -1031,6 +1107,223 @@ def registrar_progreso(progreso: RegistrarProgresoRequest):
                 pass
 
 
+@router.post("/sesiones/lote")
+def registrar_sesion_lote(sesion: SesionLoteRequest):
+    """
+    ✅ Registra una sesión completa (varios ejercicios/series) en una sola transacción
+
+    El historial se valida una vez, los números de sesión y los récords se
+    calculan en memoria a partir de las estadísticas bloqueadas y todas las
+    filas se insertan con executemany. Los ítems de un mismo ejercicio reciben
+    números de sesión consecutivos en el orden enviado.
+    """
+    cn = None
+    try:
+        cn = get_connection()
+        cur = cn.cursor(dictionary=True)
+
+        cur.execute("""
+            SELECT id_cliente FROM historial_rutinas
+            WHERE id_historial = %s
+        """, (sesion.id_historial,))
+
+        historial = cur.fetchone()
+        if not historial:
+            raise HTTPException(404, "Historial de rutina no encontrado")
+
+        id_cliente = historial["id_cliente"]
+
+        registros = [
+            {
+                **ej.model_dump(),
+                "id_historial": sesion.id_historial,
+                "fecha_sesion": sesion.fecha_sesion,
+                "dia_rutina": sesion.dia_rutina,
+                "estado_animo": sesion.estado_animo,
+            }
+            for ej in sesion.ejercicios
+        ]
+        resultados = insertar_progresos_lote(cur, id_cliente, registros)
+        for indice, r in enumerate(resultados):
+            r["indice"] = indice
+
+        cn.commit()
+        invalidar_cliente(id_cliente)
+
+        records = sum(1 for r in resultados if r["record_personal"])
+        return {
+            "success": True,
+            "id_cliente": id_cliente,
+            "registrados": len(resultados),
+            "records_personales": records,
+            "mensaje": f"Sesión registrada: {len(resultados)} ejercicios",
+            "resultados": resultados
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Error al registrar sesión en lote: {str(e)}")
+        if cn:
+            cn.rollback()
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    finally:
+        if cn and cn.is_connected():
+            try:
+                cur.close()
+                cn.close()
+            except:
+                pass
+
+
+@router.post("/sync")
+def sincronizar_progreso(sync: SyncProgresoRequest):
+    """
+    ✅ Sincronización offline: aplica la cola de registros del cliente y devuelve los cambios
+
+    1. Cada registro trae una clave de idempotencia; las claves ya vistas se
+       responden como "duplicado" con su id_progreso original (reintentos seguros).
+    2. Los registros nuevos se aplican en bloque en una sola transacción.
+    3. Se devuelven los registros de progreso posteriores al cursor recibido
+       y un cursor nuevo para la próxima sincronización.
+    """
+    try:
+        desde = decodificar_cursor(sync.cursor) or {}
+        desde_id = int(desde.get("id_progreso", 0))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    id_cliente = sync.id_cliente
+    cn = None
+    try:
+        cn = get_connection()
+        cur = cn.cursor(dictionary=True)
+
+        resultados = {}
+        aplicados = 0
+
+        # Primera aparición de cada clave dentro de la cola
+        unicos = {}
+        for r in sync.registros:
+            if r.clave_idempotencia in unicos:
+                resultados.setdefault(r.clave_idempotencia, {"clave": r.clave_idempotencia, "estado": "duplicado"})
+            else:
+                unicos[r.clave_idempotencia] = r
+
+        if unicos:
+            claves = list(unicos)
+            marcas = ", ".join(["%s"] * len(claves))
+
+            ids_historial = sorted({r.id_historial for r in unicos.values()})
+            marcas_h = ", ".join(["%s"] * len(ids_historial))
+            cur.execute(f"""
+                SELECT id_historial FROM historial_rutinas
+                WHERE id_cliente = %s AND id_historial IN ({marcas_h})
+            """, (id_cliente, *ids_historial))
+            historiales_validos = {f["id_historial"] for f in cur.fetchall()}
+
+            cur.execute(f"""
+                SELECT clave, id_progreso FROM progreso_sync_claves
+                WHERE id_cliente = %s AND clave IN ({marcas})
+            """, (id_cliente, *claves))
+            existentes = {f["clave"]: f["id_progreso"] for f in cur.fetchall()}
+
+            nuevos = []
+            for clave, r in unicos.items():
+                if clave in existentes:
+                    resultados[clave] = {"clave": clave, "estado": "duplicado", "id_progreso": existentes[clave]}
+                elif r.id_historial not in historiales_validos:
+                    resultados[clave] = {"clave": clave, "estado": "rechazado",
+                                         "error": "Historial no encontrado para este cliente"}
+                else:
+                    nuevos.append(r)
+
+            if nuevos:
+                # Reclamar las claves: si otra sincronización concurrente ya la insertó, no es nuestra
+                token = uuid.uuid4().hex
+                cur.executemany("""
+                    INSERT IGNORE INTO progreso_sync_claves (id_cliente, clave, token_sync)
+                    VALUES (%s, %s, %s)
+                """, [(id_cliente, r.clave_idempotencia, token) for r in nuevos])
+                cur.execute("SELECT clave FROM progreso_sync_claves WHERE token_sync = %s", (token,))
+                reclamadas = {f["clave"] for f in cur.fetchall()}
+
+                aplicar = sorted(
+                    (r for r in nuevos if r.clave_idempotencia in reclamadas),
+                    key=lambda r: r.fecha_sesion
+                )
+                for r in nuevos:
+                    if r.clave_idempotencia not in reclamadas:
+                        resultados[r.clave_idempotencia] = {"clave": r.clave_idempotencia, "estado": "duplicado"}
+
+                if aplicar:
+                    insertados = insertar_progresos_lote(cur, id_cliente, [
+                        r.model_dump(exclude={"clave_idempotencia"}) for r in aplicar
+                    ])
+                    cur.executemany("""
+                        INSERT INTO progreso_sync_claves (id_cliente, clave, token_sync, id_progreso)
+                        VALUES (%s, %s, %s, %s)
+                        ON DUPLICATE KEY UPDATE id_progreso = VALUES(id_progreso)
+                    """, [
+                        (id_cliente, r.clave_idempotencia, token, ins["id_progreso"])
+                        for r, ins in zip(aplicar, insertados)
+                    ])
+                    for r, ins in zip(aplicar, insertados):
+                        resultados[r.clave_idempotencia] = {"clave": r.clave_idempotencia, "estado": "aplicado", **ins}
+                    aplicados = len(insertados)
+
+            cn.commit()
+            if aplicados:
+                invalidar_cliente(id_cliente)
+
+        # Cambios desde el cursor (incluye lo recién aplicado, con ids y números del servidor)
+        cur.execute("""
+            SELECT
+                id_progreso, id_historial, id_ejercicio, fecha_sesion, numero_sesion,
+                dia_rutina, peso_kg, series_completadas, repeticiones_completadas,
+                tiempo_descanso_segundos, rpe, calidad_tecnica, estado_animo,
+                notas, dolor_molestias, es_record_personal
+            FROM progreso_ejercicios
+            WHERE id_cliente = %s AND id_progreso > %s
+            ORDER BY id_progreso
+            LIMIT %s
+        """, (id_cliente, desde_id, sync.limite_cambios + 1))
+        cambios = cur.fetchall()
+
+        hay_mas = len(cambios) > sync.limite_cambios
+        cambios = cambios[:sync.limite_cambios]
+        for c in cambios:
+            c["fecha_sesion"] = c["fecha_sesion"].isoformat() if c["fecha_sesion"] else None
+            c["peso_kg"] = float(c["peso_kg"]) if c["peso_kg"] is not None else None
+            c["es_record_personal"] = bool(c["es_record_personal"])
+
+        ultimo_id = cambios[-1]["id_progreso"] if cambios else desde_id
+        return {
+            "success": True,
+            "aplicados": aplicados,
+            "resultados": [resultados[r.clave_idempotencia] for r in sync.registros
+                           if r.clave_idempotencia in resultados],
+            "cambios": cambios,
+            "cursor": codificar_cursor({"id_progreso": ultimo_id}),
+            "hay_mas": hay_mas
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Error en sincronización: {str(e)}")
+        if cn:
+            cn.rollback()
+        raise HTTPException(status_code=500, detail=f"Error al sincronizar: {str(e)}")
+    finally:
+        if cn and cn.is_connected():
+            try:
+                cur.close()
+                cn.close()
+            except:
+                pass
+
+
 # ============================================================
 # 🔹 ENDPOINTS AUXILIARES
 # ============================================================
@@ -1093,6 +1386,7 @@ def crear_historial(id_rutina: int, id_cliente: int):
         """, (id_historial, id_rutina))
 
         cn.commit()
+        invalidar_cliente(id_cliente)
 
         return {
             "success": True,
@@ -1123,11 +1417,12 @@ def atender_alerta(id_alerta: int):
 
         # Verificar que la alerta existe
         cur.execute("""
-            SELECT id_alerta FROM alertas_progresion
+            SELECT id_alerta, id_cliente FROM alertas_progresion
             WHERE id_alerta = %s
         """, (id_alerta,))
 
-        if not cur.fetchone():
+        alerta = cur.fetchone()
+        if not alerta:
             raise HTTPException(404, "Alerta no encontrada")
 
         # Actualizar estado
@@ -1138,6 +1433,7 @@ def atender_alerta(id_alerta: int):
         """, (id_alerta,))
 
         cn.commit()
+        invalidar_cliente(alerta[1])
 
         return {"success": True, "mensaje": "Alerta atendida correctamente"}
 
@@ -1159,8 +1455,9 @@ def actualizar_estado_alerta(id_alerta: int, accion: str = Query(None)):
         cn = get_connection()
         cur = cn.cursor()
 
-        cur.execute("""SELECT id_alerta FROM alertas_progresion WHERE id_alerta = %s""", (id_alerta,))
-        if not cur.fetchone():
+        cur.execute("""SELECT id_alerta, id_cliente FROM alertas_progresion WHERE id_alerta = %s""", (id_alerta,))
+        alerta = cur.fetchone()
+        if not alerta:
             raise HTTPException(404, "Alerta no encontrada")
 
         nuevo_estado = "atendida" if accion else "vista"
@@ -1172,6 +1469,7 @@ def actualizar_estado_alerta(id_alerta: int, accion: str = Query(None)):
         """, (nuevo_estado, accion or "", id_alerta))
 
         cn.commit()
+        invalidar_cliente(alerta[1])
 
         return {"success": True, "mensaje": f"Alerta actualizada: {nuevo_estado}", "estado": nuevo_estado}
 
@@ -1210,14 +1508,9 @@ def registrar_sesion(
         cn = get_connection()
         cur = cn.cursor(dictionary=True)
 
-        # Obtener número de sesión
-        cur.execute("""
-            SELECT COALESCE(MAX(numero_sesion), 0) + 1 AS siguiente
-            FROM progreso_ejercicios
-            WHERE id_cliente = %s AND id_ejercicio = %s
-        """, (id_cliente, id_ejercicio))
-
-        numero_sesion = cur.fetchone()["siguiente"]
+        # Número de sesión y peso máximo histórico (fila de estadísticas bloqueada)
+        numero_sesion, peso_maximo = siguiente_sesion(cur, id_cliente, id_ejercicio)
+        es_record = bool(peso_kg and peso_kg > peso_maximo)
 
         # Insertar progreso
         cur.execute("""
@@ -1232,9 +1525,10 @@ def registrar_sesion(
                 repeticiones_completadas,
                 rpe,
                 calidad_tecnica,
-                notas
+                notas,
+                es_record_personal
             ) VALUES (
-                %s, %s, %s, NOW(), %s, %s, %s, %s, %s, %s, %s
+                %s, %s, %s, NOW(), %s, %s, %s, %s, %s, %s, %s, %s
             )
         """, (
             id_historial,
@@ -1246,10 +1540,13 @@ def registrar_sesion(
             repeticiones,
             rpe,
             calidad_tecnica,
-            notas
+            notas,
+            es_record
         ))
 
+        registrar_en_stats(cur, id_cliente, id_ejercicio, numero_sesion, peso_kg)
         cn.commit()
+        invalidar_cliente(id_cliente)
 
         return {"success": True, "mensaje": "Sesión registrada correctamente"}
 
@@ -1263,84 +1560,21 @@ def registrar_sesion(
             cur.close()
             cn.close()
 
-def generar_alertas_progresion_periodica(db: Session):
+def generar_alertas_progresion_periodica(db: Session, shards: int = ALERTAS_SHARDS) -> dict:
     """
     Genera alertas automáticas cuando un cliente lleva 14–28 días sin aumentar peso
-    o sin registrar sesión en un ejercicio.
+    o sin registrar sesión en un ejercicio (motor set-based, ver services/alertas_service.py).
     """
+    return generar_alertas_retrasadas(db, shards)
 
-    query = text("""
-        SELECT 
-            he.id_cliente,
-            he.id_ejercicio,
-            e.nombre AS nombre_ejercicio,
-            MAX(he.fecha_sesion) AS ultima_sesion,
-            MAX(he.peso_kg) AS ultimo_peso
-        FROM progreso_ejercicios he
-        INNER JOIN ejercicios e ON e.id_ejercicio = he.id_ejercicio
-        GROUP BY he.id_cliente, he.id_ejercicio;
-    """)
-
-    registros = db.execute(query).fetchall()
-
-    hoy = datetime.now()
-
-    for r in registros:
-        id_cliente = r.id_cliente
-        id_ejercicio = r.id_ejercicio
-        nombre_ejercicio = r.nombre_ejercicio
-        ultima_sesion = r.ultima_sesion
-        ultimo_peso = r.ultimo_peso
-
-        if not ultima_sesion:
-            continue
-
-        dias = (hoy - ultima_sesion).days
-
-        # Solo generar alerta si han pasado entre 14 y 28 días
-        if 14 <= dias <= 28:
-
-            # Evitar duplicados
-            existe = db.execute(text("""
-                SELECT id_alerta 
-                FROM alertas_progresion 
-                WHERE id_cliente = :c AND id_ejercicio = :e
-                AND tipo_alerta = 'progresion_retrasada'
-                AND estado = 'pendiente'
-            """), {
-                "c": id_cliente,
-                "e": id_ejercicio
-            }).fetchone()
-
-            if existe:
-                continue
-
-            # Crear alerta
-            db.execute(text("""
-                INSERT INTO alertas_progresion (
-                    id_cliente, id_ejercicio,
-                    tipo_alerta, prioridad, titulo, mensaje,
-                    fecha_creacion, estado
-                ) VALUES (
-                    :c, :e,
-                    'progresion_retrasada', 'media',
-                    :titulo, :mensaje,
-                    NOW(), 'pendiente'
-                )
-            """), {
-                "c": id_cliente,
-                "e": id_ejercicio,
-                "titulo": f"Tiempo de subir peso en {nombre_ejercicio}",
-                "mensaje": f"Han pasado {dias} días desde tu última progresión en {nombre_ejercicio}. "
-                           f"Considera aumentar ligeramente el peso.",
-            })
-
-    db.commit()
 
 @router.post("/alertas/generar-periodicas")
-def alertas_periodicas(db: Session = Depends(get_db)):
-    generar_alertas_progresion_periodica(db)
-    return {"status": "ok", "mensaje": "Alertas generadas"}
+def alertas_periodicas(
+    shards: int = Query(ALERTAS_SHARDS, ge=1, le=256),
+    db: Session = Depends(get_db)
+):
+    resultado = generar_alertas_progresion_periodica(db, shards)
+    return {"status": "ok", "mensaje": "Alertas generadas", **resultado}
 
 
 @router.post("/alertas/generar-automatico/{id_cliente}")
@@ -1477,6 +1711,7 @@ def generar_alertas_auto(id_cliente: int, db: Session = Depends(get_db)):
 
     # ✅ COMMIT - Guardar en BD
     db.commit()
+    invalidar_cliente(id_cliente)
 
     print(f"✅ {nuevas_alertas} alertas generadas para rutina actual\n")
 
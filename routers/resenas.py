@@ -2,9 +2,9 @@
 # ⚠️ ADVERTENCIA: Esta versión NO requiere autenticación
 # Solo usar para desarrollo/testing, NO en producción
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from utils.dependencies import get_db
 from models.user import Usuario
@@ -14,10 +14,13 @@ from services.review_service import (
     obtener_resena,
     actualizar_resena,
     eliminar_resena,
-    obtener_resenas_entrenador,
     obtener_estadisticas_entrenador,
     obtener_resenas_por_alumno,
+    listar_resenas_entrenador,
+    CAMPOS_RESENA,
 )
+from utils.campos import HEADER_CURSOR, parsear_campos, respuesta_proyectada
+from utils.cursor import codificar_cursor, decodificar_cursor, fecha_id_cursor
 
 router = APIRouter(prefix="/resenas", tags=["resenas"])
 
@@ -144,20 +147,36 @@ def eliminar_resena_endpoint(
 @router.get("/entrenador/{id_entrenador}/resenas", response_model=List[ResenaOut])
 def obtener_resenas_endpoint(
         id_entrenador: int,
+        response: Response,
         limit: int = Query(10, ge=1, le=100),
+        cursor: Optional[str] = Query(None, description="Header X-Next-Cursor de la página anterior"),
+        fields: Optional[str] = Query(None, description="Campos separados por coma, p. ej. calificacion,comentario"),
         db: Session = Depends(get_db),
 ):
     """
     Obtiene todas las reseñas de un entrenador
 
-    Este endpoint ya no requería autenticación, se mantiene igual
+    Paginación por keyset: si hay más reseñas, el header X-Next-Cursor trae el
+    cursor de la página siguiente. Con `fields` solo se consultan esas columnas.
     """
+    try:
+        campos = parsear_campos(fields, CAMPOS_RESENA)
+        desde = fecha_id_cursor(decodificar_cursor(cursor))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # Validar que el entrenador existe
-    entrenador = db.query(Usuario).filter(Usuario.id_usuario == id_entrenador).first()
+    entrenador = db.query(Usuario.id_usuario).filter(Usuario.id_usuario == id_entrenador).first()
     if not entrenador:
         raise HTTPException(status_code=404, detail="Entrenador no encontrado")
 
-    resenas = obtener_resenas_entrenador(db, id_entrenador, limit=limit)
+    resenas, siguiente = listar_resenas_entrenador(db, id_entrenador, limit, desde, campos)
+
+    cursor_siguiente = codificar_cursor(siguiente) if siguiente else None
+    if campos is not None:
+        return respuesta_proyectada(resenas, cursor_siguiente)
+    if cursor_siguiente:
+        response.headers[HEADER_CURSOR] = cursor_siguiente
     return resenas
 
 
@@ -1,11 +1,13 @@
 # routers/rutinas.py - VERSIÓN CORREGIDA PARA GUARDAR CORRECTAMENTE
 
-from fastapi import APIRouter, HTTPException, status, Body
+from fastapi import APIRouter, HTTPException, status, Body, Query, Response
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 import json
 from db import get_connection
+from utils.campos import HEADER_CURSOR, parsear_campos, proyectar
+from utils.cursor import codificar_cursor, decodificar_cursor, fecha_id_cursor
 
 
 # ============================================================
@@ -285,46 +287,89 @@ def crear_rutina(payload: Dict[str, Any] = Body(...)):
 # 🔹 OBTENER TODAS LAS RUTINAS
 # ============================================================
 
+# Columnas que puede pedir `fields` ("dias" sale de contenido_dias)
+CAMPOS_LISTADO_RUTINAS = [
+    "id_rutina", "nombre", "descripcion", "creado_por", "objetivo", "grupo_muscular",
+    "nivel", "dias_semana", "total_ejercicios", "minutos_aproximados",
+    "fecha_creacion", "generada_por", "contenido_dias", "dias",
+]
+
+
 @router.get("/", response_model=List[Dict[str, Any]])
-def listar_rutinas():
+def listar_rutinas(
+        response: Response,
+        limit: Optional[int] = Query(None, ge=1, le=200, description="Tamaño de página (sin él, todas)"),
+        cursor: Optional[str] = Query(None, description="Header X-Next-Cursor de la página anterior"),
+        fields: Optional[str] = Query(None, description="Campos separados por coma, p. ej. id_rutina,nombre"),
+):
     """
     Listar todas las rutinas
+
+    Con `limit` pagina por keyset (fecha_creacion, id_rutina) y devuelve el
+    cursor de la página siguiente en el header X-Next-Cursor.
     """
+    try:
+        campos = parsear_campos(fields, CAMPOS_LISTADO_RUTINAS)
+        desde = fecha_id_cursor(decodificar_cursor(cursor))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # El cursor necesita fecha_creacion e id_rutina aunque no se pidan
+    columnas = [c for c in CAMPOS_LISTADO_RUTINAS if c != "dias"]
+    if campos is not None:
+        pedidas = set(campos) | {"id_rutina", "fecha_creacion"}
+        if "dias" in campos:
+            pedidas.add("contenido_dias")
+        columnas = [c for c in columnas if c in pedidas]
+    paginado = limit is not None or desde is not None
+    tamano = limit or 50
+
     cn = None
     cur = None
     try:
         cn = get_connection()
         cur = cn.cursor(dictionary=True)
 
-        sql = """
-            SELECT 
-                id_rutina, nombre, descripcion, creado_por,
-                objetivo, grupo_muscular, nivel, dias_semana,
-                total_ejercicios, minutos_aproximados,
-                fecha_creacion, generada_por, contenido_dias
+        sql = f"""
+            SELECT {", ".join(columnas)}
             FROM rutinas
-            ORDER BY fecha_creacion DESC
         """
-
-        cur.execute(sql)
+        params: list = []
+        if desde:
+            sql += " WHERE (fecha_creacion < %s OR (fecha_creacion = %s AND id_rutina < %s))"
+            params += [desde[0], desde[0], desde[1]]
+        sql += " ORDER BY fecha_creacion DESC, id_rutina DESC"
+        if paginado:
+            sql += " LIMIT %s"
+            params.append(tamano + 1)
+
+        cur.execute(sql, tuple(params))
         rutinas = cur.fetchall()
 
+        if paginado and len(rutinas) > tamano:
+            rutinas = rutinas[:tamano]
+            ultima = rutinas[-1]
+            response.headers[HEADER_CURSOR] = codificar_cursor(
+                {"fecha": ultima["fecha_creacion"], "id": ultima["id_rutina"]}
+            )
+
         # Parsear el JSON de contenido_dias
         for rutina in rutinas:
-            if rutina.get('contenido_dias'):
-                try:
-                    rutina['dias'] = json.loads(rutina['contenido_dias'])
-                except:
+            if campos is None or "dias" in campos:
+                if rutina.get('contenido_dias'):
+                    try:
+                        rutina['dias'] = json.loads(rutina['contenido_dias'])
+                    except:
+                        rutina['dias'] = []
+                else:
                     rutina['dias'] = []
-            else:
-                rutina['dias'] = []
 
             # Convertir fecha a string si es necesario
             if rutina.get('fecha_creacion'):
                 if isinstance(rutina['fecha_creacion'], datetime):
                     rutina['fecha_creacion'] = rutina['fecha_creacion'].isoformat()
 
-        return rutinas
+        return [proyectar(r, campos) for r in rutinas]
 
     except Exception as e:
         raise HTTPException(
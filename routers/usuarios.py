@@ -6,21 +6,26 @@ from __future__ import annotations
 import re, os, uuid, traceback, json
 from datetime import datetime
 from pathlib import Path
+from types import SimpleNamespace
 from typing import Optional, List, Union, Literal
 from schemas.user import (
     Modalidad, TrainerOut, TrainersFacets, TrainersResponse,
-    TrainerDetail, PerfilEntrenador
+    TrainerDetail, PerfilEntrenador, TrainerSuggestion
 )
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Body, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Body, Request, Query, Response
 from pydantic import BaseModel, EmailStr, Field, field_validator, ConfigDict, model_validator, AliasChoices, constr
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import update, select, insert, text
+from sqlalchemy import update, select, insert, text, func, or_, and_
 
 # Dependencias
 from utils.dependencies import get_db, get_current_user
 from models.user import Usuario, RolEnum
+from services.catalogo_entrenadores import catalogo_entrenadores, como_lista as _as_list
+from services.perfiles_entrenador import perfiles_entrenador, serializar as serializar_perfil
+from utils.campos import HEADER_CURSOR, parsear_campos, proyectar, respuesta_proyectada
+from utils.cursor import codificar_cursor, decodificar_cursor
 from utils.security import hash_password, verify_password, create_token
 
 router = APIRouter(prefix="/usuarios", tags=["usuarios"])
@@ -41,12 +46,6 @@ MAX_AVATAR_BYTES = 4 * 1024 * 1024  # 4MB
 # Directorios para archivos
 UPLOADS_DIR = os.path.join(os.getcwd(), "uploads")
 os.makedirs(UPLOADS_DIR, exist_ok=True)
-PERFILES_DIR = Path(os.getcwd()) / "data" / "perfiles"
-PERFILES_DIR.mkdir(parents=True, exist_ok=True)
-
-
-def _perfil_path(user_id: int) -> Path:
-    return PERFILES_DIR / f"{user_id}.json"
 
 
 # Mapeos de sexo entre app y BD
@@ -139,6 +138,9 @@ def _insert_user_core(db: Session, values: dict) -> Usuario:
     res = db.execute(insert(Usuario.__table__).values(**clean))
     db.commit()
     new_id = getattr(res, "lastrowid", None) or getattr(res, "inserted_primary_key", [None])[0]
+    rol = clean.get("rol")
+    if str(getattr(rol, "value", rol) or "").lower() == "entrenador":
+        catalogo_entrenadores.invalidar([new_id])
     return db.execute(select(Usuario).where(Usuario.id_usuario == new_id)).scalar_one()
 
 
@@ -702,6 +704,13 @@ def actualizar_perfil(
     stmt = update(Usuario).where(Usuario.id_usuario == uid).values(**to_update)
     db.execute(stmt)
     db.commit()
+    if "nombre" in to_update or "apellido" in to_update:
+        # Solo los entrenadores están en el catálogo; invalidar sube la versión
+        # global y obliga a los demás workers a recargarlo
+        rol = db.query(Usuario.rol).filter(Usuario.id_usuario == uid).scalar()
+        rol = (rol.value if hasattr(rol, "value") else str(rol or "")).strip().lower()
+        if rol == "entrenador":
+            catalogo_entrenadores.invalidar([uid])
 
     # Devuelve el perfil actualizado
     return obtener_mi_perfil(request=request, user_id=uid, db=db)
@@ -799,6 +808,8 @@ def _save_avatar_and_update_user(
     db.add(user)
     db.commit()
     db.refresh(user)
+    if _rol_str(user) == "entrenador":
+        catalogo_entrenadores.invalidar([user.id_usuario])
 
     base_url = str(request.base_url).rstrip("/")
     public_url = f"{base_url}{rel_url}"
@@ -838,6 +849,8 @@ def borrar_avatar(
 
     db.add(u)
     db.commit()
+    if _rol_str(u) == "entrenador":
+        catalogo_entrenadores.invalidar([user_id])
     return None  # 204
 
 
@@ -862,11 +875,9 @@ def get_perfil_entrenador(
     🔧 MODIFICADO: Obtiene el perfil de cualquier entrenador por ID
     """
     try:
-        path = _perfil_path(user_id)
-        if path.exists():
-            with path.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-                return PerfilEntrenador(**data)
+        data = perfiles_entrenador.leer(user_id)
+        if data is not None:
+            return PerfilEntrenador(**data)
     except Exception as e:
         print(f"[get_perfil_entrenador] Error: {e}")
 
@@ -883,13 +894,9 @@ def put_perfil_entrenador(
     🔧 MODIFICADO: Actualiza el perfil de cualquier entrenador por ID
     """
     try:
-        # 1. Guardar en JSON
-        path = _perfil_path(user_id)
-        path.parent.mkdir(parents=True, exist_ok=True)
-
+        # 1. Guardar en JSON (escritura atómica + caché de perfiles)
         payload_dict = payload.dict(exclude_none=False)
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(payload_dict, f, ensure_ascii=False, indent=2)
+        perfiles_entrenador.guardar(user_id, payload_dict)
 
         # 2. Actualizar también en la tabla usuarios
         u = db.query(Usuario).filter(Usuario.id_usuario == user_id).first()
@@ -906,6 +913,8 @@ def put_perfil_entrenador(
                 u.modalidades = json.dumps(payload.modalidades or [], ensure_ascii=False)
             if "ciudad" in model_cols:
                 u.ciudad = payload.ciudad
+            if perfiles_entrenador.en_bd and "perfil_entrenador" in model_cols:
+                u.perfil_entrenador = serializar_perfil(payload_dict)
 
             # Guardar precio con fallback
             if payload.precio is not None:
@@ -924,6 +933,7 @@ def put_perfil_entrenador(
 
             db.add(u)
             db.commit()
+            catalogo_entrenadores.invalidar([user_id])
 
         return payload
 
@@ -978,25 +988,6 @@ def subir_evidencia_entrenador(
 entrenadores_router = APIRouter(prefix="/entrenadores", tags=["entrenadores"])
 
 
-def _as_list(raw) -> list:
-    """Convierte valor a lista"""
-    if raw is None:
-        return []
-    if isinstance(raw, list):
-        return [str(x).strip() for x in raw if str(x).strip()]
-    s = str(raw).strip()
-    if not s:
-        return []
-    try:
-        if s.startswith("[") or s.startswith("{"):
-            val = json.loads(s)
-            if isinstance(val, list):
-                return [str(x).strip() for x in val if str(x).strip()]
-    except Exception:
-        pass
-    return [x.strip() for x in s.split(",") if x.strip()]
-
-
 def _nombre_completo(u: Usuario) -> str:
     """Obtiene nombre completo del usuario"""
     n = getattr(u, "nombre", None) or getattr(u, "nombres", "") or ""
@@ -1012,9 +1003,185 @@ def _rol_str(u: Usuario) -> str:
     return (r.value if hasattr(r, "value") else str(r)).strip().lower()
 
 
+# Columnas que usa el listado (evita traer problemas, enfermedades, perfil_*, etc.)
+_COLUMNAS_LISTADO = (
+    Usuario.id_usuario, Usuario.nombre, Usuario.apellido, Usuario.especialidad,
+    Usuario.ciudad, Usuario.pais, Usuario.precio_mensual, Usuario.rating,
+    Usuario.experiencia, Usuario.modalidades, Usuario.etiquetas,
+    Usuario.foto_url, Usuario.whatsapp,
+)
+
+_PRECIO = func.coalesce(Usuario.precio_mensual, 0)
+_RATING = func.coalesce(Usuario.rating, 0)
+
+# Con rol fijo por igualdad, los índices (rol, columna) sirven para ordenar
+_ORDEN_ENTRENADORES = {
+    "rating": (Usuario.rating.desc(),),
+    "experience": (Usuario.experiencia.desc(),),
+    "price_asc": (Usuario.precio_mensual.asc(),),
+    "price_desc": (Usuario.precio_mensual.desc(),),
+    "relevance": ((_RATING * func.coalesce(Usuario.experiencia, 0) / (_PRECIO + 1)).desc(),),
+}
+
+# Keyset: (expresión, descendente) por orden; misma clave que CLAVES_ORDEN del
+# catálogo (los descendentes van negados en el cursor), así un cursor sirve en ambos
+_CLAVE_CURSOR_SQL = {
+    "rating": (_RATING, True),
+    "experience": (func.coalesce(Usuario.experiencia, 0), True),
+    "price_asc": (_PRECIO, False),
+    "price_desc": (_PRECIO, True),
+    "relevance": (_RATING * func.coalesce(Usuario.experiencia, 0) / (_PRECIO + 1), True),
+}
+
+CAMPOS_TRAINER = list(TrainerOut.model_fields)
+
+# Columnas que necesita cada campo de TrainerOut (bio sale del perfil JSON)
+_COLUMNAS_CAMPO = {
+    "id": (Usuario.id_usuario,),
+    "nombre": (Usuario.nombre, Usuario.apellido),
+    "especialidad": (Usuario.especialidad,),
+    "rating": (Usuario.rating,),
+    "precio_mensual": (Usuario.precio_mensual,),
+    "ciudad": (Usuario.ciudad,),
+    "pais": (Usuario.pais,),
+    "experiencia": (Usuario.experiencia,),
+    "modalidades": (Usuario.modalidades,),
+    "etiquetas": (Usuario.etiquetas,),
+    "foto_url": (Usuario.foto_url,),
+    "whatsapp": (Usuario.whatsapp,),
+    "bio": (),
+}
+
+
+def _escapar_like(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _filtros_entrenadores(
+        q: str | None,
+        especialidad: str | None,
+        modalidad: str | None,
+        ratingMin: float | None,
+        precioMax: int | None,
+        ciudad: str | None,
+) -> list:
+    """Condiciones SQL equivalentes a los filtros del listado."""
+    conds = [Usuario.rol == RolEnum.entrenador]
+
+    q_txt = (q or "").strip()
+    if q_txt:
+        # La intercalación de la tabla ya es insensible a mayúsculas
+        blob = func.concat_ws(" ", Usuario.nombre, Usuario.apellido, Usuario.especialidad,
+                              Usuario.ciudad, Usuario.etiquetas)
+        conds.append(blob.like(f"%{_escapar_like(q_txt)}%", escape="\\"))
+    if especialidad:
+        conds.append(Usuario.especialidad == especialidad)
+    if ciudad:
+        conds.append(Usuario.ciudad == ciudad)
+    if modalidad:
+        # modalidades se guarda como JSON o separado por comas
+        conds.append(Usuario.modalidades.like(f"%{modalidad}%"))
+    if ratingMin is not None and ratingMin > 0:
+        conds.append(Usuario.rating >= ratingMin)
+    if precioMax is not None:
+        conds.append(or_(Usuario.precio_mensual <= precioMax, Usuario.precio_mensual.is_(None)))
+    return conds
+
+
+def _facetas_entrenadores(db: Session) -> TrainersFacets:
+    """Facetas sobre todos los entrenadores con consultas agregadas."""
+    es_entrenador = Usuario.rol == RolEnum.entrenador
+
+    especialidades = db.query(Usuario.especialidad).filter(
+        es_entrenador, Usuario.especialidad != ""
+    ).group_by(Usuario.especialidad).all()
+    ciudades = db.query(Usuario.ciudad).filter(
+        es_entrenador, Usuario.ciudad != ""
+    ).group_by(Usuario.ciudad).all()
+    # Pocas combinaciones distintas: se agrupan en SQL y se parsean aquí
+    mods_raw = db.query(Usuario.modalidades).filter(es_entrenador).group_by(Usuario.modalidades).all()
+    precio_min, precio_max, rating_max = db.query(
+        func.min(_PRECIO), func.max(_PRECIO), func.max(_RATING)
+    ).filter(es_entrenador).one()
+
+    mods_set = set()
+    for (raw,) in mods_raw:
+        mods_set.update(_only_modalidades(_as_list(raw)))
+
+    return TrainersFacets(
+        especialidades=sorted(e for (e,) in especialidades if e),
+        ciudades=sorted(c for (c,) in ciudades if c),
+        modalidades=sorted(mods_set),
+        precioMin=int(precio_min) if precio_min is not None else None,
+        precioMax=int(precio_max) if precio_max is not None else None,
+        ratingMax=float(rating_max) if rating_max is not None else None,
+    )
+
+
+def _trainer_desde_fila(request: Request, fila, perfil: dict | None) -> TrainerOut:
+    nombre = f"{fila.nombre or ''} {fila.apellido or ''}".strip()
+    return TrainerOut(
+        id=int(fila.id_usuario),
+        nombre=nombre or (fila.nombre or ""),
+        especialidad=fila.especialidad or "",
+        rating=float(fila.rating or 0),
+        precio_mensual=int(fila.precio_mensual or 0),
+        ciudad=fila.ciudad or "",
+        pais=fila.pais,
+        experiencia=int(fila.experiencia or 0),
+        modalidades=_only_modalidades(_as_list(fila.modalidades)),
+        etiquetas=_as_list(fila.etiquetas),
+        foto_url=absolutize_url(request, fila.foto_url),
+        whatsapp=fila.whatsapp,
+        bio=(perfil or {}).get("resumen") or None,
+    )
+
+
+def _fila_parcial(fila):
+    """Fila con solo algunas columnas -> objeto con el resto en None (para _trainer_desde_fila)."""
+    datos = {c.key: None for c in _COLUMNAS_LISTADO}
+    datos.update(fila._mapping)
+    return SimpleNamespace(**datos)
+
+
+def _proyectar_registro(request: Request, e, campos: list[str]) -> dict:
+    out = {}
+    for c in campos:
+        valor = getattr(e, c)
+        if c == "foto_url":
+            valor = absolutize_url(request, valor)
+        elif c in ("modalidades", "etiquetas"):
+            valor = list(valor)
+        out[c] = valor
+    return out
+
+
+def _cursor_entrenadores(sort: str, clave) -> str | None:
+    return codificar_cursor({"s": sort, "k": list(clave)}) if clave else None
+
+
+def _trainer_desde_registro(request: Request, e) -> TrainerOut:
+    return TrainerOut(
+        id=e.id,
+        nombre=e.nombre,
+        especialidad=e.especialidad,
+        rating=e.rating,
+        precio_mensual=e.precio_mensual,
+        ciudad=e.ciudad,
+        pais=e.pais,
+        experiencia=e.experiencia,
+        modalidades=list(e.modalidades),
+        etiquetas=list(e.etiquetas),
+        foto_url=absolutize_url(request, e.foto_url),
+        whatsapp=e.whatsapp,
+        bio=e.bio,
+    )
+
+
 @entrenadores_router.get("", response_model=TrainersResponse)
 def listar_entrenadores(
         request: Request,
+        response: Response,
         db: Session = Depends(get_db),
         q: str | None = None,
         especialidad: str | None = None,
@@ -1025,120 +1192,131 @@ def listar_entrenadores(
         sort: Literal["relevance", "rating", "experience", "price_asc", "price_desc"] = "relevance",
         page: int = 1,
         pageSize: int = 12,
+        cursor: str | None = Query(None, description="nextCursor de la página anterior (reemplaza a page)"),
+        fields: str | None = Query(None, description="Campos de cada entrenador, p. ej. id,nombre,foto_url"),
 ):
-    """Lista todos los entrenadores con filtros y paginación"""
+    """
+    Lista todos los entrenadores con filtros y paginación (catálogo en memoria; SQL si no está disponible).
+
+    Además de page/pageSize admite paginación por cursor: cada respuesta trae
+    nextCursor (también en el header X-Next-Cursor) mientras queden resultados.
+    """
     if db is None:
         raise HTTPException(status_code=500, detail="DB no inicializada")
 
-    usuarios: list[Usuario] = db.query(Usuario).all()
-    trainers: list[TrainerOut] = []
-
-    for u in usuarios:
-        if _rol_str(u) != "entrenador":
-            continue
+    page = max(1, page)
+    pageSize = max(1, min(pageSize, 50))
 
-        _esp = getattr(u, "especialidad", "") or ""
-        _mods = _only_modalidades(_as_list(getattr(u, "modalidades", None)))
-        _tags = _as_list(getattr(u, "etiquetas", None))
-        _city = getattr(u, "ciudad", "") or ""
-        _pais = getattr(u, "pais", None)
-        _price = int(getattr(u, "precio_mensual", 0) or getattr(u, "precio_sesion", 0) or getattr(u, "precio", 0) or 0)
-        _rate = float(getattr(u, "rating", 0) or 0)
-        _exp = int(getattr(u, "experiencia", 0) or 0)
-        _wa = getattr(u, "whatsapp", None)
+    try:
+        campos = parsear_campos(fields, CAMPOS_TRAINER)
+        desde = decodificar_cursor(cursor)
+        despues = None
+        if desde is not None:
+            despues = tuple(desde.get("k") or ())
+            # (orden, id); con texto y "relevance" el catálogo antepone el puntaje
+            # (un cursor de 2 valores emitido por el SQL se sigue resolviendo en SQL)
+            largos = (2, 3) if (q or "").strip() and sort == "relevance" else (2,)
+            if desde.get("s") != sort or len(despues) not in largos \
+                    or not all(isinstance(v, (int, float)) for v in despues):
+                raise ValueError("Cursor inválido para esta búsqueda")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def responder(items, total, facets, siguiente):
+        if campos is None:
+            if siguiente:
+                response.headers[HEADER_CURSOR] = siguiente
+            return TrainersResponse(items=items, total=total, page=page, pageSize=pageSize,
+                                    facets=facets, nextCursor=siguiente)
+        return respuesta_proyectada({
+            "items": items, "total": total, "page": page, "pageSize": pageSize,
+            "facets": facets, "nextCursor": siguiente,
+        }, siguiente)
+
+    # Catálogo en memoria: las consultas típicas no tocan MySQL
+    try:
+        registros, total, ultima = catalogo_entrenadores.buscar(
+            q=q, especialidad=especialidad, modalidad=modalidad, rating_min=ratingMin,
+            precio_max=precioMax, ciudad=ciudad, sort=sort,
+            offset=(page - 1) * pageSize, limite=pageSize, despues=despues,
+        )
+        if campos is None:
+            items = [_trainer_desde_registro(request, e) for e in registros]
+        else:
+            items = [_proyectar_registro(request, e, campos) for e in registros]
+        return responder(items, total, TrainersFacets(**catalogo_entrenadores.facetas()),
+                         _cursor_entrenadores(sort, ultima))
+    except Exception as e:
+        print(f"⚠️ Catálogo de entrenadores no disponible, se consulta la BD: {e}")
 
-        raw_foto = getattr(u, "foto_url", None) or getattr(u, "avatar_url", None)
-        foto_abs = absolutize_url(request, raw_foto)
+    conds = _filtros_entrenadores(q, especialidad, modalidad, ratingMin, precioMax, ciudad)
 
-        bio_text = None
-        try:
-            path = _perfil_path(int(u.id_usuario))
-            if path.exists():
-                with path.open("r", encoding="utf-8") as f:
-                    prof = json.load(f)
-                    bio_text = prof.get("resumen") or None
-        except Exception:
-            bio_text = None
+    total = db.query(func.count(Usuario.id_usuario)).filter(*conds).scalar() or 0
 
-        trainers.append(TrainerOut(
-            id=int(u.id_usuario),
-            nombre=_nombre_completo(u) or (getattr(u, "nombre", "") or ""),
-            especialidad=_esp,
-            rating=_rate,
-            precio_mensual=_price,
-            ciudad=_city,
-            pais=_pais,
-            experiencia=_exp,
-            modalidades=_mods,
-            etiquetas=_tags,
-            foto_url=foto_abs,
-            whatsapp=_wa,
-            bio=bio_text,
+    expr_clave, descendente = _CLAVE_CURSOR_SQL.get(sort, _CLAVE_CURSOR_SQL["relevance"])
+    columnas = _COLUMNAS_LISTADO
+    if campos is not None:
+        columnas = tuple(dict.fromkeys(
+            [Usuario.id_usuario] + [col for c in campos for col in _COLUMNAS_CAMPO[c]]
         ))
 
-    # Filtros
-    q_low = (q or "").strip().lower()
-
-    def passes(t: TrainerOut) -> bool:
-        if q_low:
-            blob = f"{t.nombre} {t.especialidad} {t.ciudad} {' '.join(t.etiquetas)}".lower()
-            if q_low not in blob:
-                return False
-        if especialidad and t.especialidad != especialidad:
-            return False
-        if ciudad and t.ciudad != ciudad:
-            return False
-        if modalidad and modalidad not in t.modalidades:
-            return False
-        if ratingMin is not None and t.rating < ratingMin:
-            return False
-        if precioMax is not None and t.precio_mensual > precioMax:
-            return False
-        return True
-
-    filtered = [t for t in trainers if passes(t)]
-
-    # Ordenamiento
-    if sort == "rating":
-        filtered.sort(key=lambda x: x.rating, reverse=True)
-    elif sort == "experience":
-        filtered.sort(key=lambda x: x.experiencia, reverse=True)
-    elif sort == "price_asc":
-        filtered.sort(key=lambda x: x.precio_mensual)
-    elif sort == "price_desc":
-        filtered.sort(key=lambda x: x.precio_mensual, reverse=True)
+    consulta = (
+        db.query(*columnas, expr_clave.label("clave_orden"))
+        .filter(*conds)
+        .order_by(*_ORDEN_ENTRENADORES.get(sort, _ORDEN_ENTRENADORES["relevance"]), Usuario.id_usuario.asc())
+    )
+    if despues is not None:
+        # El SQL no ordena por puntaje de texto: se usan los dos últimos valores (orden, id)
+        valor, ultimo_id = despues[-2], despues[-1]
+        if descendente:
+            valor = -valor
+            consulta = consulta.filter(or_(expr_clave < valor, and_(expr_clave == valor, Usuario.id_usuario > ultimo_id)))
+        else:
+            consulta = consulta.filter(or_(expr_clave > valor, and_(expr_clave == valor, Usuario.id_usuario > ultimo_id)))
+    else:
+        consulta = consulta.offset((page - 1) * pageSize)
+
+    filas = consulta.limit(pageSize + 1).all() if despues is not None or total > (page - 1) * pageSize else []
+    siguiente = None
+    if len(filas) > pageSize:
+        filas = filas[:pageSize]
+        valor = float(filas[-1].clave_orden or 0)
+        siguiente = _cursor_entrenadores(sort, (-valor if descendente else valor, int(filas[-1].id_usuario)))
+
+    perfiles = {}
+    if campos is None or "bio" in campos:
+        perfiles = perfiles_entrenador.cargar_lote(f.id_usuario for f in filas)
+    if campos is None:
+        items = [_trainer_desde_fila(request, f, perfiles.get(int(f.id_usuario))) for f in filas]
     else:
-        # Ordenamiento por relevancia
-        filtered.sort(key=lambda x: (x.rating * x.experiencia) / (x.precio_mensual + 1), reverse=True)
+        items = [
+            proyectar(
+                _trainer_desde_fila(request, _fila_parcial(f), perfiles.get(int(f.id_usuario))).model_dump(),
+                campos,
+            )
+            for f in filas
+        ]
 
-    # Facets
-    especialidades = sorted({t.especialidad for t in trainers if t.especialidad})
-    ciudades = sorted({t.ciudad for t in trainers if t.ciudad})
-    mods_set = set()
-    for t in trainers:
-        mods_set.update(t.modalidades or [])
-    precio_min = min((t.precio_mensual for t in trainers), default=None)
-    precio_max = max((t.precio_mensual for t in trainers), default=None)
-    rating_max = max((t.rating for t in trainers), default=None)
-
-    facets = TrainersFacets(
-        especialidades=especialidades,
-        ciudades=ciudades,
-        modalidades=sorted(list(mods_set)),
-        precioMin=precio_min,
-        precioMax=precio_max,
-        ratingMax=rating_max,
-    )
+    return responder(items, total, _facetas_entrenadores(db), siguiente)
 
-    # Paginación
-    total = len(filtered)
-    page = max(1, page)
-    pageSize = max(1, min(pageSize, 50))
-    start = (page - 1) * pageSize
-    end = start + pageSize
-    items = filtered[start:end]
 
-    return TrainersResponse(items=items, total=total, page=page, pageSize=pageSize, facets=facets)
+@entrenadores_router.get("/sugerencias", response_model=list[TrainerSuggestion])
+def sugerir_entrenadores(
+        request: Request,
+        q: str = Query(..., min_length=1, description="Texto escrito hasta ahora"),
+        limite: int = Query(8, ge=1, le=20),
+):
+    """Autocompletado de entrenadores (sin acentos, último término como prefijo)"""
+    return [
+        TrainerSuggestion(
+            id=e.id,
+            nombre=e.nombre,
+            especialidad=e.especialidad,
+            ciudad=e.ciudad,
+            foto_url=absolutize_url(request, e.foto_url),
+        )
+        for e in catalogo_entrenadores.sugerir(q, limite)
+    ]
 
 
 @entrenadores_router.get("/{trainer_id}", response_model=TrainerDetail)
@@ -1157,15 +1335,13 @@ def detalle_entrenador(
         # Cargar perfil JSON
         perfil_dict = None
         try:
-            path = _perfil_path(trainer_id)
-            if path.exists():
-                with path.open("r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    perfil_json = PerfilEntrenador(**data)
-                    try:
-                        perfil_dict = perfil_json.model_dump()
-                    except AttributeError:
-                        perfil_dict = perfil_json.dict()
+            data = perfiles_entrenador.leer(trainer_id)
+            if data is not None:
+                perfil_json = PerfilEntrenador(**data)
+                try:
+                    perfil_dict = perfil_json.model_dump()
+                except AttributeError:
+                    perfil_dict = perfil_json.dict()
         except Exception as e:
             print(f"[WARN] Error cargando perfil JSON: {e}")
 
@@ -47,12 +47,20 @@ class TrainersFacets(BaseModel):
     precioMax: int | None = None
     ratingMax: float | None = None
 
+class TrainerSuggestion(BaseModel):
+    id: int
+    nombre: str
+    especialidad: str
+    ciudad: str
+    foto_url: Optional[str] = None
+
 class TrainersResponse(BaseModel):
     items: list[TrainerOut]
     total: int
     page: int
     pageSize: int
     facets: TrainersFacets | None = None
+    nextCursor: str | None = None
 
 # -------- Perfil de entrenador (para detalle) --------
 class ItemEdu(BaseModel):
@@ -0,0 +1,130 @@
+# scripts/bench_dashboard.py
+"""
+Benchmark de /progresion/dashboard/cliente/{id}.
+
+Mide requests/seg y latencias (p50/p99) contra un servidor en ejecución.
+Para comparar antes/después del pool de conexiones, levanta el servidor dos veces:
+
+    DB_POOL_SIZE=0  uvicorn main:app --workers 1   # sin pool (conexión nueva por request)
+    DB_POOL_SIZE=10 uvicorn main:app --workers 1   # con pool
+
+y ejecuta en cada caso:
+
+    python scripts/bench_dashboard.py http --cliente 5 --requests 500 --concurrencia 20
+
+También puede medir solo el costo de obtener una conexión (sin HTTP):
+
+    python scripts/bench_dashboard.py conexion --iteraciones 200
+"""
+
+import os
+import sys
+import time
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    idx = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[idx]
+
+
+def _reporte(titulo: str, latencias_ms: list[float], errores: int, duracion_s: float):
+    total = len(latencias_ms) + errores
+    print(f"\n📊 {titulo}")
+    print("─" * 60)
+    print(f"   Requests:     {total} ({errores} errores)")
+    print(f"   Duración:     {duracion_s:.2f}s")
+    print(f"   Throughput:   {total / duracion_s:.1f} req/s" if duracion_s else "   Throughput:   -")
+    if latencias_ms:
+        print(f"   p50:          {_percentil(latencias_ms, 50):.1f} ms")
+        print(f"   p99:          {_percentil(latencias_ms, 99):.1f} ms")
+        print(f"   promedio:     {statistics.mean(latencias_ms):.1f} ms")
+
+
+def bench_http(base_url: str, id_cliente: int, n: int, concurrencia: int):
+    import httpx
+
+    url = f"{base_url.rstrip('/')}/progresion/dashboard/cliente/{id_cliente}"
+    latencias: list[float] = []
+    errores = 0
+
+    with httpx.Client(timeout=30) as client:
+        # Calentamiento
+        client.get(url)
+
+        def _una(_):
+            t0 = time.perf_counter()
+            r = client.get(url)
+            return r.status_code, (time.perf_counter() - t0) * 1000
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrencia) as ex:
+            for status, ms in ex.map(_una, range(n)):
+                if status == 200:
+                    latencias.append(ms)
+                else:
+                    errores += 1
+        duracion = time.perf_counter() - inicio
+
+        try:
+            pool = client.get(f"{base_url.rstrip('/')}/debug/db-pool").json()
+            print(f"\n🔌 Pool del servidor: {pool}")
+        except Exception:
+            pass
+
+    _reporte(f"GET {url} (concurrencia={concurrencia})", latencias, errores, duracion)
+
+
+def bench_conexion(iteraciones: int):
+    import db
+
+    def _medir(titulo: str):
+        latencias = []
+        inicio = time.perf_counter()
+        for _ in range(iteraciones):
+            t0 = time.perf_counter()
+            cn = db.get_connection()
+            cur = cn.cursor()
+            cur.execute("SELECT 1")
+            cur.fetchall()
+            cur.close()
+            cn.close()
+            latencias.append((time.perf_counter() - t0) * 1000)
+        _reporte(titulo, latencias, 0, time.perf_counter() - inicio)
+
+    tamano = db.DB_POOL_SIZE
+    db.DB_POOL_SIZE = 0
+    _medir("get_connection() sin pool")
+    db.DB_POOL_SIZE = tamano or 10
+    _medir(f"get_connection() con pool (size={db.DB_POOL_SIZE})")
+    print(f"\n🔌 {db.get_pool_stats()}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark del dashboard de progresión")
+    sub = parser.add_subparsers(dest="modo", required=True)
+
+    p_http = sub.add_parser("http", help="Carga HTTP contra un servidor en ejecución")
+    p_http.add_argument("--url", default=os.getenv("BENCH_URL", "http://127.0.0.1:8000"))
+    p_http.add_argument("--cliente", type=int, required=True)
+    p_http.add_argument("--requests", type=int, default=500)
+    p_http.add_argument("--concurrencia", type=int, default=20)
+
+    p_cn = sub.add_parser("conexion", help="Costo de get_connection() con y sin pool")
+    p_cn.add_argument("--iteraciones", type=int, default=200)
+
+    args = parser.parse_args()
+
+    if args.modo == "http":
+        bench_http(args.url, args.cliente, args.requests, args.concurrencia)
+    else:
+        bench_conexion(args.iteraciones)
@@ -0,0 +1,213 @@
+# scripts/bench_ia.py
+"""
+Benchmark del pipeline de generación de rutinas IA sin red.
+
+Usa el proveedor simulado (services/ia_simulado.py): reproduce las respuestas
+grabadas con IA_GRABAR=1 o arma planes sintéticos con el catálogo, con la
+latencia y las fallas que se indiquen. Mide throughput, latencia p50/p99 de
+punta a punta, de la generación y de la persistencia (cada rutina se guarda y
+se deshace con rollback, así que no deja datos).
+
+    # 200 generaciones, 20 en paralelo, 800 ms ± 200 por respuesta
+    python scripts/bench_ia.py generar --solicitudes 200 --concurrencia 20 --cliente 5
+
+    # con fallas: 5% errores, 5% truncado (MAX_TOKENS), 2% cuota
+    python scripts/bench_ia.py generar --error 0.05 --truncado 0.05 --cuota 0.02 --cliente 5
+
+    # streaming: tiempo al primer día y total
+    python scripts/bench_ia.py stream --solicitudes 50 --concurrencia 10
+
+Sin --cliente no persiste (solo generación).
+"""
+
+import os
+import sys
+import time
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    idx = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[idx]
+
+
+def _linea(nombre: str, valores: list[float]):
+    if valores:
+        print(f"   {nombre:<14}p50 {_percentil(valores, 50):8.1f} ms   "
+              f"p99 {_percentil(valores, 99):8.1f} ms   promedio {statistics.mean(valores):8.1f} ms")
+
+
+def _configurar_entorno(args):
+    """El router lee la configuración al importarse: fijarla antes."""
+    os.environ["IA_SIMULADO"] = "1"
+    os.environ["IA_PROVEEDORES_ORDEN"] = "simulado"
+    os.environ["IA_SIMULADO_LATENCIA_MS"] = str(args.latencia_ms)
+    os.environ["IA_SIMULADO_JITTER_MS"] = str(args.jitter_ms)
+    os.environ["IA_SIMULADO_ERROR"] = str(args.error)
+    os.environ["IA_SIMULADO_TRUNCADO"] = str(args.truncado)
+    os.environ["IA_SIMULADO_CUOTA"] = str(args.cuota)
+    os.environ["IA_SIMULADO_SEMILLA"] = str(args.semilla)
+    # El breaker abriría el circuito con las fallas inyectadas y el resto iría a local
+    os.environ.setdefault("IA_CB_FALLOS", "1000000")
+    os.environ.setdefault("IA_CB_ENFRIAMIENTO_S", "0")
+
+
+def _solicitud(ia, args):
+    return ia.SolicitudGenerarRutina(
+        id_cliente=args.cliente or 0,
+        objetivos=args.objetivos,
+        dias=args.dias,
+        nivel=args.nivel,
+        proveedor="simulado",
+        usar_cache=args.cache,
+        usar_catalogo=not args.sin_catalogo,
+    )
+
+
+def bench_generar(args):
+    from config.database import SessionLocal
+    from routers import ia
+
+    latencias, generacion, persistencia = [], [], []
+    etapas: dict[str, list[float]] = {}
+    proveedores: dict[str, int] = {}
+    errores = 0
+
+    def _una(i: int):
+        solicitud = _solicitud(ia, args)
+        t0 = time.perf_counter()
+        nivel_norm, prov = ia._normalizar_solicitud(solicitud)
+        dias, seguridad, generada_por, descripcion, _ = ia._generar_dias(solicitud, nivel_norm, prov)
+        base, _ = ia._armar_rutina(solicitud, False, nivel_norm, dias, seguridad, generada_por, descripcion)
+        t_gen = time.perf_counter()
+
+        tiempos = None
+        if args.cliente:
+            db = SessionLocal()
+            try:
+                tiempos = ia.persistir_rutina_generada(db, base, confirmar=False)["tiempos_ms"]
+            finally:
+                db.rollback()
+                db.close()
+        t_fin = time.perf_counter()
+        return base.generada_por, (t_gen - t0) * 1000, (t_fin - t_gen) * 1000, (t_fin - t0) * 1000, tiempos
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrencia) as ex:
+        futuros = [ex.submit(_una, i) for i in range(args.solicitudes)]
+        for f in futuros:
+            try:
+                prov, ms_gen, ms_bd, ms_total, tiempos = f.result()
+            except Exception as e:
+                errores += 1
+                print(f"❌ {type(e).__name__}: {e}")
+                continue
+            proveedores[prov] = proveedores.get(prov, 0) + 1
+            generacion.append(ms_gen)
+            latencias.append(ms_total)
+            if tiempos:
+                persistencia.append(ms_bd)
+                for etapa, ms in tiempos.items():
+                    etapas.setdefault(etapa, []).append(ms)
+    duracion = time.perf_counter() - inicio
+
+    total = len(latencias) + errores
+    print(f"\n📊 Generación de rutinas (simulado {args.latencia_ms}±{args.jitter_ms} ms, "
+          f"concurrencia={args.concurrencia})")
+    print("─" * 78)
+    print(f"   Solicitudes:  {total} ({errores} errores)   proveedores: {proveedores}")
+    print(f"   Duración:     {duracion:.2f}s")
+    print(f"   Throughput:   {total / duracion:.1f} rutinas/s" if duracion else "   Throughput:   -")
+    _linea("punta a punta", latencias)
+    _linea("generación", generacion)
+    _linea("persistencia", persistencia)
+    for etapa, valores in etapas.items():
+        _linea(f"  · {etapa}", valores)
+
+    print(f"\n🤖 Simulado: {ia.proveedor_simulado.estadisticas()}")
+    print(f"🔌 Breaker: {ia.orquestador_ia.estado()['simulado']}")
+
+
+def bench_stream(args):
+    from routers import ia
+    from utils.json_incremental import ExtractorArrayJSON
+
+    primer_dia, totales = [], []
+    errores = 0
+
+    def _una(i: int):
+        solicitud = _solicitud(ia, args)
+        nivel_norm, _ = ia._normalizar_solicitud(solicitud)
+        prompt, _ = ia._prompt_solicitud(solicitud, nivel_norm)
+        extractor = ExtractorArrayJSON("dias")
+        t0 = time.perf_counter()
+        t_primero = None
+        for fragmento in ia._stream_fragmentos("simulado", prompt):
+            if extractor.alimentar(fragmento) and t_primero is None:
+                t_primero = time.perf_counter()
+        if not extractor.arreglo_cerrado:
+            raise ValueError("stream truncado")
+        return ((t_primero or time.perf_counter()) - t0) * 1000, (time.perf_counter() - t0) * 1000
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrencia) as ex:
+        futuros = [ex.submit(_una, i) for i in range(args.solicitudes)]
+        for f in futuros:
+            try:
+                ms_primero, ms_total = f.result()
+            except Exception as e:
+                errores += 1
+                print(f"❌ {type(e).__name__}: {e}")
+                continue
+            primer_dia.append(ms_primero)
+            totales.append(ms_total)
+    duracion = time.perf_counter() - inicio
+
+    total = len(totales) + errores
+    print(f"\n📊 Streaming (simulado {args.latencia_ms}±{args.jitter_ms} ms, concurrencia={args.concurrencia})")
+    print("─" * 78)
+    print(f"   Streams:      {total} ({errores} errores)")
+    print(f"   Duración:     {duracion:.2f}s")
+    _linea("primer día", primer_dia)
+    _linea("total", totales)
+    print(f"\n🤖 Simulado: {ia.proveedor_simulado.estadisticas()}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de rutinas IA (sin red)")
+    sub = parser.add_subparsers(dest="modo", required=True)
+
+    for nombre, ayuda in (("generar", "Generación + persistencia (rollback)"),
+                          ("stream", "Streaming: tiempo al primer día y total")):
+        p = sub.add_parser(nombre, help=ayuda)
+        p.add_argument("--solicitudes", type=int, default=100)
+        p.add_argument("--concurrencia", type=int, default=10)
+        p.add_argument("--cliente", type=int, default=None, help="id_cliente para medir la persistencia")
+        p.add_argument("--dias", type=int, default=4)
+        p.add_argument("--nivel", default="intermedio")
+        p.add_argument("--objetivos", default="hipertrofia")
+        p.add_argument("--latencia-ms", type=float, default=800)
+        p.add_argument("--jitter-ms", type=float, default=200)
+        p.add_argument("--error", type=float, default=0.0)
+        p.add_argument("--truncado", type=float, default=0.0)
+        p.add_argument("--cuota", type=float, default=0.0)
+        p.add_argument("--semilla", type=int, default=42)
+        p.add_argument("--cache", action="store_true", help="Usar la caché de planes (por defecto no)")
+        p.add_argument("--sin-catalogo", action="store_true", help="Prompt libre en vez del catálogo")
+
+    args = parser.parse_args()
+    _configurar_entorno(args)
+
+    if args.modo == "generar":
+        bench_generar(args)
+    else:
+        bench_stream(args)
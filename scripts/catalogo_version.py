@@ -0,0 +1,60 @@
+# scripts/catalogo_version.py
+"""
+Tabla catalogo_version: contador por catálogo en memoria ('ejercicios',
+'entrenadores') con el que cada worker detecta que otro lo modificó
+(services/catalogo_ejercicios.py, services/catalogo_entrenadores.py), y
+catalogo_cambios: ids modificados en cada versión, para que los demás
+workers apliquen solo esos cambios en vez de recargar el catálogo entero.
+
+Uso:
+    python scripts/catalogo_version.py create
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db import get_connection
+
+CREAR_TABLA_VERSION_SQL = """
+    CREATE TABLE IF NOT EXISTS catalogo_version (
+        nombre VARCHAR(50) NOT NULL PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0
+    )
+"""
+
+CREAR_TABLA_CAMBIOS_SQL = """
+    CREATE TABLE IF NOT EXISTS catalogo_cambios (
+        nombre VARCHAR(50) NOT NULL,
+        version BIGINT NOT NULL,
+        ids TEXT NOT NULL,
+        creado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (nombre, version)
+    )
+"""
+
+
+def create():
+    cn = get_connection()
+    cur = cn.cursor()
+    try:
+        print("Creando tablas catalogo_version y catalogo_cambios...")
+        cur.execute(CREAR_TABLA_VERSION_SQL)
+        cur.execute(CREAR_TABLA_CAMBIOS_SQL)
+        cn.commit()
+        print("✅ Listo")
+    finally:
+        cur.close()
+        cn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Versiones de los catálogos en memoria")
+    parser.add_argument("action", choices=["create"], help="Acción a ejecutar")
+    args = parser.parse_args()
+
+    if args.action == "create":
+        create()
@@ -0,0 +1,63 @@
+# scripts/ejercicios_nombres.py
+"""
+Columna normalizada e índice para resolver ejercicios por nombre
+(usados por services/catalogo_ejercicios.resolver_ejercicios).
+
+Uso:
+    python scripts/ejercicios_nombres.py create
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db import get_connection
+
+
+def create():
+    cn = get_connection()
+    cur = cn.cursor()
+    try:
+        cur.execute("""
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = 'ejercicios'
+              AND column_name = 'nombre_normalizado'
+        """)
+        if cur.fetchone()[0]:
+            print("  - ejercicios.nombre_normalizado ya existe")
+        else:
+            cur.execute("""
+                ALTER TABLE ejercicios
+                ADD COLUMN nombre_normalizado VARCHAR(255)
+                    GENERATED ALWAYS AS (LOWER(TRIM(REPLACE(nombre, '  ', ' ')))) STORED
+            """)
+            print("  - ejercicios.nombre_normalizado creada")
+
+        cur.execute("""
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = 'ejercicios'
+              AND index_name = 'idx_ejercicios_nombre_normalizado'
+        """)
+        if cur.fetchone()[0]:
+            print("  - idx_ejercicios_nombre_normalizado ya existe")
+        else:
+            cur.execute("CREATE INDEX idx_ejercicios_nombre_normalizado ON ejercicios (nombre_normalizado)")
+            print("  - idx_ejercicios_nombre_normalizado creado")
+
+        cn.commit()
+        print("✅ Listo")
+    finally:
+        cur.close()
+        cn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Nombre normalizado de ejercicios")
+    parser.add_argument("action", choices=["create"], help="Acción a ejecutar")
+    args = parser.parse_args()
+
+    if args.action == "create":
+        create()
@@ -0,0 +1,57 @@
+# scripts/entrenadores_indices.py
+"""
+Índices de usuarios para la búsqueda de entrenadores
+(routers/usuarios.py listar_entrenadores: filtros, orden y facetas en SQL).
+
+Uso:
+    python scripts/entrenadores_indices.py create
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db import get_connection
+
+INDICES = {
+    "idx_usuarios_rol_rating": "(rol, rating)",
+    "idx_usuarios_rol_precio": "(rol, precio_mensual)",
+    "idx_usuarios_rol_experiencia": "(rol, experiencia)",
+    "idx_usuarios_rol_ciudad": "(rol, ciudad)",
+    "idx_usuarios_rol_especialidad": "(rol, especialidad)",
+}
+
+
+def create():
+    cn = get_connection()
+    cur = cn.cursor()
+    try:
+        for nombre, columnas in INDICES.items():
+            cur.execute("""
+                SELECT COUNT(*) FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = 'usuarios'
+                  AND index_name = %s
+            """, (nombre,))
+            if cur.fetchone()[0]:
+                print(f"  - {nombre} ya existe")
+                continue
+            cur.execute(f"CREATE INDEX {nombre} ON usuarios {columnas}")
+            print(f"  - {nombre} creado")
+
+        cn.commit()
+        print("✅ Listo")
+    finally:
+        cur.close()
+        cn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Índices de búsqueda de entrenadores")
+    parser.add_argument("action", choices=["create"], help="Acción a ejecutar")
+    args = parser.parse_args()
+
+    if args.action == "create":
+        create()
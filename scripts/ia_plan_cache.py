@@ -0,0 +1,51 @@
+# scripts/ia_plan_cache.py
+"""
+Tabla de la caché de planes de IA (services/ia_plan_cache.py); la purga de
+expirados la hace la tarea periódica purgar_cache_planes.
+
+Uso:
+    python scripts/ia_plan_cache.py create
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db import get_connection
+
+CREAR_TABLA_SQL = """
+    CREATE TABLE IF NOT EXISTS ia_planes_cache (
+        clave CHAR(64) NOT NULL PRIMARY KEY,
+        proveedor VARCHAR(20) NOT NULL,
+        plan LONGTEXT NOT NULL,
+        creado_en DATETIME NOT NULL,
+        expira_en DATETIME NOT NULL,
+        hits INT NOT NULL DEFAULT 0,
+        KEY idx_ia_planes_expira (expira_en)
+    )
+"""
+
+
+def create():
+    cn = get_connection()
+    cur = cn.cursor()
+    try:
+        print("Creando tabla ia_planes_cache...")
+        cur.execute(CREAR_TABLA_SQL)
+        cn.commit()
+        print("✅ Listo")
+    finally:
+        cur.close()
+        cn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Caché de planes de IA")
+    parser.add_argument("action", choices=["create"], help="Acción a ejecutar")
+    args = parser.parse_args()
+
+    if args.action == "create":
+        create()
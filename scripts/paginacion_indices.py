@@ -0,0 +1,62 @@
+# scripts/paginacion_indices.py
+"""
+Índices para la paginación por cursor (keyset) de los listados:
+- resenas: GET /resenas/entrenador/{id}/resenas -> (id_entrenador, fecha_creacion, id_resena)
+- rutinas: GET /rutinas                          -> (fecha_creacion, id_rutina)
+- historial_rutinas: historial de progreso        -> (id_cliente, fecha_inicio, id_historial)
+
+Con el índice cada página es un rango a partir del último visto, sin
+recorrer ni ordenar las filas anteriores.
+
+Uso:
+    python scripts/paginacion_indices.py create
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db import get_connection
+
+INDICES = [
+    ("resenas", "idx_resenas_entrenador_fecha", "id_entrenador, fecha_creacion, id_resena"),
+    ("rutinas", "idx_rutinas_fecha", "fecha_creacion, id_rutina"),
+    ("historial_rutinas", "idx_historial_cliente_fecha", "id_cliente, fecha_inicio, id_historial"),
+]
+
+
+def _crear_indice(cur, tabla: str, nombre: str, columnas: str):
+    cur.execute("""
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """, (tabla, nombre))
+    if cur.fetchone()[0]:
+        print(f"  - {tabla}.{nombre} ya existe")
+        return
+    cur.execute(f"CREATE INDEX {nombre} ON {tabla} ({columnas})")
+    print(f"  - {tabla}.{nombre} creado")
+
+
+def create():
+    cn = get_connection()
+    cur = cn.cursor()
+    try:
+        for tabla, nombre, columnas in INDICES:
+            _crear_indice(cur, tabla, nombre, columnas)
+        cn.commit()
+        print("✅ Listo")
+    finally:
+        cur.close()
+        cn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Índices de paginación por cursor")
+    parser.add_argument("action", choices=["create"], help="Acción a ejecutar")
+    args = parser.parse_args()
+
+    if args.action == "create":
+        create()
@@ -0,0 +1,65 @@
+# scripts/perfiles_a_bd.py
+"""
+Copia los perfiles de entrenador (data/perfiles/{id}.json) a la columna
+usuarios.perfil_entrenador, para usar PERFILES_EN_BD=1
+(services/perfiles_entrenador.py).
+
+Uso:
+    python scripts/perfiles_a_bd.py migrar
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db import get_connection
+from services.perfiles_entrenador import PERFILES_DIR, serializar
+
+
+def migrar():
+    cn = get_connection()
+    cur = cn.cursor()
+    try:
+        cur.execute("""
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = 'usuarios'
+              AND column_name = 'perfil_entrenador'
+        """)
+        if not cur.fetchone()[0]:
+            cur.execute("ALTER TABLE usuarios ADD COLUMN perfil_entrenador TEXT NULL")
+            print("  - usuarios.perfil_entrenador creada")
+
+        copiados, errores = 0, 0
+        for path in sorted(PERFILES_DIR.glob("*.json")):
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    doc = json.load(f)
+                id_usuario = int(path.stem)
+            except (ValueError, OSError) as e:
+                errores += 1
+                print(f"  ⚠️ {path.name}: {e}")
+                continue
+            cur.execute(
+                "UPDATE usuarios SET perfil_entrenador = %s WHERE id_usuario = %s",
+                (serializar(doc), id_usuario),
+            )
+            copiados += cur.rowcount
+
+        cn.commit()
+        print(f"✅ {copiados} perfiles copiados ({errores} con errores)")
+    finally:
+        cur.close()
+        cn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Perfiles de entrenador a la BD")
+    parser.add_argument("action", choices=["migrar"], help="Acción a ejecutar")
+    args = parser.parse_args()
+
+    if args.action == "migrar":
+        migrar()
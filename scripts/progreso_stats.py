@@ -0,0 +1,121 @@
+# scripts/progreso_stats.py
+"""
+Tablas auxiliares de progreso usadas por routers/progresion.py:
+- progreso_stats_ejercicio: estadísticas por (cliente, ejercicio)
+- progreso_sync_claves: claves de idempotencia de la sincronización offline
+
+Uso:
+    python scripts/progreso_stats.py create              # crea tablas e índices
+    python scripts/progreso_stats.py rebuild             # recalcula todo el historial
+    python scripts/progreso_stats.py rebuild --cliente 5 # solo un cliente
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db import get_connection
+from services.progreso_service import STATS_RECONSTRUIR_SQL
+
+CREAR_TABLA_SQL = """
+    CREATE TABLE IF NOT EXISTS progreso_stats_ejercicio (
+        id_cliente INT NOT NULL,
+        id_ejercicio INT NOT NULL,
+        total_sesiones INT NOT NULL DEFAULT 0,
+        ultimo_numero_sesion INT NOT NULL DEFAULT 0,
+        peso_maximo DECIMAL(7,2) NULL,
+        peso_inicial DECIMAL(7,2) NULL,
+        peso_ultimo DECIMAL(7,2) NULL,
+        primera_sesion DATETIME NULL,
+        ultima_sesion DATETIME NULL,
+        actualizado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (id_cliente, id_ejercicio),
+        KEY idx_stats_ultima_sesion (ultima_sesion)
+    )
+"""
+
+CREAR_TABLA_SYNC_SQL = """
+    CREATE TABLE IF NOT EXISTS progreso_sync_claves (
+        id_cliente INT NOT NULL,
+        clave VARCHAR(64) NOT NULL,
+        token_sync CHAR(32) NOT NULL,
+        id_progreso INT NULL,
+        creado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id_cliente, clave),
+        KEY idx_sync_token (token_sync)
+    )
+"""
+
+# Índice de apoyo para la reconstrucción y para las consultas por par
+INDICES = [
+    ("progreso_ejercicios", "idx_pe_cliente_ejercicio_fecha", "id_cliente, id_ejercicio, fecha_sesion"),
+]
+
+
+def _crear_indice(cur, tabla: str, nombre: str, columnas: str):
+    cur.execute("""
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """, (tabla, nombre))
+    if cur.fetchone()[0]:
+        print(f"  - {tabla}.{nombre} ya existe")
+        return
+    cur.execute(f"CREATE INDEX {nombre} ON {tabla} ({columnas})")
+    print(f"  - {tabla}.{nombre} creado")
+
+
+def create():
+    cn = get_connection()
+    cur = cn.cursor()
+    try:
+        print("Creando tablas progreso_stats_ejercicio y progreso_sync_claves...")
+        cur.execute(CREAR_TABLA_SQL)
+        cur.execute(CREAR_TABLA_SYNC_SQL)
+        for tabla, nombre, columnas in INDICES:
+            _crear_indice(cur, tabla, nombre, columnas)
+        cn.commit()
+        print("✅ Listo")
+    finally:
+        cur.close()
+        cn.close()
+
+
+def rebuild(id_cliente: int | None = None):
+    cn = get_connection()
+    cur = cn.cursor()
+    inicio = time.perf_counter()
+    try:
+        if id_cliente is None:
+            cur.execute("DELETE FROM progreso_stats_ejercicio")
+            cur.execute(STATS_RECONSTRUIR_SQL.format(filtro="1 = 1"))
+        else:
+            cur.execute("DELETE FROM progreso_stats_ejercicio WHERE id_cliente = %s", (id_cliente,))
+            cur.execute(STATS_RECONSTRUIR_SQL.format(filtro="pe.id_cliente = %s"), (id_cliente,))
+        cn.commit()
+
+        cur.execute("SELECT COUNT(*) FROM progreso_stats_ejercicio")
+        total = cur.fetchone()[0]
+        print(f"✅ Estadísticas reconstruidas en {time.perf_counter() - inicio:.2f}s ({total} pares)")
+    except Exception:
+        cn.rollback()
+        raise
+    finally:
+        cur.close()
+        cn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tablas auxiliares de progreso")
+    parser.add_argument("action", choices=["create", "rebuild"], help="Acción a ejecutar")
+    parser.add_argument("--cliente", type=int, default=None, help="Reconstruir solo este cliente")
+
+    args = parser.parse_args()
+
+    if args.action == "create":
+        create()
+    elif args.action == "rebuild":
+        rebuild(args.cliente)
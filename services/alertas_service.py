@@ -0,0 +1,119 @@
+# services/alertas_service.py
+"""
+Generación masiva de alertas de progresión.
+
+En lugar de recorrer cada par (cliente, ejercicio) desde Python, cada shard de
+clientes se resuelve con un único INSERT ... SELECT anti-join contra las alertas
+pendientes, y cada shard se confirma por separado para no mantener locks largos.
+"""
+
+import os
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from services.progreso_service import invalidar_todos
+
+ALERTAS_SHARDS = int(os.getenv("ALERTAS_SHARDS", "8"))
+
+# Rango de días sin sesión que dispara la alerta "progresion_retrasada"
+DIAS_MIN_RETRASO = 14
+DIAS_MAX_RETRASO = 28
+
+_INSERTAR_RETRASADAS_SQL = text("""
+    INSERT INTO alertas_progresion (
+        id_cliente, id_ejercicio,
+        tipo_alerta, prioridad, titulo, mensaje,
+        fecha_generacion, estado
+    )
+    SELECT
+        c.id_cliente,
+        c.id_ejercicio,
+        'progresion_retrasada',
+        'media',
+        CONCAT('Tiempo de subir peso en ', e.nombre),
+        CONCAT('Han pasado ', c.dias, ' días desde tu última progresión en ', e.nombre,
+               '. Considera aumentar ligeramente el peso.'),
+        NOW(),
+        'pendiente'
+    FROM (
+        SELECT
+            id_cliente,
+            id_ejercicio,
+            TIMESTAMPDIFF(DAY, MAX(fecha_sesion), NOW()) AS dias
+        FROM progreso_ejercicios
+        WHERE id_cliente BETWEEN :desde AND :hasta
+        GROUP BY id_cliente, id_ejercicio
+        HAVING dias BETWEEN :dias_min AND :dias_max
+    ) c
+    INNER JOIN ejercicios e ON e.id_ejercicio = c.id_ejercicio
+    LEFT JOIN alertas_progresion a
+        ON a.id_cliente = c.id_cliente
+       AND a.id_ejercicio = c.id_ejercicio
+       AND a.tipo_alerta = 'progresion_retrasada'
+       AND a.estado = 'pendiente'
+    WHERE a.id_alerta IS NULL
+""")
+
+
+def _rangos_clientes(db: Session, shards: int) -> list[tuple[int, int]]:
+    fila = db.execute(text("""
+        SELECT MIN(id_cliente) AS minimo, MAX(id_cliente) AS maximo
+        FROM progreso_ejercicios
+    """)).fetchone()
+    if not fila or fila.minimo is None:
+        return []
+
+    minimo, maximo = int(fila.minimo), int(fila.maximo)
+    shards = max(1, min(shards, maximo - minimo + 1))
+    paso = (maximo - minimo + shards) // shards
+    return [
+        (desde, min(desde + paso - 1, maximo))
+        for desde in range(minimo, maximo + 1, paso)
+    ]
+
+
+def generar_alertas_retrasadas(db: Session, shards: int = ALERTAS_SHARDS) -> dict:
+    """
+    Crea alertas 'progresion_retrasada' para todos los pares que llevan entre
+    14 y 28 días sin sesión y no tienen ya una alerta pendiente del mismo tipo.
+
+    Devuelve el total insertado y el detalle (rango, filas, ms) de cada shard.
+    """
+    inicio = time.perf_counter()
+    detalle = []
+    total = 0
+
+    for desde, hasta in _rangos_clientes(db, shards):
+        t0 = time.perf_counter()
+        try:
+            res = db.execute(_INSERTAR_RETRASADAS_SQL, {
+                "desde": desde,
+                "hasta": hasta,
+                "dias_min": DIAS_MIN_RETRASO,
+                "dias_max": DIAS_MAX_RETRASO,
+            })
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        insertadas = res.rowcount or 0
+        total += insertadas
+        detalle.append({
+            "clientes": [desde, hasta],
+            "alertas": insertadas,
+            "ms": round((time.perf_counter() - t0) * 1000, 2),
+        })
+
+    if total:
+        invalidar_todos()
+
+    duracion_ms = round((time.perf_counter() - inicio) * 1000, 2)
+    print(f"✅ Alertas periódicas: {total} nuevas en {len(detalle)} shards ({duracion_ms} ms)")
+    return {
+        "alertas_generadas": total,
+        "shards": len(detalle),
+        "duracion_ms": duracion_ms,
+        "detalle": detalle,
+    }
@@ -0,0 +1,216 @@
+# services/analitica_progreso.py
+"""
+Analítica de series de progreso con NumPy.
+
+- Reducción de la serie en el servidor (LTTB o agregados por intervalos de tiempo).
+- 1RM estimado (Epley), carga de volumen, pendiente de la media móvil y meseta.
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+SEGUNDOS_SEMANA = 7 * 24 * 3600
+
+
+# ============================================================
+# 🔹 CARGA
+# ============================================================
+
+def cargar_serie(cur, id_cliente: int, id_ejercicio: int,
+                 desde: datetime | None = None, hasta: datetime | None = None) -> dict[str, np.ndarray]:
+    """
+    Lee las sesiones con peso del par (cliente, ejercicio) en orden cronológico
+    y las devuelve como arrays columnares.
+    """
+    filtros = ["id_cliente = %s", "id_ejercicio = %s", "peso_kg IS NOT NULL"]
+    params: list = [id_cliente, id_ejercicio]
+    if desde:
+        filtros.append("fecha_sesion >= %s")
+        params.append(desde)
+    if hasta:
+        filtros.append("fecha_sesion <= %s")
+        params.append(hasta)
+
+    cur.execute(f"""
+        SELECT fecha_sesion, peso_kg, series_completadas, repeticiones_completadas, rpe
+        FROM progreso_ejercicios
+        WHERE {" AND ".join(filtros)}
+        ORDER BY fecha_sesion, id_progreso
+    """, tuple(params))
+    filas = cur.fetchall()
+
+    if not filas:
+        vacio = np.array([], dtype=np.float64)
+        return {"t": vacio, "peso": vacio, "series": vacio, "reps": vacio, "rpe": vacio}
+
+    return {
+        "t": np.array([f[0].timestamp() for f in filas], dtype=np.float64),
+        "peso": np.array([float(f[1]) for f in filas], dtype=np.float64),
+        "series": np.array([f[2] or 0 for f in filas], dtype=np.float64),
+        "reps": np.array([f[3] or 0 for f in filas], dtype=np.float64),
+        "rpe": np.array([np.nan if f[4] is None else f[4] for f in filas], dtype=np.float64),
+    }
+
+
+# ============================================================
+# 🔹 MÉTRICAS VECTORIZADAS
+# ============================================================
+
+def estimar_1rm(peso: np.ndarray, reps: np.ndarray) -> np.ndarray:
+    """1RM estimado con la fórmula de Epley (peso · (1 + reps/30)); con 1 rep o menos es el peso."""
+    return np.where(reps <= 1, peso, peso * (1.0 + reps / 30.0))
+
+
+def carga_volumen(peso: np.ndarray, series: np.ndarray, reps: np.ndarray) -> np.ndarray:
+    return peso * series * reps
+
+
+def media_movil(valores: np.ndarray, ventana: int) -> np.ndarray:
+    if ventana <= 1 or valores.size < ventana:
+        return valores.copy()
+    acumulado = np.cumsum(np.insert(valores, 0, 0.0))
+    return (acumulado[ventana:] - acumulado[:-ventana]) / ventana
+
+
+def pendiente_semanal(t: np.ndarray, valores: np.ndarray) -> float:
+    """Pendiente (unidades/semana) de la recta de mínimos cuadrados."""
+    if valores.size < 2 or np.ptp(t) == 0:
+        return 0.0
+    pendiente = np.polyfit((t - t[0]) / SEGUNDOS_SEMANA, valores, 1)[0]
+    return float(pendiente)
+
+
+def analizar(serie: dict[str, np.ndarray], ventana: int = 5, umbral_meseta: float = 0.005) -> dict:
+    """
+    Métricas de la serie completa:
+    - e1rm_actual / e1rm_maximo
+    - volumen_total / volumen_promedio
+    - pendiente_kg_semana: pendiente de la media móvil del 1RM estimado
+    - meseta: la media móvil no sube más de `umbral_meseta` (fracción/semana)
+      y el mejor 1RM de las últimas `ventana` sesiones no supera el anterior.
+    """
+    n = serie["t"].size
+    if n == 0:
+        return {
+            "sesiones": 0, "e1rm_actual": None, "e1rm_maximo": None,
+            "volumen_total": 0.0, "volumen_promedio": 0.0,
+            "pendiente_kg_semana": 0.0, "meseta": False, "ventana": ventana,
+        }
+
+    e1rm = estimar_1rm(serie["peso"], serie["reps"])
+    volumen = carga_volumen(serie["peso"], serie["series"], serie["reps"])
+
+    suavizado = media_movil(e1rm, ventana)
+    t_suavizado = serie["t"][-suavizado.size:]
+    # Solo el tramo reciente para que la tendencia refleje el estado actual
+    reciente = slice(-min(suavizado.size, ventana * 3), None)
+    pendiente = pendiente_semanal(t_suavizado[reciente], suavizado[reciente])
+
+    meseta = False
+    if n >= ventana * 2:
+        mejor_reciente = e1rm[-ventana:].max()
+        mejor_anterior = e1rm[:-ventana].max()
+        referencia = max(float(suavizado[-1]), 1e-9)
+        meseta = bool(mejor_reciente <= mejor_anterior and pendiente / referencia < umbral_meseta)
+
+    return {
+        "sesiones": int(n),
+        "e1rm_actual": round(float(e1rm[-1]), 2),
+        "e1rm_maximo": round(float(e1rm.max()), 2),
+        "volumen_total": round(float(volumen.sum()), 2),
+        "volumen_promedio": round(float(volumen.mean()), 2),
+        "pendiente_kg_semana": round(pendiente, 3),
+        "meseta": meseta,
+        "ventana": ventana,
+    }
+
+
+# ============================================================
+# 🔹 REDUCCIÓN DE LA SERIE
+# ============================================================
+
+def lttb(x: np.ndarray, y: np.ndarray, puntos: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: índices de `puntos` muestras que conservan
+    la forma visual de la serie (siempre incluye la primera y la última).
+    """
+    n = x.size
+    if puntos >= n or puntos < 3:
+        return np.arange(n)
+
+    indices = np.empty(puntos, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    limites = np.linspace(1, n - 1, puntos - 1).astype(np.int64)
+
+    a = 0
+    for i in range(puntos - 2):
+        ini, fin = limites[i], limites[i + 1]
+        sig_ini, sig_fin = limites[i + 1], (limites[i + 2] if i + 2 < limites.size else n)
+        prom_x = x[sig_ini:sig_fin].mean()
+        prom_y = y[sig_ini:sig_fin].mean()
+
+        areas = np.abs(
+            (x[a] - prom_x) * (y[ini:fin] - y[a]) - (x[a] - x[ini:fin]) * (prom_y - y[a])
+        )
+        a = ini + int(areas.argmax())
+        indices[i + 1] = a
+    return indices
+
+
+def agregar_por_intervalos(serie: dict[str, np.ndarray], puntos: int) -> list[dict]:
+    """Divide el rango de fechas en `puntos` intervalos iguales y agrega cada uno."""
+    t = serie["t"]
+    if t.size == 0:
+        return []
+    bordes = np.linspace(t[0], t[-1] + 1, puntos + 1)
+    grupo = np.clip(np.digitize(t, bordes) - 1, 0, puntos - 1)
+
+    e1rm = estimar_1rm(serie["peso"], serie["reps"])
+    volumen = carga_volumen(serie["peso"], serie["series"], serie["reps"])
+
+    conteo = np.bincount(grupo, minlength=puntos)
+    suma_peso = np.bincount(grupo, weights=serie["peso"], minlength=puntos)
+    suma_vol = np.bincount(grupo, weights=volumen, minlength=puntos)
+    suma_t = np.bincount(grupo, weights=t, minlength=puntos)
+    max_e1rm = np.full(puntos, -np.inf)
+    np.maximum.at(max_e1rm, grupo, e1rm)
+    max_peso = np.full(puntos, -np.inf)
+    np.maximum.at(max_peso, grupo, serie["peso"])
+
+    salida = []
+    for i in np.nonzero(conteo)[0]:
+        salida.append({
+            "fecha": datetime.fromtimestamp(suma_t[i] / conteo[i]).isoformat(timespec="seconds"),
+            "sesiones": int(conteo[i]),
+            "peso_promedio": round(float(suma_peso[i] / conteo[i]), 2),
+            "peso_maximo": round(float(max_peso[i]), 2),
+            "e1rm_maximo": round(float(max_e1rm[i]), 2),
+            "volumen": round(float(suma_vol[i]), 2),
+        })
+    return salida
+
+
+def reducir_serie(serie: dict[str, np.ndarray], puntos: int, modo: str = "lttb",
+                  metrica: str = "e1rm") -> list[dict]:
+    """Devuelve como mucho `puntos` puntos de la serie, por LTTB o por intervalos."""
+    if modo == "intervalos":
+        return agregar_por_intervalos(serie, puntos)
+
+    e1rm = estimar_1rm(serie["peso"], serie["reps"])
+    volumen = carga_volumen(serie["peso"], serie["series"], serie["reps"])
+    y = {"e1rm": e1rm, "peso": serie["peso"], "volumen": volumen}[metrica]
+
+    idx = lttb(serie["t"], y, puntos)
+    return [
+        {
+            "fecha": datetime.fromtimestamp(serie["t"][i]).isoformat(timespec="seconds"),
+            "peso_kg": round(float(serie["peso"][i]), 2),
+            "series": int(serie["series"][i]),
+            "repeticiones": int(serie["reps"][i]),
+            "rpe": None if np.isnan(serie["rpe"][i]) else int(serie["rpe"][i]),
+            "e1rm": round(float(e1rm[i]), 2),
+            "volumen": round(float(volumen[i]), 2),
+        }
+        for i in idx
+    ]
@@ -0,0 +1,291 @@
+# services/catalogo_ejercicios.py
+"""
+Índice en memoria del catálogo de ejercicios (por proceso).
+
+Se carga con una sola consulta y queda agrupado por grupo_muscular y
+dificultad como tuplas inmutables, así el generador local de rutinas no hace
+SQL de catálogo en cada petición.
+
+Se recarga cuando:
+- este proceso crea ejercicios (invalidar() sube además el contador global), o
+- el contador `catalogo_version` de la BD cambió (otro worker creó ejercicios);
+  se consulta como mucho cada CATALOGO_VERIFICAR_S segundos. La tabla se crea
+  con `python scripts/catalogo_version.py create`.
+"""
+
+import os
+import threading
+import time
+import unicodedata
+from collections import namedtuple
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import text, bindparam
+
+from db import get_connection
+
+CATALOGO_VERIFICAR_S = float(os.getenv("CATALOGO_VERIFICAR_S", "30"))
+
+GRUPOS_GENERADOR = ["PECHO", "ESPALDA", "BRAZOS", "PIERNAS", "HOMBROS", "CORE", "CARDIO"]
+
+Ejercicio = namedtuple("Ejercicio", "id_ejercicio nombre descripcion grupo_muscular dificultad tipo")
+
+
+class CatalogoEjercicios:
+    def __init__(self, verificar_s: float = CATALOGO_VERIFICAR_S):
+        self.verificar_s = verificar_s
+        self._lock = threading.Lock()
+        # grupo -> dificultad -> tuple[Ejercicio]
+        self._indice: Dict[str, Dict[str, tuple]] = {}
+        # grupo -> tuple[Ejercicio] ordenado por dificultad (fallback sin nivel)
+        self._por_grupo: Dict[str, tuple] = {}
+        self._por_id: Dict[int, Ejercicio] = {}
+        self._total = 0
+        self._cargado = False
+        self._version = None
+        self._ultima_verificacion = 0.0
+        self._cargas = 0
+
+    # --------------------------------------------------------
+    def _leer_version(self, cur) -> int:
+        cur.execute("SELECT version FROM catalogo_version WHERE nombre = 'ejercicios'")
+        fila = cur.fetchone()
+        return int(fila[0]) if fila else 0
+
+    def _cargar(self):
+        cn = get_connection()
+        cur = cn.cursor()
+        try:
+            try:
+                version = self._leer_version(cur)
+            except Exception as e:
+                # Sin la tabla se carga igual; solo no se detectan cambios de otros workers
+                print(f"⚠️ No se pudo leer catalogo_version (python scripts/catalogo_version.py create): {e}")
+                version = None
+            cur.execute("""
+                SELECT id_ejercicio, nombre, descripcion, grupo_muscular, dificultad, tipo
+                FROM ejercicios
+                ORDER BY id_ejercicio
+            """)
+            filas = cur.fetchall()
+        finally:
+            cur.close()
+            cn.close()
+
+        indice: Dict[str, Dict[str, list]] = {}
+        por_id: Dict[int, Ejercicio] = {}
+        for f in filas:
+            ej = Ejercicio(f[0], f[1], f[2] or "", f[3], f[4], f[5] or "general")
+            grupo = (f[3] or "").strip().upper()
+            dificultad = (f[4] or "").strip().lower()
+            indice.setdefault(grupo, {}).setdefault(dificultad, []).append(ej)
+            por_id[ej.id_ejercicio] = ej
+
+        self._indice = {
+            g: {d: tuple(lista) for d, lista in por_dif.items()}
+            for g, por_dif in indice.items()
+        }
+        self._por_grupo = {
+            g: tuple(sorted(
+                (ej for lista in por_dif.values() for ej in lista),
+                key=lambda e: ((e.dificultad or ""), e.id_ejercicio)
+            ))
+            for g, por_dif in indice.items()
+        }
+        self._por_id = por_id
+        self._total = len(filas)
+        self._version = version
+        self._cargado = True
+        self._cargas += 1
+        self._ultima_verificacion = time.monotonic()
+        print(f"📚 Catálogo de ejercicios cargado: {self._total} ejercicios (versión {version})")
+
+    def _asegurar_vigente(self):
+        with self._lock:
+            if not self._cargado:
+                self._cargar()
+                return
+            if time.monotonic() - self._ultima_verificacion < self.verificar_s:
+                return
+            self._ultima_verificacion = time.monotonic()
+            try:
+                cn = get_connection()
+                cur = cn.cursor()
+                try:
+                    version = self._leer_version(cur)
+                finally:
+                    cur.close()
+                    cn.close()
+            except Exception as e:
+                print(f"⚠️ No se pudo verificar la versión del catálogo: {e}")
+                return
+            if version != self._version:
+                self._cargar()
+
+    # --------------------------------------------------------
+    def por_grupo(self, nivel: str, grupos: Iterable[str] = GRUPOS_GENERADOR,
+                  limite: int = 100) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Ejercicios de cada grupo para el nivel pedido; si el grupo no tiene
+        ejercicios de ese nivel, los del grupo ordenados por dificultad.
+        Devuelve listas nuevas (el llamador puede reordenarlas).
+        """
+        self._asegurar_vigente()
+        nivel = (nivel or "").strip().lower()
+        out: Dict[str, List[Dict[str, Any]]] = {}
+        for g in grupos:
+            clave = g.strip().upper()
+            candidatos = self._indice.get(clave, {}).get(nivel) or self._por_grupo.get(clave, ())
+            out[g] = [ej._asdict() for ej in candidatos[:limite]]
+        return out
+
+    def obtener(self, id_ejercicio: int) -> Ejercicio | None:
+        """Ejercicio del catálogo por id (None si no existe)."""
+        self._asegurar_vigente()
+        return self._por_id.get(id_ejercicio)
+
+    def invalidar(self):
+        """
+        Llamar tras confirmar la creación de ejercicios: sube el contador global
+        (para los demás workers) y fuerza la recarga local en la próxima consulta.
+        """
+        try:
+            cn = get_connection()
+            cur = cn.cursor()
+            try:
+                cur.execute("""
+                    INSERT INTO catalogo_version (nombre, version) VALUES ('ejercicios', 1)
+                    ON DUPLICATE KEY UPDATE version = version + 1
+                """)
+                cn.commit()
+            finally:
+                cur.close()
+                cn.close()
+        except Exception as e:
+            print(f"⚠️ No se pudo incrementar la versión del catálogo: {e}")
+        with self._lock:
+            self._cargado = False
+
+    def estadisticas(self) -> dict:
+        return {
+            "cargado": self._cargado,
+            "ejercicios": self._total,
+            "grupos": len(self._indice),
+            "version": self._version,
+            "cargas": self._cargas,
+            "verificar_s": self.verificar_s,
+        }
+
+
+catalogo_ejercicios = CatalogoEjercicios()
+
+
+# ============================================================
+# RESOLUCIÓN MASIVA DE NOMBRES (guardar_ejercicios_rutina)
+# ============================================================
+
+# Misma expresión que la columna generada ejercicios.nombre_normalizado
+# (scripts/ejercicios_nombres.py); se usa si la columna aún no existe.
+_EXPR_NOMBRE_NORMALIZADO = "LOWER(TRIM(REPLACE(nombre, '  ', ' ')))"
+_columna_normalizada: bool | None = None
+
+
+def normalizar_nombre(nombre: str) -> str:
+    return (nombre or "").replace("  ", " ").strip().lower()
+
+
+def _plegar(nombre: str) -> str:
+    """
+    Clave sin acentos ni mayúsculas: así compara la collation de la tabla
+    ("Elevación lateral" == "elevacion lateral"), igual que el antiguo
+    LOWER(nombre) = LOWER(:nombre).
+    """
+    return "".join(
+        c for c in unicodedata.normalize("NFKD", normalizar_nombre(nombre))
+        if not unicodedata.combining(c)
+    ).casefold()
+
+
+def _tiene_columna_normalizada(db) -> bool:
+    global _columna_normalizada
+    if _columna_normalizada is None:
+        _columna_normalizada = bool(db.execute(text("""
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = 'ejercicios'
+              AND column_name = 'nombre_normalizado'
+        """)).scalar())
+        if not _columna_normalizada:
+            print("⚠️ ejercicios.nombre_normalizado no existe (scripts/ejercicios_nombres.py create); "
+                  "se busca por expresión sin índice")
+    return _columna_normalizada
+
+
+def _buscar_ids(db, nombres: list[str]) -> Dict[str, int]:
+    """
+    {nombre pedido: id_ejercicio} en una consulta (el id más bajo si hay duplicados).
+
+    El IN y el GROUP BY comparan con la collation de la tabla (sin acentos ni
+    mayúsculas) y devuelven una `clave` guardada que puede diferir en acentos
+    de la pedida; por eso se vuelve a cada nombre pedido con _plegar.
+    """
+    if not nombres:
+        return {}
+    columna = "nombre_normalizado" if _tiene_columna_normalizada(db) else _EXPR_NOMBRE_NORMALIZADO
+    q = text(f"""
+        SELECT {columna} AS clave, MIN(id_ejercicio) AS id_ejercicio
+        FROM ejercicios
+        WHERE {columna} IN :nombres
+        GROUP BY clave
+    """).bindparams(bindparam("nombres", expanding=True))
+    por_clave: Dict[str, int] = {}
+    for f in db.execute(q, {"nombres": nombres}).fetchall():
+        clave = _plegar(f.clave)
+        if clave not in por_clave or f.id_ejercicio < por_clave[clave]:
+            por_clave[clave] = f.id_ejercicio
+    return {n: por_clave[_plegar(n)] for n in nombres if _plegar(n) in por_clave}
+
+
+def resolver_ejercicios(db, ejercicios: list) -> tuple[Dict[str, int], int]:
+    """
+    Resuelve los ids de todos los ejercicios de un plan (objetos con nombre,
+    descripcion, grupo_muscular, dificultad, tipo): una consulta para buscarlos,
+    un INSERT multi-fila para los que falten y otra consulta para sus ids.
+    No confirma la transacción. Devuelve ({nombre_normalizado: id}, creados);
+    ValueError si algún ejercicio queda sin id (nunca se omite en silencio).
+    """
+    unicos: Dict[str, Any] = {}
+    for ej in ejercicios:
+        unicos.setdefault(normalizar_nombre(ej.nombre), ej)
+    unicos.pop("", None)
+
+    ids = _buscar_ids(db, list(unicos))
+    # Un solo INSERT por nombre aunque el plan lo escriba con y sin acentos
+    faltantes: Dict[str, tuple] = {}
+    for clave, ej in unicos.items():
+        if clave not in ids:
+            faltantes.setdefault(_plegar(clave), (clave, ej))
+    faltantes = list(faltantes.values())
+    if not faltantes:
+        return ids, 0
+
+    valores, params = [], {}
+    for i, (_, ej) in enumerate(faltantes):
+        valores.append(f"(:n{i}, :d{i}, :g{i}, :dif{i}, :t{i})")
+        params.update({
+            f"n{i}": ej.nombre.strip(),
+            f"d{i}": ej.descripcion or "",
+            f"g{i}": ej.grupo_muscular or "GENERAL",
+            f"dif{i}": ej.dificultad or "intermedio",
+            f"t{i}": ej.tipo or "general",
+        })
+    db.execute(text(f"""
+        INSERT INTO ejercicios (nombre, descripcion, grupo_muscular, dificultad, tipo)
+        VALUES {", ".join(valores)}
+    """), params)
+
+    ids.update(_buscar_ids(db, [clave for clave in unicos if clave not in ids]))
+    sin_id = [ej.nombre for clave, ej in unicos.items() if clave not in ids]
+    if sin_id:
+        raise ValueError(f"No se pudieron resolver los ejercicios del plan: {sin_id}")
+    print(f"✨ {len(faltantes)} ejercicios creados automáticamente: {[ej.nombre for _, ej in faltantes]}")
+    return ids, len(faltantes)
@@ -0,0 +1,466 @@
+# services/catalogo_entrenadores.py
+"""
+Catálogo en memoria de entrenadores (por proceso) para el listado público
+GET /entrenadores.
+
+Guarda un registro compacto por entrenador, las facetas ya calculadas, el
+orden de ids para cada modo de `sort` y un índice de texto (utils/indice_texto.py)
+sobre nombre, especialidad, ciudad, etiquetas y resumen del perfil, así las
+consultas típicas (texto, filtros, orden y página) se responden sin ir a MySQL.
+
+Actualización (la instantánea nueva se arma fuera del lock; mientras tanto
+se sigue respondiendo con la anterior):
+- invalidar(ids) sube el contador `catalogo_version` ('entrenadores') y
+  guarda esos ids en `catalogo_cambios` con la versión nueva, en la misma
+  transacción (tablas de scripts/catalogo_version.py).
+- Cada worker, al ver una versión nueva (como mucho cada
+  CATALOGO_VERIFICAR_S segundos, en un hilo aparte), lee los ids cambiados
+  desde su versión, relee solo esas filas y los perfiles de esos ids, y los
+  reemplaza en registros y órdenes (se copian y se cambia la referencia).
+  Solo si falta algún cambio (purgado o sin la tabla) recarga todo.
+- El índice de texto no se copia: se actualiza en su lugar bajo su propio
+  lock, así que una búsqueda concurrente puede ver ya el texto nuevo de un
+  entrenador junto a su registro anterior (los ids que no están en la
+  instantánea se descartan).
+"""
+
+import json
+import threading
+import time
+from bisect import bisect_right, insort
+from collections import namedtuple
+from typing import Any, Dict, Iterable, List, Optional
+
+from db import get_connection
+from services.catalogo_ejercicios import CATALOGO_VERIFICAR_S
+from services.perfiles_entrenador import perfiles_entrenador
+from utils.indice_texto import IndiceTexto
+
+MODALIDADES_VALIDAS = ("Online", "Presencial")
+
+# Cambios que se conservan en catalogo_cambios; un worker más atrasado recarga todo
+CAMBIOS_CONSERVADOS = 1000
+
+Entrenador = namedtuple(
+    "Entrenador",
+    "id nombre especialidad rating precio_mensual ciudad pais experiencia "
+    "modalidades etiquetas foto_url whatsapp bio"
+)
+
+# Peso de cada campo en la búsqueda de texto
+PESOS_TEXTO = {"nombre": 3.0, "especialidad": 2.0, "etiquetas": 2.0, "ciudad": 1.0, "bio": 1.0}
+
+_SELECT_ENTRENADORES = """
+    SELECT id_usuario, nombre, apellido, especialidad, rating, precio_mensual,
+           ciudad, pais, experiencia, modalidades, etiquetas, foto_url, whatsapp
+    FROM usuarios
+    WHERE rol = 'entrenador'
+"""
+
+# Clave de orden por modo de `sort` (desempate por id, igual que el SQL)
+CLAVES_ORDEN = {
+    "relevance": lambda e: (-(e.rating * e.experiencia / (e.precio_mensual + 1)), e.id),
+    "rating": lambda e: (-e.rating, e.id),
+    "experience": lambda e: (-e.experiencia, e.id),
+    "price_asc": lambda e: (e.precio_mensual, e.id),
+    "price_desc": lambda e: (-e.precio_mensual, e.id),
+}
+
+
+def como_lista(raw) -> list:
+    """Convierte valor a lista (JSON o separado por comas)"""
+    if raw is None:
+        return []
+    if isinstance(raw, list):
+        return [str(x).strip() for x in raw if str(x).strip()]
+    s = str(raw).strip()
+    if not s:
+        return []
+    try:
+        if s.startswith("[") or s.startswith("{"):
+            val = json.loads(s)
+            if isinstance(val, list):
+                return [str(x).strip() for x in val if str(x).strip()]
+    except Exception:
+        pass
+    return [x.strip() for x in s.split(",") if x.strip()]
+
+
+def _registros(filas) -> Dict[int, Entrenador]:
+    """Registros de las filas con el resumen de su perfil (cargados en lote)."""
+    perfiles = perfiles_entrenador.cargar_lote(f[0] for f in filas)
+    return {
+        int(f[0]): _registro(f, (perfiles.get(int(f[0])) or {}).get("resumen") or None)
+        for f in filas
+    }
+
+
+def _registro(f, bio: Optional[str]) -> Entrenador:
+    return Entrenador(
+        id=int(f[0]),
+        nombre=f"{f[1] or ''} {f[2] or ''}".strip(),
+        especialidad=f[3] or "",
+        rating=float(f[4] or 0),
+        precio_mensual=int(f[5] or 0),
+        ciudad=f[6] or "",
+        pais=f[7],
+        experiencia=int(f[8] or 0),
+        modalidades=tuple(m for m in como_lista(f[9]) if m in MODALIDADES_VALIDAS),
+        etiquetas=tuple(como_lista(f[10])),
+        foto_url=f[11],
+        whatsapp=f[12],
+        bio=bio,
+    )
+
+
+def _indexar(indice: IndiceTexto, e: Entrenador):
+    indice.agregar(e.id, (
+        (e.nombre, PESOS_TEXTO["nombre"]),
+        (e.especialidad, PESOS_TEXTO["especialidad"]),
+        (" ".join(e.etiquetas), PESOS_TEXTO["etiquetas"]),
+        (e.ciudad, PESOS_TEXTO["ciudad"]),
+        (e.bio, PESOS_TEXTO["bio"]),
+    ), rango=e.rating)
+
+
+class _Instantanea:
+    """Estado inmutable del catálogo; se reemplaza entero en cada cambio."""
+
+    def __init__(self, registros: Dict[int, Entrenador], ordenes: Optional[Dict[str, List[int]]] = None,
+                 indice: Optional[IndiceTexto] = None):
+        self.registros = registros
+        if indice is None:
+            indice = IndiceTexto()
+            for e in registros.values():
+                _indexar(indice, e)
+        self.indice = indice
+        self.ordenes = ordenes or {
+            sort: [e.id for e in sorted(registros.values(), key=clave)]
+            for sort, clave in CLAVES_ORDEN.items()
+        }
+        self.por_especialidad: Dict[str, set] = {}
+        self.por_ciudad: Dict[str, set] = {}
+        modalidades = set()
+        for e in registros.values():
+            self.por_especialidad.setdefault(e.especialidad, set()).add(e.id)
+            self.por_ciudad.setdefault(e.ciudad, set()).add(e.id)
+            modalidades.update(e.modalidades)
+
+        precios = [e.precio_mensual for e in registros.values()]
+        self.facetas = {
+            "especialidades": sorted(k for k in self.por_especialidad if k),
+            "ciudades": sorted(k for k in self.por_ciudad if k),
+            "modalidades": sorted(modalidades),
+            "precioMin": min(precios) if precios else None,
+            "precioMax": max(precios) if precios else None,
+            "ratingMax": max((e.rating for e in registros.values()), default=None),
+        }
+
+
+class CatalogoEntrenadores:
+    def __init__(self, verificar_s: float = CATALOGO_VERIFICAR_S):
+        self.verificar_s = verificar_s
+        self._lock = threading.Lock()
+        # Un solo hilo arma instantáneas; los lectores no lo esperan
+        self._lock_carga = threading.Lock()
+        self._inst: Optional[_Instantanea] = None
+        self._version = None
+        self._ultima_verificacion = 0.0
+        self._cargas = 0
+        self._actualizaciones = 0
+
+    # --------------------------------------------------------
+    def _leer_version(self, cur) -> int:
+        cur.execute("SELECT version FROM catalogo_version WHERE nombre = 'entrenadores'")
+        fila = cur.fetchone()
+        return int(fila[0]) if fila else 0
+
+    @staticmethod
+    def _leer_cambios(cur, desde: int, hasta: int) -> Optional[set]:
+        """Ids cambiados entre dos versiones, o None si falta algún cambio."""
+        cur.execute("""
+            SELECT ids FROM catalogo_cambios
+            WHERE nombre = 'entrenadores' AND version > %s AND version <= %s
+        """, (desde, hasta))
+        filas = cur.fetchall()
+        if len(filas) != hasta - desde:
+            return None
+        ids = set()
+        for (raw,) in filas:
+            ids.update(int(i) for i in json.loads(raw))
+        return ids
+
+    def _actualizar(self, esperar: bool):
+        """
+        Pone la instantánea al día con la BD: aplica los cambios registrados
+        desde la versión local o, si no se puede, recarga todo. Se arma fuera
+        de self._lock y solo se cambia la referencia al final.
+        """
+        if not self._lock_carga.acquire(blocking=esperar):
+            return
+        try:
+            with self._lock:
+                inst, version_local = self._inst, self._version
+
+            ids = None
+            cn = get_connection()
+            cur = cn.cursor()
+            try:
+                try:
+                    version = self._leer_version(cur)
+                except Exception as e:
+                    if inst is not None:
+                        raise
+                    print(f"⚠️ No se pudo leer catalogo_version (python scripts/catalogo_version.py create): {e}")
+                    version = None
+
+                if inst is not None and version == version_local:
+                    with self._lock:
+                        self._ultima_verificacion = time.monotonic()
+                    return
+
+                if inst is not None and version_local is not None and version > version_local:
+                    try:
+                        ids = self._leer_cambios(cur, version_local, version)
+                    except Exception as e:
+                        print(f"⚠️ No se pudieron leer los cambios del catálogo, se recarga completo: {e}")
+
+                if ids is not None:
+                    filas = []
+                    if ids:
+                        marcas = ", ".join(["%s"] * len(ids))
+                        cur.execute(f"{_SELECT_ENTRENADORES} AND id_usuario IN ({marcas})", tuple(ids))
+                        filas = cur.fetchall()
+                else:
+                    cur.execute(_SELECT_ENTRENADORES)
+                    filas = cur.fetchall()
+            finally:
+                cur.close()
+                cn.close()
+
+            if ids is not None:
+                nueva = self._aplicar(inst, ids, _registros(filas))
+            else:
+                nueva = _Instantanea(_registros(filas))
+
+            with self._lock:
+                self._inst = nueva
+                self._version = version
+                self._ultima_verificacion = time.monotonic()
+                if ids is not None:
+                    self._actualizaciones += 1
+                else:
+                    self._cargas += 1
+            if ids is None:
+                print(f"🏋️ Catálogo de entrenadores cargado: {len(filas)} entrenadores (versión {version})")
+        finally:
+            self._lock_carga.release()
+
+    def _actualizar_en_segundo_plano(self):
+        try:
+            self._actualizar(esperar=False)
+        except Exception as e:
+            print(f"⚠️ No se pudo actualizar el catálogo de entrenadores: {e}")
+
+    def _asegurar_vigente(self) -> _Instantanea:
+        inst = self._inst
+        if inst is None:
+            # Primera carga: no hay instantánea que servir mientras tanto
+            self._actualizar(esperar=True)
+            return self._inst
+
+        with self._lock:
+            vencida = time.monotonic() - self._ultima_verificacion >= self.verificar_s
+            if vencida:
+                # Que no la vuelvan a lanzar los demás pedidos del mismo intervalo
+                self._ultima_verificacion = time.monotonic()
+        if vencida:
+            threading.Thread(target=self._actualizar_en_segundo_plano, daemon=True).start()
+        return inst
+
+    # --------------------------------------------------------
+    def buscar(
+            self,
+            q: Optional[str] = None,
+            especialidad: Optional[str] = None,
+            modalidad: Optional[str] = None,
+            rating_min: Optional[float] = None,
+            precio_max: Optional[int] = None,
+            ciudad: Optional[str] = None,
+            sort: str = "relevance",
+            offset: int = 0,
+            limite: int = 12,
+            despues: Optional[tuple] = None,
+    ) -> tuple[List[Entrenador], int, Optional[tuple]]:
+        """
+        Página de entrenadores filtrada y ordenada, el total que cumple los
+        filtros y la clave de orden del último si quedan más (cursor).
+        Con `despues` (clave devuelta antes) la página empieza tras ese
+        entrenador y se ignora `offset`.
+        """
+        inst = self._asegurar_vigente()
+        orden = inst.ordenes.get(sort) or inst.ordenes["relevance"]
+        registros = inst.registros
+        clave = CLAVES_ORDEN.get(sort, CLAVES_ORDEN["relevance"])
+
+        texto = (q or "").strip().lower()
+        if not (texto or especialidad or modalidad or rating_min is not None
+                or precio_max is not None or ciudad):
+            if despues is not None:
+                offset = bisect_right(orden, self._validar_clave(despues, 2), key=lambda i: clave(registros[i]))
+            ids = orden[offset:offset + limite]
+            siguiente = clave(registros[ids[-1]]) if ids and offset + limite < len(orden) else None
+            return [registros[i] for i in ids], len(orden), siguiente
+
+        puntajes = None
+        if texto:
+            puntajes = inst.indice.buscar(texto)
+            if sort == "relevance":
+                # Con texto, "relevance" ordena primero por el puntaje de la búsqueda
+                orden_base = clave
+                clave = lambda e: (-puntajes[e.id],) + orden_base(e)  # noqa: E731
+        if despues is not None:
+            despues = self._validar_clave(despues, 3 if puntajes is not None and sort == "relevance" else 2)
+            offset = 0
+
+        # Con texto o igualdad por especialidad/ciudad se parte del conjunto más chico
+        candidatos = set(puntajes) if puntajes is not None else None
+        for indice, valor in ((inst.por_especialidad, especialidad), (inst.por_ciudad, ciudad)):
+            if valor:
+                ids = indice.get(valor, set())
+                candidatos = ids if candidatos is None else candidatos & ids
+        if candidatos is not None and (puntajes is not None or len(candidatos) * 8 < len(orden)):
+            recorrido = sorted((registros[i] for i in candidatos if i in registros), key=clave)
+        else:
+            recorrido = (registros[i] for i in orden)
+
+        pagina, total, restantes = [], 0, 0
+        for e in recorrido:
+            if especialidad and e.especialidad != especialidad:
+                continue
+            if ciudad and e.ciudad != ciudad:
+                continue
+            if modalidad and modalidad not in e.modalidades:
+                continue
+            if rating_min is not None and e.rating < rating_min:
+                continue
+            if precio_max is not None and e.precio_mensual > precio_max:
+                continue
+            total += 1
+            if despues is not None:
+                if clave(e) <= despues:
+                    continue
+                restantes += 1
+                if restantes <= limite:
+                    pagina.append(e)
+            elif offset < total <= offset + limite:
+                pagina.append(e)
+
+        quedan = restantes > limite if despues is not None else total > offset + limite
+        return pagina, total, (clave(pagina[-1]) if pagina and quedan else None)
+
+    @staticmethod
+    def _validar_clave(despues, largo: int) -> tuple:
+        clave = tuple(despues)
+        if len(clave) != largo or not all(isinstance(v, (int, float)) for v in clave):
+            raise ValueError("Cursor inválido para este orden")
+        return clave
+
+    def sugerir(self, q: str, limite: int = 8) -> List[Entrenador]:
+        """Mejores coincidencias de texto para búsqueda mientras se escribe (último término como prefijo)."""
+        inst = self._asegurar_vigente()
+        registros = inst.registros
+        return [registros[i] for i, _ in inst.indice.sugerir(q, limite) if i in registros]
+
+    def facetas(self) -> Dict[str, Any]:
+        return dict(self._asegurar_vigente().facetas)
+
+    def obtener(self, id_entrenador: int) -> Optional[Entrenador]:
+        return self._asegurar_vigente().registros.get(id_entrenador)
+
+    # --------------------------------------------------------
+    def invalidar(self, ids: Iterable[int]):
+        """
+        Llamar tras confirmar cambios de esos usuarios (perfil, avatar, reseñas):
+        registra los ids con una versión nueva (para todos los workers) y
+        aplica el cambio en el catálogo de este proceso.
+        """
+        ids = {int(i) for i in ids if i}
+        if not ids:
+            return
+        try:
+            cn = get_connection()
+            cur = cn.cursor()
+            try:
+                cur.execute("""
+                    INSERT INTO catalogo_version (nombre, version) VALUES ('entrenadores', 1)
+                    ON DUPLICATE KEY UPDATE version = version + 1
+                """)
+                # La fila de versión queda bloqueada hasta el commit: versiones y cambios van en orden
+                version = self._leer_version(cur)
+                try:
+                    cur.execute("""
+                        INSERT INTO catalogo_cambios (nombre, version, ids) VALUES ('entrenadores', %s, %s)
+                    """, (version, json.dumps(sorted(ids))))
+                    cur.execute("""
+                        DELETE FROM catalogo_cambios
+                        WHERE nombre = 'entrenadores' AND version <= %s
+                    """, (version - CAMBIOS_CONSERVADOS,))
+                except Exception as e:
+                    # Sin el registro los demás workers recargan todo, pero ven el cambio igual
+                    print(f"⚠️ No se pudo registrar el cambio del catálogo de entrenadores: {e}")
+                cn.commit()
+            finally:
+                cur.close()
+                cn.close()
+        except Exception as e:
+            print(f"⚠️ No se pudo actualizar el catálogo de entrenadores: {e}")
+            with self._lock:
+                self._ultima_verificacion = 0.0
+            return
+
+        if self._inst is None:
+            return
+        try:
+            self._actualizar(esperar=True)
+        except Exception as e:
+            print(f"⚠️ No se pudo actualizar el catálogo de entrenadores: {e}")
+            with self._lock:
+                self._ultima_verificacion = 0.0
+
+    @staticmethod
+    def _aplicar(inst: _Instantanea, ids: set, nuevos: Dict[int, Entrenador]) -> _Instantanea:
+        """
+        Nueva instantánea con los registros de `ids` reemplazados (o quitados si
+        ya no son entrenadores). El índice de texto se comparte y se modifica en su lugar.
+        """
+        registros = dict(inst.registros)
+        ordenes = {sort: [i for i in lista if i not in ids] for sort, lista in inst.ordenes.items()}
+        for i in ids:
+            registros.pop(i, None)
+            if i not in nuevos:
+                inst.indice.quitar(i)
+        registros.update(nuevos)
+        for e in nuevos.values():
+            _indexar(inst.indice, e)
+
+        for sort, lista in ordenes.items():
+            clave = CLAVES_ORDEN[sort]
+            for e in nuevos.values():
+                insort(lista, e.id, key=lambda i: clave(registros[i]))
+        return _Instantanea(registros, ordenes, inst.indice)
+
+    def estadisticas(self) -> dict:
+        inst = self._inst
+        return {
+            "cargado": inst is not None,
+            "entrenadores": len(inst.registros) if inst else 0,
+            "indice_texto": inst.indice.estadisticas() if inst else None,
+            "version": self._version,
+            "cargas": self._cargas,
+            "actualizaciones": self._actualizaciones,
+            "verificar_s": self.verificar_s,
+        }
+
+
+catalogo_entrenadores = CatalogoEntrenadores()
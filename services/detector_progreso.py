@@ -0,0 +1,230 @@
+# services/detector_progreso.py
+"""
+Detector de estancamientos y récords personales.
+
+Las sesiones recientes de uno o varios clientes se leen en una sola consulta y
+se evalúan con NumPy agrupadas por (cliente, ejercicio):
+- racha final de sesiones con el mismo peso
+- pendiente del peso (kg/semana)
+- deriva del RPE (puntos/semana): mismo peso con RPE subiendo = fatiga
+
+Las alertas nuevas se escriben con un único INSERT multi-fila.
+"""
+
+import time
+
+import numpy as np
+
+from services.analitica_progreso import SEGUNDOS_SEMANA
+
+DIAS_ANALISIS = 30
+DIAS_RECORD = 7
+DIAS_DEDUPLICACION = 7
+
+SESIONES_ESTANCAMIENTO = 3       # racha mínima con el mismo peso
+PENDIENTE_MAXIMA_KG = 0.25       # kg/semana en la ventana: por debajo, la racha es prioritaria
+DERIVA_RPE_FATIGA = 0.5          # puntos de RPE/semana que marcan fatiga
+INCREMENTO_SUGERIDO = 1.05
+
+_INSERTAR_ALERTA_SQL = """
+    INSERT INTO alertas_progresion (
+        id_cliente, id_ejercicio, tipo_alerta, prioridad,
+        titulo, mensaje, recomendacion,
+        nombre_ejercicio, peso_actual, peso_sugerido,
+        sesiones_sin_progreso, estado
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'pendiente')
+"""
+
+
+def _marcadores(ids: list[int]) -> str:
+    return ", ".join(["%s"] * len(ids))
+
+
+# ============================================================
+# 🔹 CARGA
+# ============================================================
+
+def _cargar_sesiones(cur, ids_clientes: list[int], dias: int) -> tuple[dict[str, np.ndarray], dict[int, str]]:
+    cur.execute(f"""
+        SELECT pe.id_cliente, pe.id_ejercicio, UNIX_TIMESTAMP(pe.fecha_sesion), pe.peso_kg, pe.rpe,
+               pe.es_record_personal, e.nombre
+        FROM progreso_ejercicios pe
+        INNER JOIN ejercicios e ON e.id_ejercicio = pe.id_ejercicio
+        WHERE pe.id_cliente IN ({_marcadores(ids_clientes)})
+          AND pe.peso_kg IS NOT NULL
+          AND pe.fecha_sesion >= DATE_SUB(NOW(), INTERVAL %s DAY)
+        ORDER BY pe.id_cliente, pe.id_ejercicio, pe.fecha_sesion, pe.id_progreso
+    """, (*ids_clientes, dias))
+    filas = cur.fetchall()
+
+    nombres = {f[1]: f[6] for f in filas}
+    sesiones = {
+        "cliente": np.array([f[0] for f in filas], dtype=np.int64),
+        "ejercicio": np.array([f[1] for f in filas], dtype=np.int64),
+        "t": np.array([float(f[2]) for f in filas], dtype=np.float64),
+        "peso": np.array([float(f[3]) for f in filas], dtype=np.float64),
+        "rpe": np.array([np.nan if f[4] is None else f[4] for f in filas], dtype=np.float64),
+        "record": np.array([bool(f[5]) for f in filas], dtype=bool),
+    }
+    return sesiones, nombres
+
+
+def _alertas_existentes(cur, ids_clientes: list[int]) -> set[tuple[int, int, str]]:
+    """Pares que ya tienen una alerta equivalente reciente (una sola consulta)."""
+    cur.execute(f"""
+        SELECT DISTINCT id_cliente, id_ejercicio, tipo_alerta
+        FROM alertas_progresion
+        WHERE id_cliente IN ({_marcadores(ids_clientes)})
+          AND fecha_generacion >= DATE_SUB(NOW(), INTERVAL %s DAY)
+          AND (
+                (tipo_alerta = 'estancamiento' AND estado = 'pendiente')
+             OR tipo_alerta = 'record_personal'
+          )
+    """, (*ids_clientes, DIAS_DEDUPLICACION))
+    return {(f[0], f[1], f[2]) for f in cur.fetchall()}
+
+
+# ============================================================
+# 🔹 EVALUACIÓN VECTORIZADA
+# ============================================================
+
+def _pendiente_por_grupo(grupo: np.ndarray, x: np.ndarray, y: np.ndarray, n_grupos: int) -> np.ndarray:
+    """Pendiente de mínimos cuadrados de cada grupo a partir de sumas agrupadas."""
+    n = np.bincount(grupo, minlength=n_grupos).astype(np.float64)
+    sx = np.bincount(grupo, weights=x, minlength=n_grupos)
+    sy = np.bincount(grupo, weights=y, minlength=n_grupos)
+    sxx = np.bincount(grupo, weights=x * x, minlength=n_grupos)
+    sxy = np.bincount(grupo, weights=x * y, minlength=n_grupos)
+
+    den = n * sxx - sx * sx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pendiente = np.where(den > 1e-12, (n * sxy - sx * sy) / den, 0.0)
+    return pendiente
+
+
+def evaluar(sesiones: dict[str, np.ndarray], dias_record: int = DIAS_RECORD,
+            ahora: float | None = None) -> dict[str, np.ndarray]:
+    """
+    Métricas por (cliente, ejercicio). Las sesiones deben venir ordenadas por
+    cliente, ejercicio y fecha. Devuelve arrays alineados por grupo.
+    """
+    total = sesiones["t"].size
+    if total == 0:
+        return {"n": 0}
+
+    cliente, ejercicio, peso = sesiones["cliente"], sesiones["ejercicio"], sesiones["peso"]
+
+    # Inicio de cada grupo y su índice por sesión
+    inicio = np.ones(total, dtype=bool)
+    inicio[1:] = (cliente[1:] != cliente[:-1]) | (ejercicio[1:] != ejercicio[:-1])
+    grupo = np.cumsum(inicio) - 1
+    n_grupos = int(grupo[-1]) + 1
+    ultimo = np.append(np.flatnonzero(inicio)[1:] - 1, total - 1)
+
+    # Rachas de peso igual: una racha nueva empieza con el grupo o al cambiar el peso
+    cambio = inicio.copy()
+    cambio[1:] |= ~np.isclose(peso[1:], peso[:-1])
+    inicio_racha = np.maximum.accumulate(np.where(cambio, np.arange(total), 0))
+    racha = np.arange(total) - inicio_racha + 1
+
+    # Pendientes en semanas desde la primera sesión global
+    semanas = (sesiones["t"] - sesiones["t"].min()) / SEGUNDOS_SEMANA
+    pendiente_peso = _pendiente_por_grupo(grupo, semanas, peso, n_grupos)
+
+    con_rpe = ~np.isnan(sesiones["rpe"])
+    deriva_rpe = np.zeros(n_grupos)
+    if con_rpe.any():
+        deriva_rpe = _pendiente_por_grupo(
+            grupo[con_rpe], semanas[con_rpe], sesiones["rpe"][con_rpe], n_grupos
+        )
+
+    # Récords recientes: mayor peso marcado como récord en los últimos días
+    if ahora is None:
+        ahora = time.time()
+    reciente = sesiones["record"] & (sesiones["t"] >= ahora - dias_record * 86400)
+    peso_record = np.full(n_grupos, -np.inf)
+    np.maximum.at(peso_record, grupo[reciente], peso[reciente])
+
+    return {
+        "n": n_grupos,
+        "cliente": cliente[ultimo],
+        "ejercicio": ejercicio[ultimo],
+        "peso_actual": peso[ultimo],
+        "racha": racha[ultimo],
+        "pendiente_kg_semana": pendiente_peso,
+        "deriva_rpe_semana": deriva_rpe,
+        "peso_record": peso_record,
+    }
+
+
+# ============================================================
+# 🔹 ALERTAS
+# ============================================================
+
+def _filas_alertas(metricas: dict, nombres: dict[int, str], existentes: set) -> list[tuple]:
+    filas = []
+    for i in range(metricas["n"]):
+        id_cliente = int(metricas["cliente"][i])
+        id_ejercicio = int(metricas["ejercicio"][i])
+        nombre = nombres.get(id_ejercicio, f"Ejercicio {id_ejercicio}")
+        peso_actual = round(float(metricas["peso_actual"][i]), 2)
+        racha = int(metricas["racha"][i])
+
+        if racha >= SESIONES_ESTANCAMIENTO and (id_cliente, id_ejercicio, "estancamiento") not in existentes:
+            fatiga = metricas["deriva_rpe_semana"][i] >= DERIVA_RPE_FATIGA
+            sin_tendencia = metricas["pendiente_kg_semana"][i] <= PENDIENTE_MAXIMA_KG
+            peso_sugerido = round(peso_actual * INCREMENTO_SUGERIDO, 2)
+            if fatiga:
+                recomendacion = (
+                    "Tu esfuerzo (RPE) está subiendo con el mismo peso: "
+                    "considera una semana de descarga antes de aumentar"
+                )
+            else:
+                recomendacion = f"Intenta aumentar el peso a {peso_sugerido:.1f}kg o aumentar las repeticiones"
+            filas.append((
+                id_cliente, id_ejercicio, "estancamiento",
+                "alta" if fatiga or (sin_tendencia and racha >= SESIONES_ESTANCAMIENTO * 2) else "media",
+                "Estancamiento detectado",
+                f"No has progresado en {nombre} en las últimas {racha} sesiones",
+                recomendacion,
+                nombre, peso_actual, peso_sugerido, racha,
+            ))
+
+        peso_record = metricas["peso_record"][i]
+        if np.isfinite(peso_record) and (id_cliente, id_ejercicio, "record_personal") not in existentes:
+            peso_record = round(float(peso_record), 2)
+            filas.append((
+                id_cliente, id_ejercicio, "record_personal", "baja",
+                "🏆 ¡Nuevo Record Personal!",
+                f"Has establecido un nuevo récord en {nombre} con {peso_record}kg",
+                "Sigue así, estás haciendo un excelente progreso",
+                nombre, peso_record, None, None,
+            ))
+    return filas
+
+
+def analizar_clientes(cur, ids_clientes: list[int], dias: int = DIAS_ANALISIS) -> dict[int, int]:
+    """
+    Analiza las sesiones de los últimos `dias` de todos los clientes indicados
+    e inserta las alertas nuevas. No confirma la transacción.
+
+    Devuelve {id_cliente: alertas_generadas}.
+    """
+    ids_clientes = sorted(set(ids_clientes))
+    resultado = {id_cliente: 0 for id_cliente in ids_clientes}
+    if not ids_clientes:
+        return resultado
+
+    sesiones, nombres = _cargar_sesiones(cur, ids_clientes, dias)
+    cur.execute("SELECT UNIX_TIMESTAMP(NOW())")
+    ahora = float(cur.fetchone()[0])
+    metricas = evaluar(sesiones, ahora=ahora)
+    if metricas["n"] == 0:
+        return resultado
+
+    filas = _filas_alertas(metricas, nombres, _alertas_existentes(cur, ids_clientes))
+    if filas:
+        cur.executemany(_INSERTAR_ALERTA_SQL, filas)
+        for fila in filas:
+            resultado[fila[0]] += 1
+    return resultado
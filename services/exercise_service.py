@@ -2,10 +2,13 @@
 from sqlalchemy.orm import Session
 from models.exercise import Ejercicio
 from schemas.exercise import EjercicioCreate
+from services.catalogo_ejercicios import catalogo_ejercicios
 
 def create_exercise(db: Session, data: EjercicioCreate):
     e = Ejercicio(**data.model_dump())
-    db.add(e); db.commit(); db.refresh(e); return e
+    db.add(e); db.commit(); db.refresh(e)
+    catalogo_ejercicios.invalidar()
+    return e
 
 def list_exercises(db: Session):
     return db.query(Ejercicio).all()
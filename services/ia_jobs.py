@@ -0,0 +1,29 @@
+# services/ia_jobs.py
+"""
+Cola de generación de rutinas con IA (modo asíncrono de /api/ia/generar-rutina).
+
+Configuración:
+    IA_WORKERS      hilos que llaman al proveedor y persisten la rutina (default 4)
+    IA_COLA_MAX     trabajos en espera antes de responder 503 (default 100)
+    IA_RETENCION_S  segundos que se conserva un trabajo terminado (default 900)
+"""
+
+import os
+
+from utils.cola_trabajos import ColaTrabajos
+
+IA_WORKERS = int(os.getenv("IA_WORKERS", "4"))
+IA_COLA_MAX = int(os.getenv("IA_COLA_MAX", "100"))
+IA_RETENCION_S = int(os.getenv("IA_RETENCION_S", "900"))
+
+cola_ia = ColaTrabajos(
+    "ia_rutinas",
+    workers=IA_WORKERS,
+    capacidad=IA_COLA_MAX,
+    retencion_s=IA_RETENCION_S,
+)
+
+
+def detener_cola_ia():
+    cola_ia.detener(esperar=False)
+    print("🛑 Cola de IA detenida")
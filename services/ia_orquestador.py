@@ -0,0 +1,261 @@
+# services/ia_orquestador.py
+"""
+Orquestador de proveedores de IA (Gemini / OpenAI / Grok).
+
+- Circuit breaker por proveedor: un error de cuota lo abre al instante; los
+  timeouts y demás errores lo abren tras `umbral_fallos` seguidos. Abierto, el
+  proveedor se salta durante `enfriamiento_s`; después se deja pasar una
+  llamada de prueba (semiabierto).
+- Hedging opcional: si el primer proveedor no respondió tras `hedge_s`, se
+  lanza la misma petición al siguiente y gana la primera respuesta válida.
+- Failover: si un proveedor falla, se lanza el siguiente disponible.
+- Métricas por proveedor (latencia p50/p95, tasa de error, estado del breaker).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Optional
+
+CERRADO = "cerrado"
+ABIERTO = "abierto"
+SEMIABIERTO = "semiabierto"
+
+
+class SinProveedorDisponible(Exception):
+    """Ningún proveedor devolvió un plan válido (o todos estaban abiertos)."""
+
+    def __init__(self, errores: dict[str, str]):
+        self.errores = errores
+        detalle = "; ".join(f"{p}: {e}" for p, e in errores.items()) or "sin proveedores configurados"
+        super().__init__(f"Sin proveedor de IA disponible ({detalle})")
+
+
+def _es_timeout(err: Exception) -> bool:
+    m = f"{type(err).__name__}: {err}".lower()
+    return "timeout" in m or "timed out" in m or "deadline" in m
+
+
+def _percentil(valores, p: float) -> Optional[float]:
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    idx = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return round(ordenados[idx], 1)
+
+
+# ============================================================
+# CIRCUIT BREAKER + MÉTRICAS POR PROVEEDOR
+# ============================================================
+
+class EstadoProveedor:
+    def __init__(self, nombre: str, umbral_fallos: int, enfriamiento_s: float):
+        self.nombre = nombre
+        self.umbral_fallos = umbral_fallos
+        self.enfriamiento_s = enfriamiento_s
+        self._lock = threading.Lock()
+
+        self.estado = CERRADO
+        self.fallos_seguidos = 0
+        self.abierto_hasta = 0.0
+        self._prueba_en_curso = False
+
+        self.llamadas = 0
+        self.exitos = 0
+        self.errores = 0
+        self.errores_cuota = 0
+        self.timeouts = 0
+        self.descartadas = 0  # respuestas que llegaron tras ganar otro proveedor o vencer el plazo
+        self.ultimo_error: Optional[str] = None
+        self._latencias: deque[float] = deque(maxlen=200)
+
+    def permitir(self) -> bool:
+        with self._lock:
+            if self.estado == CERRADO:
+                return True
+            if self.estado == ABIERTO and time.time() >= self.abierto_hasta:
+                self.estado = SEMIABIERTO
+                self._prueba_en_curso = False
+            if self.estado == SEMIABIERTO and not self._prueba_en_curso:
+                self._prueba_en_curso = True
+                return True
+            return False
+
+    def registrar_inicio(self):
+        with self._lock:
+            self.llamadas += 1
+
+    def registrar_descartada(self):
+        with self._lock:
+            self.descartadas += 1
+
+    def registrar_exito(self, latencia_ms: float):
+        with self._lock:
+            self.exitos += 1
+            self._latencias.append(latencia_ms)
+            self.fallos_seguidos = 0
+            self.estado = CERRADO
+            self._prueba_en_curso = False
+
+    def registrar_error(self, err: Exception, cuota: bool, timeout: bool):
+        with self._lock:
+            self.errores += 1
+            self.ultimo_error = str(err)[:300]
+            self.fallos_seguidos += 1
+            if cuota:
+                self.errores_cuota += 1
+            if timeout:
+                self.timeouts += 1
+            if cuota or self.estado == SEMIABIERTO or self.fallos_seguidos >= self.umbral_fallos:
+                self.estado = ABIERTO
+                self.abierto_hasta = time.time() + self.enfriamiento_s
+                self._prueba_en_curso = False
+                print(f"⚠️ Circuito de {self.nombre} abierto {self.enfriamiento_s:.0f}s ({self.ultimo_error})")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            latencias = list(self._latencias)
+            terminadas = self.exitos + self.errores
+            return {
+                "circuito": self.estado,
+                "reabre_en_s": max(0, round(self.abierto_hasta - time.time(), 1)) if self.estado == ABIERTO else 0,
+                "llamadas": self.llamadas,
+                "exitos": self.exitos,
+                "errores": self.errores,
+                "errores_cuota": self.errores_cuota,
+                "timeouts": self.timeouts,
+                "descartadas": self.descartadas,
+                "tasa_error": round(self.errores / terminadas, 3) if terminadas else 0.0,
+                "latencia_ms": {"p50": _percentil(latencias, 50), "p95": _percentil(latencias, 95)},
+                "ultimo_error": self.ultimo_error,
+            }
+
+
+# ============================================================
+# ORQUESTADOR
+# ============================================================
+
+class OrquestadorIA:
+    def __init__(
+            self,
+            proveedores: dict[str, Callable[[], bool]],
+            es_cuota: Callable[[Exception], bool],
+            umbral_fallos: int = 3,
+            enfriamiento_s: float = 120,
+            timeout_s: float = 120,
+            max_workers: int = 8,
+    ):
+        """`proveedores`: nombre -> función que indica si está configurado."""
+        self.configurado = dict(proveedores)
+        self.es_cuota = es_cuota
+        self.timeout_s = timeout_s
+        self.umbral_fallos = umbral_fallos
+        self.enfriamiento_s = enfriamiento_s
+        self.estados = {
+            nombre: EstadoProveedor(nombre, umbral_fallos, enfriamiento_s)
+            for nombre in proveedores
+        }
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ia_proveedor")
+
+    def registrar(self, nombre: str, configurado: Callable[[], bool]):
+        """Agrega un proveedor (p. ej. el simulado) con su propio circuit breaker."""
+        self.configurado[nombre] = configurado
+        if nombre not in self.estados:
+            self.estados[nombre] = EstadoProveedor(nombre, self.umbral_fallos, self.enfriamiento_s)
+
+    def candidatos(self, orden: list[str]) -> list[str]:
+        return [p for p in orden if p in self.estados and self.configurado[p]()]
+
+    def _llamar(self, nombre: str, llamada: Callable[[str], Any], ctx: dict) -> Any:
+        estado = self.estados[nombre]
+        estado.registrar_inicio()
+        t0 = time.perf_counter()
+        try:
+            resultado = llamada(nombre)
+        except Exception as e:
+            if not ctx.get(nombre):  # no contar dos veces si ya venció el plazo
+                estado.registrar_error(e, self.es_cuota(e), _es_timeout(e))
+            raise
+        if ctx.get(nombre):
+            # generar() ya la contó como timeout y abrió el circuito: una respuesta
+            # tardía no lo cierra ni entra en las latencias
+            estado.registrar_descartada()
+            return resultado
+        if ctx.get("ganador") and ctx["ganador"] != nombre:
+            estado.registrar_descartada()
+        estado.registrar_exito((time.perf_counter() - t0) * 1000)
+        return resultado
+
+    def generar(self, orden: list[str], llamada: Callable[[str], Any], hedge_s: float = 0) -> tuple[str, Any]:
+        """
+        Ejecuta `llamada(proveedor)` según `orden` y devuelve (proveedor, resultado)
+        con el primer resultado válido. `llamada` debe lanzar excepción si la
+        respuesta no es válida. Con `hedge_s > 0` lanza el siguiente proveedor
+        si el actual tarda más de ese tiempo.
+        """
+        pendientes_orden = [p for p in self.candidatos(orden)]
+        errores: dict[str, str] = {}
+        ctx: dict[str, Any] = {}
+        en_vuelo: dict[Future, str] = {}
+        limite = time.monotonic() + self.timeout_s
+
+        def _lanzar_siguiente() -> bool:
+            while pendientes_orden:
+                nombre = pendientes_orden.pop(0)
+                if self.estados[nombre].permitir():
+                    en_vuelo[self._executor.submit(self._llamar, nombre, llamada, ctx)] = nombre
+                    return True
+                errores[nombre] = "circuito abierto"
+            return False
+
+        if not _lanzar_siguiente():
+            raise SinProveedorDisponible(errores)
+
+        while en_vuelo:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            espera = min(restante, hedge_s) if hedge_s > 0 and pendientes_orden else restante
+            hechos, _ = wait(list(en_vuelo), timeout=espera, return_when=FIRST_COMPLETED)
+
+            if not hechos:
+                # Hedging: el proveedor actual tarda demasiado, lanzar otro en paralelo
+                if hedge_s > 0 and _lanzar_siguiente():
+                    print(f"⏱️ Hedging IA: {list(en_vuelo.values())} en paralelo")
+                continue
+
+            for futuro in hechos:
+                nombre = en_vuelo.pop(futuro)
+                try:
+                    resultado = futuro.result()
+                except Exception as e:
+                    errores[nombre] = str(e)[:200]
+                    print(f"⚠️ Proveedor {nombre} falló: {errores[nombre]}")
+                    continue
+                ctx["ganador"] = nombre
+                return nombre, resultado
+
+            # Todos los terminados fallaron: failover al siguiente
+            if not en_vuelo:
+                _lanzar_siguiente()
+
+        # Plazo vencido: los que siguen en vuelo cuentan como timeout
+        for futuro, nombre in en_vuelo.items():
+            ctx[nombre] = True
+            err = TimeoutError(f"sin respuesta en {self.timeout_s:.0f}s")
+            self.estados[nombre].registrar_error(err, cuota=False, timeout=True)
+            errores[nombre] = str(err)
+        raise SinProveedorDisponible(errores)
+
+    def registrar_error(self, nombre: str, err: Exception):
+        """Para llamadas hechas fuera de generar() (p. ej. el streaming)."""
+        self.estados[nombre].registrar_error(err, self.es_cuota(err), _es_timeout(err))
+
+    def estado(self) -> dict:
+        return {
+            nombre: {"configurado": bool(self.configurado[nombre]()), **est.snapshot()}
+            for nombre, est in self.estados.items()
+        }
@@ -0,0 +1,156 @@
+# services/ia_plan_cache.py
+"""
+Caché de planes generados por IA, direccionada por contenido.
+
+La clave es el SHA-256 del prompt canonicalizado (espacios colapsados,
+minúsculas) más el proveedor pedido, así que solicitudes con los mismos
+días / nivel / objetivos comparten plan aunque el perfil de salud difiera en
+datos que no entran en el prompt. Se guarda el JSON crudo del proveedor: el
+filtrado de seguridad por usuario se vuelve a aplicar en cada acierto.
+
+Niveles:
+1. LRU en memoria con TTL (por proceso)
+2. Tabla `ia_planes_cache` en la BD (compartida entre workers), con expiración
+   (se crea con `python scripts/ia_plan_cache.py create`; sin ella solo se
+   usa el nivel en memoria)
+
+Configuración:
+    IA_PLAN_CACHE_TTL_S    vigencia de un plan (default 7 días, 0 desactiva la caché)
+    IA_PLAN_CACHE_MAXSIZE  entradas del nivel en memoria (default 500)
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import text
+
+from config.database import SessionLocal
+from utils.cache import CacheTTL
+
+IA_PLAN_CACHE_TTL_S = int(os.getenv("IA_PLAN_CACHE_TTL_S", str(7 * 24 * 3600)))
+IA_PLAN_CACHE_MAXSIZE = int(os.getenv("IA_PLAN_CACHE_MAXSIZE", "500"))
+
+# Subir si cambia el formato del plan o el prompt de forma incompatible
+VERSION_CLAVE = 1
+
+def clave_plan(prompt: str, proveedor: str) -> str:
+    canonico = re.sub(r"\s+", " ", prompt).strip().lower()
+    crudo = json.dumps({"v": VERSION_CLAVE, "proveedor": proveedor, "prompt": canonico}, sort_keys=True)
+    return hashlib.sha256(crudo.encode("utf-8")).hexdigest()
+
+
+class CachePlanes:
+    def __init__(self, ttl_s: int, maxsize: int):
+        self.ttl_s = ttl_s
+        self.habilitada = ttl_s > 0
+        self._memoria = CacheTTL("ia_planes", maxsize=maxsize, ttl=max(ttl_s, 1))
+        self._lock = threading.Lock()
+        self._hits_bd = 0
+        self._misses = 0
+        self._escrituras = 0
+        self._errores_bd = 0
+
+    def obtener(self, clave: str) -> Optional[dict[str, Any]]:
+        """{"proveedor", "plan", "nivel": "memoria"|"bd"} o None."""
+        if not self.habilitada:
+            return None
+
+        entrada = self._memoria.get(clave)
+        if entrada is not None:
+            return {**entrada, "nivel": "memoria"}
+
+        db = SessionLocal()
+        try:
+            fila = db.execute(text("""
+                SELECT proveedor, plan FROM ia_planes_cache
+                WHERE clave = :clave AND expira_en > NOW()
+            """), {"clave": clave}).fetchone()
+            if not fila:
+                with self._lock:
+                    self._misses += 1
+                return None
+
+            db.execute(text("UPDATE ia_planes_cache SET hits = hits + 1 WHERE clave = :clave"), {"clave": clave})
+            db.commit()
+            entrada = {"proveedor": fila.proveedor, "plan": json.loads(fila.plan)}
+            self._memoria.set(clave, entrada)
+            with self._lock:
+                self._hits_bd += 1
+            return {**entrada, "nivel": "bd"}
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                self._errores_bd += 1
+                self._misses += 1
+            print(f"⚠️ Caché de planes (BD) no disponible: {e}")
+            return None
+        finally:
+            db.close()
+
+    def guardar(self, clave: str, proveedor: str, plan: dict[str, Any]):
+        if not self.habilitada:
+            return
+        self._memoria.set(clave, {"proveedor": proveedor, "plan": plan})
+
+        ahora = datetime.now()
+        db = SessionLocal()
+        try:
+            db.execute(text("""
+                INSERT INTO ia_planes_cache (clave, proveedor, plan, creado_en, expira_en)
+                VALUES (:clave, :proveedor, :plan, :creado, :expira)
+                ON DUPLICATE KEY UPDATE
+                    proveedor = VALUES(proveedor),
+                    plan = VALUES(plan),
+                    creado_en = VALUES(creado_en),
+                    expira_en = VALUES(expira_en)
+            """), {
+                "clave": clave,
+                "proveedor": proveedor,
+                "plan": json.dumps(plan, ensure_ascii=False),
+                "creado": ahora,
+                "expira": ahora + timedelta(seconds=self.ttl_s),
+            })
+            db.commit()
+            with self._lock:
+                self._escrituras += 1
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                self._errores_bd += 1
+            print(f"⚠️ No se pudo guardar el plan en la caché (BD): {e}")
+        finally:
+            db.close()
+
+    def purgar_expirados(self) -> int:
+        db = SessionLocal()
+        try:
+            res = db.execute(text("DELETE FROM ia_planes_cache WHERE expira_en <= NOW()"))
+            db.commit()
+            return res.rowcount or 0
+        finally:
+            db.close()
+
+    def estadisticas(self) -> dict:
+        memoria = self._memoria.estadisticas()
+        with self._lock:
+            hits = memoria["hits"] + self._hits_bd
+            consultas = hits + self._misses
+            return {
+                "habilitada": self.habilitada,
+                "ttl_s": self.ttl_s,
+                "hits_memoria": memoria["hits"],
+                "hits_bd": self._hits_bd,
+                "misses": self._misses,
+                "hit_rate": round(hits / consultas, 3) if consultas else 0.0,
+                "escrituras": self._escrituras,
+                "errores_bd": self._errores_bd,
+                "entradas_memoria": memoria["entradas"],
+            }
+
+
+cache_planes = CachePlanes(IA_PLAN_CACHE_TTL_S, IA_PLAN_CACHE_MAXSIZE)
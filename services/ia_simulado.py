@@ -0,0 +1,258 @@
+# services/ia_simulado.py
+"""
+Proveedor de IA local (sin red) para pruebas de carga y benchmarks.
+
+- Reproduce respuestas grabadas (un JSON por prompt en IA_GRABACIONES_DIR);
+  si no hay grabación para ese prompt usa otra grabación, y si no hay
+  ninguna arma un plan sintético con los id_ejercicio del catálogo que trae
+  el prompt (o ejercicios genéricos con el prompt libre).
+- Inyecta latencia, errores, truncado (MAX_TOKENS) y errores de cuota con
+  probabilidades configurables.
+- Con IA_GRABAR=1 los proveedores reales guardan sus respuestas en
+  IA_GRABACIONES_DIR para reproducirlas después.
+
+Configuración (IA_SIMULADO=1 lo registra en routers/ia.py como "simulado"):
+    IA_SIMULADO_LATENCIA_MS   latencia media por respuesta (default 800)
+    IA_SIMULADO_JITTER_MS     variación uniforme ± (default 200)
+    IA_SIMULADO_ERROR         probabilidad de error genérico (0-1)
+    IA_SIMULADO_TRUNCADO      probabilidad de respuesta cortada por MAX_TOKENS
+    IA_SIMULADO_CUOTA         probabilidad de error de cuota (429)
+    IA_SIMULADO_SEMILLA       semilla del generador aleatorio
+"""
+
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from services.ia_plan_cache import clave_plan
+
+IA_GRABACIONES_DIR = os.getenv("IA_GRABACIONES_DIR", "grabaciones_ia")
+
+ERROR = "error"
+TRUNCADO = "truncado"
+CUOTA = "cuota"
+
+
+class ErrorSimulado(RuntimeError):
+    pass
+
+
+# ============================================================
+# GRABACIONES (record / replay)
+# ============================================================
+
+class Grabaciones:
+    def __init__(self, directorio: str = IA_GRABACIONES_DIR):
+        self.directorio = Path(directorio)
+        self._lock = threading.Lock()
+        self._indice: Optional[List[Path]] = None
+        self._siguiente = 0
+
+    def _ruta(self, prompt: str) -> Path:
+        return self.directorio / f"{clave_plan(prompt, 'grabacion')}.json"
+
+    def guardar(self, proveedor: str, prompt: str, plan: Dict[str, Any]):
+        """Escritura atómica (archivo temporal + rename)."""
+        try:
+            self.directorio.mkdir(parents=True, exist_ok=True)
+            ruta = self._ruta(prompt)
+            fd, tmp = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"proveedor": proveedor, "prompt": prompt, "plan": plan}, f, ensure_ascii=False)
+            os.replace(tmp, ruta)
+            with self._lock:
+                self._indice = None
+        except OSError as e:
+            print(f"⚠️ No se pudo grabar la respuesta de {proveedor}: {e}")
+
+    def _leer(self, ruta: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                return json.load(f)["plan"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def buscar(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """Grabación exacta del prompt o, si no hay, la siguiente por turnos."""
+        ruta = self._ruta(prompt)
+        if ruta.exists():
+            return self._leer(ruta)
+
+        with self._lock:
+            if self._indice is None:
+                self._indice = sorted(self.directorio.glob("*.json")) if self.directorio.is_dir() else []
+            if not self._indice:
+                return None
+            ruta = self._indice[self._siguiente % len(self._indice)]
+            self._siguiente += 1
+        return self._leer(ruta)
+
+    def total(self) -> int:
+        return len(list(self.directorio.glob("*.json"))) if self.directorio.is_dir() else 0
+
+
+def plan_sintetico(prompt: str) -> Dict[str, Any]:
+    """Plan válido armado a partir del prompt (días, nivel y catálogo id=nombre)."""
+    m = re.search(r"Días por semana:\s*(\d+)", prompt)
+    n_dias = int(m.group(1)) if m else 3
+    m = re.search(r"Nivel:\s*(\w+)", prompt)
+    nivel = m.group(1) if m else "intermedio"
+
+    catalogo: Dict[str, List[int]] = {}
+    for grupo, linea in re.findall(r"^\s*([A-ZÁÉÍÓÚÑ]+):\s*(\d+=.+)$", prompt, re.MULTILINE):
+        catalogo[grupo] = [int(i) for i in re.findall(r"(\d+)=", linea)]
+    grupos = list(catalogo) or ["GENERAL"]
+
+    dias = []
+    for d in range(n_dias):
+        grupo = grupos[d % len(grupos)]
+        if catalogo:
+            ejercicios = [
+                {"id_ejercicio": i, "series": 4, "repeticiones": 10, "descanso_segundos": 75}
+                for i in catalogo[grupo][:5]
+            ]
+        else:
+            ejercicios = [
+                {
+                    "id_ejercicio": 0,
+                    "nombre": f"Ejercicio simulado {grupo.lower()} {k + 1}",
+                    "descripcion": "Generado por el proveedor simulado",
+                    "grupo_muscular": grupo,
+                    "dificultad": nivel,
+                    "tipo": "fuerza",
+                    "series": 4,
+                    "repeticiones": 10,
+                    "descanso_segundos": 75,
+                    "notas": None,
+                }
+                for k in range(5)
+            ]
+        dias.append({
+            "numero_dia": d + 1,
+            "nombre_dia": f"Día {d + 1}",
+            "descripcion": f"Enfoque {grupo.lower()}",
+            "grupos_enfoque": [grupo],
+            "ejercicios": ejercicios,
+        })
+
+    return {"nombre": "Rutina simulada", "descripcion": "Plan sintético (sin red)", "dias": dias}
+
+
+# ============================================================
+# PROVEEDOR SIMULADO
+# ============================================================
+
+class ProveedorSimulado:
+    def __init__(
+            self,
+            latencia_ms: float = 800,
+            jitter_ms: float = 200,
+            p_error: float = 0.0,
+            p_truncado: float = 0.0,
+            p_cuota: float = 0.0,
+            semilla: Optional[int] = None,
+            grabaciones: Optional[Grabaciones] = None,
+    ):
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.p_error = p_error
+        self.p_truncado = p_truncado
+        self.p_cuota = p_cuota
+        self.grabaciones = grabaciones or Grabaciones()
+        self._rng = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._contadores = {"llamadas": 0, "reproducidas": 0, "sinteticas": 0, ERROR: 0, TRUNCADO: 0, CUOTA: 0}
+
+    @classmethod
+    def desde_entorno(cls) -> "ProveedorSimulado":
+        semilla = os.getenv("IA_SIMULADO_SEMILLA")
+        return cls(
+            latencia_ms=float(os.getenv("IA_SIMULADO_LATENCIA_MS", "800")),
+            jitter_ms=float(os.getenv("IA_SIMULADO_JITTER_MS", "200")),
+            p_error=float(os.getenv("IA_SIMULADO_ERROR", "0")),
+            p_truncado=float(os.getenv("IA_SIMULADO_TRUNCADO", "0")),
+            p_cuota=float(os.getenv("IA_SIMULADO_CUOTA", "0")),
+            semilla=int(semilla) if semilla else None,
+        )
+
+    # --------------------------------------------------------
+    def _sortear(self) -> tuple[Optional[str], float]:
+        """(falla inyectada o None, latencia en segundos) de una llamada."""
+        with self._lock:
+            self._contadores["llamadas"] += 1
+            r = self._rng.random()
+            latencia = max(0.0, self.latencia_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            falla = None
+            if r < self.p_cuota:
+                falla = CUOTA
+            elif r < self.p_cuota + self.p_error:
+                falla = ERROR
+            elif r < self.p_cuota + self.p_error + self.p_truncado:
+                falla = TRUNCADO
+            if falla:
+                self._contadores[falla] += 1
+            return falla, latencia
+
+    def _texto_plan(self, prompt: str) -> str:
+        plan = self.grabaciones.buscar(prompt)
+        with self._lock:
+            self._contadores["reproducidas" if plan else "sinteticas"] += 1
+        return json.dumps(plan or plan_sintetico(prompt), ensure_ascii=False)
+
+    @staticmethod
+    def _lanzar(falla: str):
+        if falla == CUOTA:
+            raise ErrorSimulado("429 Resource exhausted: quota exceeded (simulado)")
+        if falla == TRUNCADO:
+            raise ErrorSimulado("finish_reason=MAX_TOKENS: la rutina quedó incompleta (simulado)")
+        raise ErrorSimulado("503 Servicio no disponible (simulado)")
+
+    def generar(self, prompt: str) -> Dict[str, Any]:
+        falla, latencia = self._sortear()
+        # Los errores de cuota son inmediatos; el resto cuesta la latencia completa
+        if falla != CUOTA:
+            time.sleep(latencia)
+        if falla:
+            self._lanzar(falla)
+        return json.loads(self._texto_plan(prompt))
+
+    def fragmentos(self, prompt: str, tamano: int = 64) -> Iterator[str]:
+        """
+        Streaming: el primer fragmento llega tras ~30% de la latencia y el resto
+        se reparte en proporción. Truncado corta a la mitad sin cerrar el JSON;
+        un error genérico se lanza a mitad del stream.
+        """
+        falla, latencia = self._sortear()
+        if falla == CUOTA:
+            self._lanzar(falla)
+
+        texto = self._texto_plan(prompt)
+        partes = [texto[i:i + tamano] for i in range(0, len(texto), tamano)] or [""]
+        corte = len(partes) // 2 if falla in (ERROR, TRUNCADO) else len(partes)
+        pausa = latencia * 0.7 / max(1, len(partes))
+
+        time.sleep(latencia * 0.3)
+        for i, parte in enumerate(partes[:corte]):
+            if i:
+                time.sleep(pausa)
+            yield parte
+        if falla == ERROR:
+            self._lanzar(falla)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "latencia_ms": self.latencia_ms,
+                "jitter_ms": self.jitter_ms,
+                "p_error": self.p_error,
+                "p_truncado": self.p_truncado,
+                "p_cuota": self.p_cuota,
+                "grabaciones": self.grabaciones.total(),
+                **self._contadores,
+            }
@@ -0,0 +1,115 @@
+# services/jobs_service.py
+"""
+Tareas periódicas de la aplicación, ejecutadas por utils/scheduler.py.
+
+La programación de cada tarea se puede cambiar por variables de entorno
+(JOB_<NOMBRE>_CRON) y el programador completo se desactiva con SCHEDULER_ENABLED=0.
+"""
+
+import os
+
+from sqlalchemy import text
+
+from config.database import SessionLocal
+from services.alertas_service import generar_alertas_retrasadas
+from services.ia_plan_cache import cache_planes
+from services.progreso_service import invalidar_todos
+from utils.scheduler import Programador, Job
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1") not in ("0", "false", "False")
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "2"))
+
+
+# ============================================================
+# 🔹 TAREAS
+# ============================================================
+
+def job_alertas_progresion() -> dict:
+    """Barrido de alertas 'progresion_retrasada' para todos los clientes."""
+    db = SessionLocal()
+    try:
+        return generar_alertas_retrasadas(db)
+    finally:
+        db.close()
+
+
+# Estado según las fechas (mismas reglas que obtener_estado_vigencia en
+# routers/ia.py); 'extendida' se conserva mientras la rutina siga vigente
+_ESTADO_VIGENCIA_SQL = """CASE
+                WHEN fecha_fin_vigencia < NOW() THEN 'vencida'
+                WHEN fecha_fin_vigencia < DATE_ADD(NOW(), INTERVAL 8 DAY) THEN 'por_vencer'
+                WHEN estado_vigencia = 'extendida' THEN 'extendida'
+                ELSE 'activa'
+            END"""
+
+
+def job_vigencia_rutinas() -> dict:
+    """
+    Recalcula estado_vigencia de todas las rutinas con fechas de vigencia.
+    Una rutina 'extendida' (POST /rutinas/{id}/extender-vigencia) mantiene ese
+    estado hasta quedar por vencer o vencida.
+    Solo se escriben las filas cuyo estado cambia.
+    """
+    db = SessionLocal()
+    try:
+        res = db.execute(text(f"""
+            UPDATE rutinas
+            SET estado_vigencia = {_ESTADO_VIGENCIA_SQL}
+            WHERE fecha_inicio_vigencia IS NOT NULL
+              AND fecha_fin_vigencia IS NOT NULL
+              AND NOT (estado_vigencia <=> {_ESTADO_VIGENCIA_SQL})
+        """))
+        db.commit()
+        actualizadas = res.rowcount or 0
+        if actualizadas:
+            invalidar_todos()
+        return {"rutinas_actualizadas": actualizadas}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def job_purgar_cache_planes() -> dict:
+    """Borra de la BD los planes de IA cacheados que ya expiraron."""
+    return {"planes_borrados": cache_planes.purgar_expirados()}
+
+
+# ============================================================
+# 🔹 PROGRAMADOR
+# ============================================================
+
+programador = Programador(max_workers=SCHEDULER_WORKERS)
+
+programador.agregar(Job(
+    "alertas_progresion",
+    job_alertas_progresion,
+    cron=os.getenv("JOB_ALERTAS_PROGRESION_CRON", "0 3 * * *"),
+    descripcion="Alertas de progresión retrasada (14–28 días sin sesión)",
+))
+programador.agregar(Job(
+    "vigencia_rutinas",
+    job_vigencia_rutinas,
+    cron=os.getenv("JOB_VIGENCIA_RUTINAS_CRON", "*/15 * * * *"),
+    descripcion="Actualiza estado_vigencia de las rutinas",
+))
+programador.agregar(Job(
+    "purgar_cache_planes",
+    job_purgar_cache_planes,
+    cron=os.getenv("JOB_PURGAR_CACHE_PLANES_CRON", "15 4 * * *"),
+    descripcion="Elimina planes de IA expirados de ia_planes_cache",
+    habilitado=cache_planes.habilitada,
+))
+
+
+def iniciar_programador():
+    if not SCHEDULER_ENABLED:
+        print("⚠️ Programador de tareas desactivado (SCHEDULER_ENABLED=0)")
+        return
+    programador.iniciar()
+
+
+def detener_programador():
+    if programador.activo:
+        programador.detener()
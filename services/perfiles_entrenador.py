@@ -0,0 +1,164 @@
+# services/perfiles_entrenador.py
+"""
+Documentos de perfil de entrenador (resumen, educación, diplomas, ...).
+
+Se guardan en data/perfiles/{id}.json y, con PERFILES_EN_BD=1, también en la
+columna usuarios.perfil_entrenador (put_perfil_entrenador la escribe en la
+misma transacción que el resto del perfil).
+
+- Lectura desde archivo: caché por proceso validada con (mtime_ns, tamaño);
+  un stat en vez de abrir y parsear el JSON. Si otro worker reescribe el
+  archivo cambia la firma y se vuelve a leer.
+- Lectura desde BD (PERFILES_EN_BD=1): una consulta por lote de ids, sin
+  abrir archivos; los que aún no tienen la columna cargada se leen del disco
+  (python scripts/perfiles_a_bd.py migrar los copia).
+- Escritura atómica: archivo temporal + os.replace, nadie lee un JSON a medias.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from db import get_connection
+
+PERFILES_DIR = Path(os.getcwd()) / "data" / "perfiles"
+PERFILES_EN_BD = os.getenv("PERFILES_EN_BD", "0") == "1"
+
+_LOTE_BD = 1000
+
+
+def serializar(doc: Dict[str, Any]) -> str:
+    return json.dumps(doc, ensure_ascii=False)
+
+
+def _parsear(raw) -> Optional[Dict[str, Any]]:
+    if not raw:
+        return None
+    try:
+        doc = json.loads(raw)
+    except ValueError:
+        return None
+    return doc if isinstance(doc, dict) else None
+
+
+class PerfilesEntrenador:
+    def __init__(self, directorio: Path = PERFILES_DIR, en_bd: bool = PERFILES_EN_BD):
+        self.directorio = Path(directorio)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        self.en_bd = en_bd
+        self._lock = threading.Lock()
+        # id -> (firma del archivo o None si no existe, documento)
+        self._cache: Dict[int, tuple] = {}
+        self._hits = 0
+        self._lecturas_archivo = 0
+        self._consultas_bd = 0
+        self._escrituras = 0
+
+    def ruta(self, id_usuario: int) -> Path:
+        return self.directorio / f"{id_usuario}.json"
+
+    # --------------------------------------------------------
+    def _desde_archivo(self, id_usuario: int) -> Optional[Dict[str, Any]]:
+        path = self.ruta(id_usuario)
+        try:
+            st = os.stat(path)
+            firma = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            firma = None
+
+        with self._lock:
+            entrada = self._cache.get(id_usuario)
+            if entrada is not None and entrada[0] == firma:
+                self._hits += 1
+                return entrada[1]
+
+        doc = None
+        if firma is not None:
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    doc = _parsear(f.read())
+            except OSError as e:
+                print(f"⚠️ No se pudo leer el perfil {id_usuario}: {e}")
+                return None
+            with self._lock:
+                self._lecturas_archivo += 1
+
+        with self._lock:
+            self._cache[id_usuario] = (firma, doc)
+        return doc
+
+    def _desde_bd(self, ids: list) -> Dict[int, Optional[Dict[str, Any]]]:
+        out: Dict[int, Optional[Dict[str, Any]]] = {}
+        cn = get_connection()
+        cur = cn.cursor()
+        try:
+            for i in range(0, len(ids), _LOTE_BD):
+                lote = ids[i:i + _LOTE_BD]
+                marcas = ", ".join(["%s"] * len(lote))
+                cur.execute(
+                    f"SELECT id_usuario, perfil_entrenador FROM usuarios WHERE id_usuario IN ({marcas})",
+                    tuple(lote),
+                )
+                for id_usuario, raw in cur.fetchall():
+                    out[int(id_usuario)] = _parsear(raw)
+                with self._lock:
+                    self._consultas_bd += 1
+        finally:
+            cur.close()
+            cn.close()
+        return out
+
+    def cargar_lote(self, ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """{id: documento} de los que tienen perfil (los documentos no deben modificarse)."""
+        ids = list(dict.fromkeys(int(i) for i in ids))
+        docs: Dict[int, Optional[Dict[str, Any]]] = {}
+        if self.en_bd and ids:
+            try:
+                docs = self._desde_bd(ids)
+            except Exception as e:
+                print(f"⚠️ No se pudieron leer los perfiles de la BD, se usan los archivos: {e}")
+        for i in ids:
+            if docs.get(i) is None:
+                docs[i] = self._desde_archivo(i)
+        return {i: d for i, d in docs.items() if d is not None}
+
+    def leer(self, id_usuario: int) -> Optional[Dict[str, Any]]:
+        return self.cargar_lote([id_usuario]).get(int(id_usuario))
+
+    # --------------------------------------------------------
+    def guardar(self, id_usuario: int, doc: Dict[str, Any]):
+        """Escritura atómica del archivo; la columna la escribe el llamador en su transacción."""
+        path = self.ruta(id_usuario)
+        fd, tmp = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(doc, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+        st = os.stat(path)
+        with self._lock:
+            self._cache[int(id_usuario)] = ((st.st_mtime_ns, st.st_size), dict(doc))
+            self._escrituras += 1
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "en_bd": self.en_bd,
+                "en_cache": len(self._cache),
+                "hits": self._hits,
+                "lecturas_archivo": self._lecturas_archivo,
+                "consultas_bd": self._consultas_bd,
+                "escrituras": self._escrituras,
+            }
+
+
+perfiles_entrenador = PerfilesEntrenador()
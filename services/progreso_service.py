@@ -0,0 +1,309 @@
+# services/progreso_service.py
+"""
+Lógica compartida de progreso del cliente: cachés de lectura y su invalidación.
+"""
+
+import os
+from datetime import datetime
+
+from utils.cache import CacheTTL
+
+DASHBOARD_CACHE_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "60"))
+
+# Snapshot del dashboard por cliente (id_cliente -> DashboardProgreso)
+dashboard_cache = CacheTTL("dashboard_progreso", maxsize=5000, ttl=DASHBOARD_CACHE_TTL)
+
+# Resumen de la cartera de clientes por entrenador (id_entrenador -> list[ResumenClienteOut]).
+# No se invalida por cliente (no hay índice inverso cliente -> entrenador): TTL corto.
+ROSTER_CACHE_TTL = int(os.getenv("ROSTER_CACHE_TTL", "30"))
+roster_cache = CacheTTL("roster_entrenador", maxsize=1000, ttl=ROSTER_CACHE_TTL)
+
+
+def invalidar_cliente(id_cliente: int | None) -> None:
+    """Descarta los datos cacheados de un cliente tras una escritura que lo afecta."""
+    if id_cliente is None:
+        return
+    dashboard_cache.invalidar(int(id_cliente))
+
+
+def invalidar_todos() -> None:
+    """Para escrituras masivas (p.ej. alertas periódicas de todos los clientes)."""
+    dashboard_cache.limpiar()
+    roster_cache.limpiar()
+
+
+# ============================================================
+# 🔹 ESTADÍSTICAS POR (CLIENTE, EJERCICIO)
+# ============================================================
+# Tabla `progreso_stats_ejercicio` (ver scripts/progreso_stats.py).
+# Se actualiza en la misma transacción que cada INSERT en progreso_ejercicios,
+# así el número de sesión y la detección de récords son lecturas O(1).
+
+STATS_RECONSTRUIR_SQL = """
+    INSERT INTO progreso_stats_ejercicio (
+        id_cliente, id_ejercicio, total_sesiones, ultimo_numero_sesion,
+        peso_maximo, peso_inicial, peso_ultimo, primera_sesion, ultima_sesion
+    )
+    SELECT
+        pe.id_cliente,
+        pe.id_ejercicio,
+        COUNT(*),
+        COALESCE(MAX(pe.numero_sesion), 0),
+        MAX(pe.peso_kg),
+        (SELECT p2.peso_kg FROM progreso_ejercicios p2
+          WHERE p2.id_cliente = pe.id_cliente AND p2.id_ejercicio = pe.id_ejercicio
+            AND p2.peso_kg IS NOT NULL
+          ORDER BY p2.fecha_sesion ASC, p2.id_progreso ASC LIMIT 1),
+        (SELECT p3.peso_kg FROM progreso_ejercicios p3
+          WHERE p3.id_cliente = pe.id_cliente AND p3.id_ejercicio = pe.id_ejercicio
+            AND p3.peso_kg IS NOT NULL
+          ORDER BY p3.fecha_sesion DESC, p3.id_progreso DESC LIMIT 1),
+        MIN(pe.fecha_sesion),
+        MAX(pe.fecha_sesion)
+    FROM progreso_ejercicios pe
+    WHERE {filtro}
+    GROUP BY pe.id_cliente, pe.id_ejercicio
+    ON DUPLICATE KEY UPDATE
+        total_sesiones = VALUES(total_sesiones),
+        ultimo_numero_sesion = VALUES(ultimo_numero_sesion),
+        peso_maximo = VALUES(peso_maximo),
+        peso_inicial = VALUES(peso_inicial),
+        peso_ultimo = VALUES(peso_ultimo),
+        primera_sesion = VALUES(primera_sesion),
+        ultima_sesion = VALUES(ultima_sesion)
+"""
+
+# El orden de las asignaciones importa: MySQL evalúa de izquierda a derecha,
+# así que peso_inicial/peso_ultimo se comparan contra las fechas aún sin actualizar.
+STATS_REGISTRAR_SQL = """
+    INSERT INTO progreso_stats_ejercicio (
+        id_cliente, id_ejercicio, total_sesiones, ultimo_numero_sesion,
+        peso_maximo, peso_inicial, peso_ultimo, primera_sesion, ultima_sesion
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, COALESCE(%s, NOW()), COALESCE(%s, NOW()))
+    ON DUPLICATE KEY UPDATE
+        total_sesiones = total_sesiones + VALUES(total_sesiones),
+        ultimo_numero_sesion = GREATEST(ultimo_numero_sesion, VALUES(ultimo_numero_sesion)),
+        peso_maximo = GREATEST(COALESCE(peso_maximo, VALUES(peso_maximo)),
+                               COALESCE(VALUES(peso_maximo), peso_maximo)),
+        peso_inicial = IF(VALUES(peso_inicial) IS NOT NULL
+                          AND (peso_inicial IS NULL OR VALUES(primera_sesion) < primera_sesion),
+                          VALUES(peso_inicial), peso_inicial),
+        peso_ultimo = IF(VALUES(peso_ultimo) IS NOT NULL
+                         AND (ultima_sesion IS NULL OR VALUES(ultima_sesion) >= ultima_sesion),
+                         VALUES(peso_ultimo), peso_ultimo),
+        primera_sesion = LEAST(COALESCE(primera_sesion, VALUES(primera_sesion)), VALUES(primera_sesion)),
+        ultima_sesion = GREATEST(COALESCE(ultima_sesion, VALUES(ultima_sesion)), VALUES(ultima_sesion))
+"""
+
+
+# Crea la fila vacía del par si falta y, si ya existe, la bloquea igual (X):
+# así dos transacciones con un par nuevo se esperan en vez de tomar ambas el
+# gap lock de un SELECT ... FOR UPDATE sin resultado y chocar en el INSERT.
+_STATS_ASEGURAR_SQL = """
+    INSERT INTO progreso_stats_ejercicio (id_cliente, id_ejercicio)
+    VALUES {valores}
+    ON DUPLICATE KEY UPDATE id_cliente = id_cliente
+"""
+
+
+def _recien_creada(fila: dict) -> bool:
+    # Una fila sin sesiones es la recién insertada (o un par sin historial,
+    # donde la reconstrucción no encuentra nada)
+    return not fila["total_sesiones"] and not fila["ultimo_numero_sesion"]
+
+
+def bloquear_stats(cur, id_cliente: int, id_ejercicio: int) -> dict:
+    """
+    Bloquea (FOR UPDATE) la fila de estadísticas del par y la devuelve.
+
+    Primero asegura la fila (INSERT ... ON DUPLICATE KEY UPDATE) y después la
+    lee bloqueada; si se acaba de crear (historial anterior a la tabla o
+    primer registro) se siembra desde progreso_ejercicios. Requiere un cursor
+    con dictionary=True dentro de una transacción abierta.
+    """
+    consulta = """
+        SELECT ultimo_numero_sesion, peso_maximo, total_sesiones
+        FROM progreso_stats_ejercicio
+        WHERE id_cliente = %s AND id_ejercicio = %s
+        FOR UPDATE
+    """
+    cur.execute(_STATS_ASEGURAR_SQL.format(valores="(%s, %s)"), (id_cliente, id_ejercicio))
+    cur.execute(consulta, (id_cliente, id_ejercicio))
+    fila = cur.fetchone()
+    if not _recien_creada(fila):
+        return fila
+
+    cur.execute(
+        STATS_RECONSTRUIR_SQL.format(filtro="pe.id_cliente = %s AND pe.id_ejercicio = %s"),
+        (id_cliente, id_ejercicio),
+    )
+    cur.execute(consulta, (id_cliente, id_ejercicio))
+    return cur.fetchone()
+
+
+def siguiente_sesion(cur, id_cliente: int, id_ejercicio: int) -> tuple[int, float]:
+    """Devuelve (numero_sesion siguiente, peso máximo histórico) del par bloqueado."""
+    stats = bloquear_stats(cur, id_cliente, id_ejercicio)
+    return (stats["ultimo_numero_sesion"] or 0) + 1, stats["peso_maximo"] or 0
+
+
+def registrar_en_stats(cur, id_cliente: int, id_ejercicio: int, numero_sesion: int,
+                       peso_kg: float | None, fecha_sesion=None) -> None:
+    """Aplica una nueva sesión a las estadísticas (fecha_sesion=None → NOW())."""
+    cur.execute(STATS_REGISTRAR_SQL, (
+        id_cliente, id_ejercicio, 1, numero_sesion,
+        peso_kg, peso_kg, peso_kg,
+        fecha_sesion, fecha_sesion,
+    ))
+
+
+def bloquear_stats_lote(cur, id_cliente: int, ids_ejercicio: list[int]) -> dict[int, dict]:
+    """
+    Versión por lote de `bloquear_stats`: bloquea y devuelve {id_ejercicio: fila}
+    para todos los ejercicios indicados, sembrando en bloque las filas nuevas.
+    """
+    ids = sorted(set(ids_ejercicio))
+    if not ids:
+        return {}
+    marcas = ", ".join(["%s"] * len(ids))
+    consulta = f"""
+        SELECT id_ejercicio, ultimo_numero_sesion, peso_maximo, total_sesiones
+        FROM progreso_stats_ejercicio
+        WHERE id_cliente = %s AND id_ejercicio IN ({marcas})
+        FOR UPDATE
+    """
+    # Filas aseguradas en orden de id: todas las transacciones bloquean igual
+    valores = ", ".join(["(%s, %s)"] * len(ids))
+    cur.execute(_STATS_ASEGURAR_SQL.format(valores=valores), tuple(v for i in ids for v in (id_cliente, i)))
+    cur.execute(consulta, (id_cliente, *ids))
+    filas = {f["id_ejercicio"]: f for f in cur.fetchall()}
+
+    nuevas = [i for i in ids if _recien_creada(filas[i])]
+    if nuevas:
+        marcas_n = ", ".join(["%s"] * len(nuevas))
+        cur.execute(
+            STATS_RECONSTRUIR_SQL.format(filtro=f"pe.id_cliente = %s AND pe.id_ejercicio IN ({marcas_n})"),
+            (id_cliente, *nuevas),
+        )
+        cur.execute(consulta, (id_cliente, *ids))
+        filas = {f["id_ejercicio"]: f for f in cur.fetchall()}
+    return filas
+
+
+def _orden_fecha(fecha):
+    """Clave de orden para fechas que pueden venir como str ISO, datetime o None (= ahora)."""
+    if fecha is None:
+        return datetime.max
+    if isinstance(fecha, str):
+        try:
+            return datetime.fromisoformat(fecha.replace("Z", ""))
+        except ValueError:
+            return datetime.max
+    if not isinstance(fecha, datetime):
+        return datetime.combine(fecha, datetime.min.time())
+    return fecha
+
+
+def registrar_en_stats_lote(cur, id_cliente: int, sesiones: list[tuple]) -> None:
+    """
+    Aplica un lote de sesiones a las estadísticas con un solo upsert por ejercicio.
+    `sesiones` es una lista de (id_ejercicio, numero_sesion, peso_kg, fecha_sesion).
+    """
+    agregados: dict[int, dict] = {}
+    for id_ejercicio, numero_sesion, peso_kg, fecha in sorted(sesiones, key=lambda x: (_orden_fecha(x[3]), x[1])):
+        a = agregados.setdefault(id_ejercicio, {
+            "total": 0, "numero": 0, "maximo": None, "inicial": None, "ultimo": None,
+            "primera": fecha, "ultima": fecha,
+        })
+        a["total"] += 1
+        a["numero"] = max(a["numero"], numero_sesion)
+        a["ultima"] = fecha
+        if peso_kg is not None:
+            a["maximo"] = peso_kg if a["maximo"] is None else max(a["maximo"], peso_kg)
+            if a["inicial"] is None:
+                a["inicial"] = peso_kg
+            a["ultimo"] = peso_kg
+
+    cur.executemany(STATS_REGISTRAR_SQL, [
+        (id_cliente, id_ejercicio, a["total"], a["numero"],
+         a["maximo"], a["inicial"], a["ultimo"], a["primera"], a["ultima"])
+        for id_ejercicio, a in agregados.items()
+    ])
+
+
+_INSERTAR_PROGRESO_SQL = """
+    INSERT INTO progreso_ejercicios (
+        id_historial, id_ejercicio, id_cliente,
+        fecha_sesion, numero_sesion, dia_rutina,
+        peso_kg, series_completadas, repeticiones_completadas,
+        tiempo_descanso_segundos, rpe, calidad_tecnica,
+        estado_animo, notas, dolor_molestias, es_record_personal
+    ) VALUES (
+        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+    )
+"""
+
+
+def insertar_progresos_lote(cur, id_cliente: int, registros: list[dict]) -> list[dict]:
+    """
+    Inserta varios registros de progreso de un cliente en la transacción abierta.
+
+    Bloquea las estadísticas de todos los ejercicios con una consulta, asigna
+    números de sesión consecutivos y detecta récords en memoria, inserta con
+    executemany, recupera los ids generados y actualiza las estadísticas.
+    Cada registro es un dict con las columnas de progreso_ejercicios; devuelve
+    por registro {id_ejercicio, numero_sesion, record_personal, id_progreso}
+    en el mismo orden recibido.
+    """
+    if not registros:
+        return []
+
+    stats = bloquear_stats_lote(cur, id_cliente, [r["id_ejercicio"] for r in registros])
+    siguiente = {i: (f["ultimo_numero_sesion"] or 0) + 1 for i, f in stats.items()}
+    maximo = {i: f["peso_maximo"] or 0 for i, f in stats.items()}
+
+    filas = []
+    resultados = []
+    for r in registros:
+        id_ejercicio = r["id_ejercicio"]
+        numero_sesion = siguiente[id_ejercicio]
+        siguiente[id_ejercicio] += 1
+
+        peso_kg = r.get("peso_kg")
+        es_record = bool(peso_kg and peso_kg > maximo[id_ejercicio])
+        if es_record:
+            maximo[id_ejercicio] = peso_kg
+
+        filas.append((
+            r["id_historial"], id_ejercicio, id_cliente,
+            r["fecha_sesion"], numero_sesion, r.get("dia_rutina"),
+            peso_kg, r["series_completadas"], r["repeticiones_completadas"],
+            r.get("tiempo_descanso_segundos"), r.get("rpe"), r.get("calidad_tecnica"),
+            r.get("estado_animo"), r.get("notas"), r.get("dolor_molestias"), es_record,
+        ))
+        resultados.append({
+            "id_ejercicio": id_ejercicio,
+            "numero_sesion": numero_sesion,
+            "record_personal": es_record,
+        })
+
+    cur.executemany(_INSERTAR_PROGRESO_SQL, filas)
+
+    # Recuperar los ids generados por (ejercicio, número de sesión)
+    pares = [(r["id_ejercicio"], r["numero_sesion"]) for r in resultados]
+    marcas = ", ".join(["(%s, %s)"] * len(pares))
+    cur.execute(f"""
+        SELECT id_progreso, id_ejercicio, numero_sesion
+        FROM progreso_ejercicios
+        WHERE id_cliente = %s
+          AND (id_ejercicio, numero_sesion) IN ({marcas})
+    """, (id_cliente, *[v for par in pares for v in par]))
+    ids = {(f["id_ejercicio"], f["numero_sesion"]): f["id_progreso"] for f in cur.fetchall()}
+    for res in resultados:
+        res["id_progreso"] = ids.get((res["id_ejercicio"], res["numero_sesion"]))
+
+    registrar_en_stats_lote(cur, id_cliente, [
+        (res["id_ejercicio"], res["numero_sesion"], r.get("peso_kg"), r["fecha_sesion"])
+        for res, r in zip(resultados, registros)
+    ])
+    return resultados
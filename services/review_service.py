@@ -1,9 +1,10 @@
 # services/review_service.py
 from sqlalchemy.orm import Session
-from sqlalchemy import func, select
+from sqlalchemy import func, select, or_, and_
 from models.review import Resena
 from models.user import Usuario
 from schemas.review import ResenaCreate, ResenaUpdate, EstadisticasEntrenador
+from services.catalogo_entrenadores import catalogo_entrenadores
 from datetime import datetime
 
 
@@ -34,6 +35,7 @@ def crear_resena(db: Session, id_alumno: int, data: ResenaCreate) -> dict:
     db.add(resena)
     db.commit()
     db.refresh(resena)
+    catalogo_entrenadores.invalidar([resena.id_entrenador])
 
     print(f"[DEBUG] Reseña creada con ID: {resena.id_resena}")
     return _enriquecer_resena(db, resena)
@@ -65,6 +67,7 @@ def actualizar_resena(db: Session, id_resena: int, data: ResenaUpdate) -> dict |
     db.add(resena)
     db.commit()
     db.refresh(resena)
+    catalogo_entrenadores.invalidar([resena.id_entrenador])
 
     print(f"[DEBUG] Reseña {id_resena} actualizada")
     return _enriquecer_resena(db, resena)
@@ -76,25 +79,73 @@ def eliminar_resena(db: Session, id_resena: int) -> bool:
     if not resena:
         return False
 
+    id_entrenador = resena.id_entrenador
     db.delete(resena)
     db.commit()
+    catalogo_entrenadores.invalidar([id_entrenador])
     print(f"[DEBUG] Reseña {id_resena} eliminada")
     return True
 
 
-def obtener_resenas_entrenador(db: Session, id_entrenador: int, limit: int = 10) -> list[dict]:
-    """Obtiene todas las reseñas de un entrenador"""
-    resenas = db.query(Resena) \
-        .filter(Resena.id_entrenador == id_entrenador) \
-        .order_by(Resena.fecha_creacion.desc()) \
-        .limit(limit) \
-        .all()
+# Campos de ResenaOut (+ fecha_resena) que admite `fields` en el listado
+CAMPOS_RESENA = [
+    "id_resena", "id_entrenador", "id_alumno", "calificacion", "titulo", "comentario",
+    "calidad_rutina", "comunicacion", "disponibilidad", "resultados",
+    "fecha_creacion", "fecha_actualizacion", "fecha_resena",
+    "nombreAlumno", "nombre_alumno", "fotoAlumno",
+]
+_CAMPOS_ALUMNO = {"nombreAlumno", "nombre_alumno", "fotoAlumno"}
 
-    print(f"[DEBUG] Encontradas {len(resenas)} reseñas para entrenador {id_entrenador}")
 
-    # ✅ Enriquecer cada reseña con datos del alumno
-    resenas_enriquecidas = [_enriquecer_resena(db, r) for r in resenas]
-    return resenas_enriquecidas
+def listar_resenas_entrenador(
+        db: Session,
+        id_entrenador: int,
+        limit: int = 10,
+        despues: tuple[datetime, int] | None = None,
+        campos: list[str] | None = None,
+) -> tuple[list[dict], dict | None]:
+    """
+    Reseñas de un entrenador, más nuevas primero, paginadas por keyset
+    (fecha_creacion, id_resena) a partir de `despues` = (fecha, id) de la
+    última vista. Solo consulta las columnas de `campos` y une
+    al alumno en la misma consulta si se pide alguno de sus datos.
+    Devuelve (reseñas, datos del cursor siguiente o None).
+    """
+    pedidos = set(campos or CAMPOS_RESENA)
+    columnas = [Resena.id_resena, Resena.fecha_creacion] + [
+        getattr(Resena, c) for c in CAMPOS_RESENA
+        if c in pedidos and c not in ("id_resena", "fecha_creacion") and hasattr(Resena, c)
+    ]
+    con_alumno = bool(pedidos & _CAMPOS_ALUMNO)
+    if con_alumno:
+        columnas += [Usuario.nombre.label("alumno_nombre"), Usuario.foto_url.label("alumno_foto")]
+
+    q = db.query(*columnas).filter(Resena.id_entrenador == id_entrenador)
+    if con_alumno:
+        q = q.outerjoin(Usuario, Usuario.id_usuario == Resena.id_alumno)
+    if despues:
+        fecha, ultimo_id = despues
+        q = q.filter(or_(
+            Resena.fecha_creacion < fecha,
+            and_(Resena.fecha_creacion == fecha, Resena.id_resena < ultimo_id),
+        ))
+    filas = q.order_by(Resena.fecha_creacion.desc(), Resena.id_resena.desc()).limit(limit + 1).all()
+
+    siguiente = None
+    if len(filas) > limit:
+        filas = filas[:limit]
+        siguiente = {"fecha": filas[-1].fecha_creacion.isoformat(), "id": filas[-1].id_resena}
+
+    resenas = []
+    for f in filas:
+        datos = f._asdict()
+        resena = {c: datos[c] for c in CAMPOS_RESENA if c in datos}
+        resena["fecha_resena"] = f.fecha_creacion
+        if con_alumno:
+            resena["nombreAlumno"] = resena["nombre_alumno"] = datos["alumno_nombre"] or "Cliente Anónimo"
+            resena["fotoAlumno"] = datos["alumno_foto"]
+        resenas.append(resena if campos is None else {c: resena.get(c) for c in campos})
+    return resenas, siguiente
 
 
 def obtener_estadisticas_entrenador(db: Session, id_entrenador: int) -> EstadisticasEntrenador:
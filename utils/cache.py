@@ -0,0 +1,72 @@
+# utils/cache.py
+"""
+Caché en memoria con expiración (TTL) y métricas de aciertos.
+
+Es por proceso: cada worker de uvicorn tiene la suya, por eso las entradas
+expiran solas aunque otro worker haya escrito en la BD.
+"""
+
+import threading
+from typing import Any, Callable, Hashable
+
+from cachetools import TTLCache
+
+_SIN_VALOR = object()
+
+
+class CacheTTL:
+    """TTLCache de cachetools protegida con lock y con contadores de hit/miss."""
+
+    def __init__(self, nombre: str, maxsize: int = 1024, ttl: float = 60):
+        self.nombre = nombre
+        self.ttl = ttl
+        self._datos = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidaciones = 0
+
+    def get(self, clave: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            valor = self._datos.get(clave, _SIN_VALOR)
+            if valor is _SIN_VALOR:
+                self._misses += 1
+                return default
+            self._hits += 1
+            return valor
+
+    def set(self, clave: Hashable, valor: Any) -> None:
+        with self._lock:
+            self._datos[clave] = valor
+
+    def get_or_load(self, clave: Hashable, cargar: Callable[[], Any]) -> Any:
+        """Devuelve el valor cacheado o lo calcula con `cargar()` y lo guarda."""
+        valor = self.get(clave, _SIN_VALOR)
+        if valor is _SIN_VALOR:
+            valor = cargar()
+            self.set(clave, valor)
+        return valor
+
+    def invalidar(self, clave: Hashable) -> None:
+        with self._lock:
+            if self._datos.pop(clave, _SIN_VALOR) is not _SIN_VALOR:
+                self._invalidaciones += 1
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._invalidaciones += len(self._datos)
+            self._datos.clear()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "nombre": self.nombre,
+                "entradas": len(self._datos),
+                "maxsize": self._datos.maxsize,
+                "ttl_s": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 4) if total else 0.0,
+                "invalidaciones": self._invalidaciones,
+            }
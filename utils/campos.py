@@ -0,0 +1,41 @@
+# utils/campos.py
+"""
+Proyección de campos (`?fields=a,b,c`) para los listados.
+
+El endpoint declara qué campos admite; con `fields` solo se consultan y se
+devuelven esos (más los que necesite internamente, p. ej. para el cursor).
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+HEADER_CURSOR = "X-Next-Cursor"
+
+
+def parsear_campos(fields: Optional[str], permitidos: Iterable[str]) -> Optional[List[str]]:
+    """Campos pedidos en orden (None = todos). ValueError si alguno no existe."""
+    if fields is None or not fields.strip():
+        return None
+    permitidos = list(permitidos)
+    pedidos = list(dict.fromkeys(c.strip() for c in fields.split(",") if c.strip()))
+    desconocidos = [c for c in pedidos if c not in permitidos]
+    if desconocidos:
+        raise ValueError(f"Campos desconocidos: {', '.join(desconocidos)} (disponibles: {', '.join(permitidos)})")
+    return pedidos
+
+
+def proyectar(fila: Dict[str, Any], campos: Optional[List[str]]) -> Dict[str, Any]:
+    if campos is None:
+        return fila
+    return {c: fila.get(c) for c in campos}
+
+
+def respuesta_proyectada(contenido: Any, siguiente: Optional[str] = None) -> JSONResponse:
+    """
+    Respuesta de un listado con `fields`: se salta el response_model (a los
+    items les faltan campos obligatorios) y el cursor siguiente va en el header.
+    """
+    headers = {HEADER_CURSOR: siguiente} if siguiente else None
+    return JSONResponse(content=jsonable_encoder(contenido), headers=headers)
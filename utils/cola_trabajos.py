@@ -0,0 +1,181 @@
+# utils/cola_trabajos.py
+"""
+Cola de trabajos en segundo plano con un pool de workers acotado.
+
+- Los trabajos corren en un ThreadPoolExecutor propio, fuera del threadpool de
+  requests de FastAPI, así que una llamada lenta a un proveedor de IA no deja
+  sin hilos al resto de la app.
+- La cola tiene capacidad máxima: si está llena, `encolar` lanza ColaLlena.
+- El estado de cada trabajo vive en memoria (por proceso) y se purga tras
+  `retencion_s` segundos de terminado.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+EN_COLA = "en_cola"
+PROCESANDO = "procesando"
+COMPLETADO = "completado"
+ERROR = "error"
+
+
+class ColaLlena(Exception):
+    pass
+
+
+class Trabajo:
+    def __init__(self, tipo: str, funcion: Callable[[], Any]):
+        self.id = uuid.uuid4().hex
+        self.tipo = tipo
+        self.funcion = funcion
+        self.estado = EN_COLA
+        self.resultado: Any = None
+        self.error: Optional[str] = None
+        self.codigo_error: Optional[int] = None
+        self.creado = time.time()
+        self.iniciado: Optional[float] = None
+        self.terminado: Optional[float] = None
+        self._fin = threading.Event()
+
+    @property
+    def finalizado(self) -> bool:
+        return self.estado in (COMPLETADO, ERROR)
+
+    def esperar(self, timeout: Optional[float] = None) -> bool:
+        return self._fin.wait(timeout)
+
+    def to_dict(self, incluir_resultado: bool = True) -> dict:
+        def _iso(ts):
+            return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+        datos = {
+            "id_trabajo": self.id,
+            "tipo": self.tipo,
+            "estado": self.estado,
+            "creado": _iso(self.creado),
+            "iniciado": _iso(self.iniciado),
+            "terminado": _iso(self.terminado),
+            "espera_ms": round(((self.iniciado or time.time()) - self.creado) * 1000, 1),
+            "duracion_ms": round((self.terminado - self.iniciado) * 1000, 1)
+            if self.iniciado and self.terminado else None,
+        }
+        if self.estado == ERROR:
+            datos["error"] = self.error
+            datos["codigo_error"] = self.codigo_error
+        if incluir_resultado and self.estado == COMPLETADO:
+            datos["resultado"] = self.resultado
+        return datos
+
+
+def _percentil(valores: list[float], p: float) -> Optional[float]:
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    idx = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return round(ordenados[idx], 1)
+
+
+class ColaTrabajos:
+    def __init__(self, nombre: str, workers: int = 4, capacidad: int = 100, retencion_s: int = 900):
+        self.nombre = nombre
+        self.workers = max(1, workers)
+        self.capacidad = max(1, capacidad)
+        self.retencion_s = retencion_s
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=nombre)
+        self._trabajos: dict[str, Trabajo] = {}
+        self._lock = threading.Lock()
+        self._en_cola = 0
+        self._en_proceso = 0
+        self._completados = 0
+        self._errores = 0
+        self._rechazados = 0
+        # (espera_ms, duracion_ms) de los últimos trabajos terminados
+        self._latencias: deque[tuple[float, float]] = deque(maxlen=500)
+
+    # --------------------------------------------------------
+    def encolar(self, tipo: str, funcion: Callable[[], Any]) -> Trabajo:
+        trabajo = Trabajo(tipo, funcion)
+        with self._lock:
+            self._purgar()
+            if self._en_cola >= self.capacidad:
+                self._rechazados += 1
+                raise ColaLlena(f"Cola '{self.nombre}' llena ({self.capacidad} trabajos en espera)")
+            self._trabajos[trabajo.id] = trabajo
+            self._en_cola += 1
+        self._executor.submit(self._ejecutar, trabajo)
+        return trabajo
+
+    def obtener(self, id_trabajo: str) -> Optional[Trabajo]:
+        with self._lock:
+            return self._trabajos.get(id_trabajo)
+
+    def _ejecutar(self, trabajo: Trabajo):
+        with self._lock:
+            self._en_cola -= 1
+            self._en_proceso += 1
+        trabajo.iniciado = time.time()
+        trabajo.estado = PROCESANDO
+        try:
+            trabajo.resultado = trabajo.funcion()
+            trabajo.estado = COMPLETADO
+        except Exception as e:
+            # HTTPException de FastAPI trae status_code/detail
+            trabajo.codigo_error = getattr(e, "status_code", 500)
+            trabajo.error = str(getattr(e, "detail", None) or e)
+            trabajo.estado = ERROR
+            if trabajo.codigo_error >= 500:
+                print(f"❌ Trabajo {trabajo.tipo} {trabajo.id} falló: {e}")
+                traceback.print_exc()
+        finally:
+            trabajo.terminado = time.time()
+            trabajo.funcion = None
+            with self._lock:
+                self._en_proceso -= 1
+                if trabajo.estado == COMPLETADO:
+                    self._completados += 1
+                else:
+                    self._errores += 1
+                self._latencias.append((
+                    (trabajo.iniciado - trabajo.creado) * 1000,
+                    (trabajo.terminado - trabajo.iniciado) * 1000,
+                ))
+            trabajo._fin.set()
+
+    def _purgar(self):
+        limite = time.time() - self.retencion_s
+        viejos = [
+            tid for tid, t in self._trabajos.items()
+            if t.terminado and t.terminado < limite
+        ]
+        for tid in viejos:
+            del self._trabajos[tid]
+
+    # --------------------------------------------------------
+    def metricas(self) -> dict:
+        with self._lock:
+            esperas = [e for e, _ in self._latencias]
+            duraciones = [d for _, d in self._latencias]
+            return {
+                "cola": self.nombre,
+                "workers": self.workers,
+                "capacidad": self.capacidad,
+                "profundidad": self._en_cola,
+                "en_proceso": self._en_proceso,
+                "completados": self._completados,
+                "errores": self._errores,
+                "rechazados": self._rechazados,
+                "en_memoria": len(self._trabajos),
+                "espera_ms": {"p50": _percentil(esperas, 50), "p95": _percentil(esperas, 95)},
+                "duracion_ms": {"p50": _percentil(duraciones, 50), "p95": _percentil(duraciones, 95)},
+            }
+
+    def detener(self, esperar: bool = False):
+        self._executor.shutdown(wait=esperar, cancel_futures=True)
@@ -0,0 +1,44 @@
+# utils/cursor.py
+"""
+Cursores opacos para paginación por keyset y sincronización.
+
+El cliente recibe un string base64-url y lo devuelve tal cual; el servidor
+lo decodifica a un dict con los valores de la última fila vista.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+
+def codificar_cursor(datos: dict) -> str:
+    crudo = json.dumps(datos, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(crudo).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str | None) -> dict | None:
+    """Devuelve el dict del cursor, None si no se envió, o ValueError si es inválido."""
+    if not cursor:
+        return None
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except Exception:
+        raise ValueError("Cursor inválido")
+    if not isinstance(datos, dict):
+        raise ValueError("Cursor inválido")
+    return datos
+
+
+def fecha_id_cursor(datos: dict | None) -> tuple[datetime, int] | None:
+    """(fecha, id) de un cursor {"fecha", "id"} de keyset por fecha; ValueError si no tiene esa forma."""
+    if datos is None:
+        return None
+    try:
+        fecha = datetime.fromisoformat(str(datos["fecha"]))
+        id_ = datos["id"]
+    except (KeyError, ValueError):
+        raise ValueError("Cursor inválido")
+    if isinstance(id_, bool) or not isinstance(id_, int):
+        raise ValueError("Cursor inválido")
+    return fecha, id_
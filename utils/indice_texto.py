@@ -0,0 +1,269 @@
+# utils/indice_texto.py
+"""
+Índice invertido de texto en memoria (tokens + trigramas).
+
+- Normaliza sin acentos ni mayúsculas ("Pérez" == "perez", "Ñuñoa" == "nunoa").
+- Cada documento se indexa por campos con peso (p. ej. nombre 3, ciudad 1);
+  la lista de un token guarda el mayor peso con que aparece en el documento.
+- Vocabulario ordenado para prefijos (búsqueda mientras se escribe) y
+  trigramas por token para coincidencias dentro de la palabra y errores de
+  tipeo (similitud de trigramas).
+- Consulta: todos los términos deben coincidir; el puntaje es la suma, por
+  término, de peso del campo × calidad (exacto > prefijo > infijo > parecido).
+- Sugerencias (top-k): cada token guarda además su lista ordenada por
+  (peso, rango del documento); se recorre la del término más amplio de mayor
+  a menor y se corta cuando ya nada de lo que queda puede entrar en el top-k,
+  sin armar el conjunto completo de coincidencias.
+
+Es seguro entre hilos: las lecturas y escrituras usan el mismo lock.
+"""
+
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+EXACTO = 1.0
+PREFIJO = 0.8
+INFIJO = 0.5
+PARECIDO = 0.4
+
+SIMILITUD_MINIMA = 0.45
+
+_NO_ALFANUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalizar(texto: Optional[str]) -> str:
+    """Minúsculas, sin acentos y solo letras/dígitos separados por espacio."""
+    if not texto:
+        return ""
+    sin_acentos = "".join(
+        c for c in unicodedata.normalize("NFKD", str(texto).lower())
+        if not unicodedata.combining(c)
+    )
+    return _NO_ALFANUM.sub(" ", sin_acentos).strip()
+
+
+def tokenizar(texto: Optional[str]) -> List[str]:
+    return normalizar(texto).split()
+
+
+def trigramas(token: str) -> set:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+class IndiceTexto:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._tokens_doc: Dict[int, Tuple[str, ...]] = {}
+        self._vocabulario: List[str] = []
+        self._por_trigrama: Dict[str, set] = {}
+        self._rango: Dict[int, float] = {}
+        self._ordenadas: Dict[str, list] = {}
+
+    # --------------------------------------------------------
+    def agregar(self, id_doc: int, campos: Iterable[Tuple[Optional[str], float]], rango: float = 0.0):
+        """
+        Indexa (o reindexa) un documento a partir de pares (texto, peso).
+        `rango` desempata las sugerencias con igual puntaje (mayor primero).
+        """
+        pesos: Dict[str, float] = {}
+        for texto, peso in campos:
+            for tok in tokenizar(texto):
+                if peso > pesos.get(tok, 0):
+                    pesos[tok] = peso
+
+        with self._lock:
+            self._quitar(id_doc)
+            for tok, peso in pesos.items():
+                lista = self._postings.get(tok)
+                if lista is None:
+                    lista = self._postings[tok] = {}
+                    insort(self._vocabulario, tok)
+                    for tri in trigramas(tok):
+                        self._por_trigrama.setdefault(tri, set()).add(tok)
+                lista[id_doc] = peso
+                self._ordenadas.pop(tok, None)
+            self._tokens_doc[id_doc] = tuple(pesos)
+            self._rango[id_doc] = rango
+
+    def quitar(self, id_doc: int):
+        with self._lock:
+            self._quitar(id_doc)
+
+    def _quitar(self, id_doc: int):
+        self._rango.pop(id_doc, None)
+        for tok in self._tokens_doc.pop(id_doc, ()):
+            self._ordenadas.pop(tok, None)
+            lista = self._postings.get(tok)
+            if lista is None:
+                continue
+            lista.pop(id_doc, None)
+            if not lista:
+                del self._postings[tok]
+                i = bisect_left(self._vocabulario, tok)
+                if i < len(self._vocabulario) and self._vocabulario[i] == tok:
+                    del self._vocabulario[i]
+                for tri in trigramas(tok):
+                    tokens = self._por_trigrama.get(tri)
+                    if tokens is not None:
+                        tokens.discard(tok)
+                        if not tokens:
+                            del self._por_trigrama[tri]
+
+    # --------------------------------------------------------
+    def _con_prefijo(self, termino: str, limite: int) -> List[str]:
+        i = bisect_left(self._vocabulario, termino)
+        out = []
+        while i < len(self._vocabulario) and len(out) < limite:
+            tok = self._vocabulario[i]
+            if not tok.startswith(termino):
+                break
+            out.append(tok)
+            i += 1
+        return out
+
+    def _tokens_para(self, termino: str, prefijo: bool, limite_prefijo: int) -> List[Tuple[str, float]]:
+        """Tokens del vocabulario que coinciden con el término y su calidad."""
+        encontrados: Dict[str, float] = {}
+        if termino in self._postings:
+            encontrados[termino] = EXACTO
+        if prefijo:
+            for tok in self._con_prefijo(termino, limite_prefijo):
+                encontrados.setdefault(tok, PREFIJO)
+
+        tris = trigramas(termino)
+        if not tris:
+            return list(encontrados.items())
+
+        # Infijo: tokens que tienen todos los trigramas del término
+        conjuntos = sorted((self._por_trigrama.get(t, set()) for t in tris), key=len)
+        if conjuntos[0]:
+            comunes = set(conjuntos[0]).intersection(*conjuntos[1:])
+            for tok in comunes:
+                if termino in tok:
+                    encontrados.setdefault(tok, INFIJO)
+
+        # Parecido (errores de tipeo) solo si no hubo nada mejor
+        if not encontrados and len(termino) >= 4:
+            conteo: Dict[str, int] = {}
+            for t in tris:
+                for tok in self._por_trigrama.get(t, ()):
+                    conteo[tok] = conteo.get(tok, 0) + 1
+            for tok, n in conteo.items():
+                similitud = n / (len(tris) + max(0, len(tok) - 2) - n)
+                if similitud >= SIMILITUD_MINIMA:
+                    encontrados[tok] = PARECIDO * similitud
+        return list(encontrados.items())
+
+    def buscar(self, consulta: str, prefijo_final: bool = True,
+               limite_prefijo: int = 2000) -> Dict[int, float]:
+        """
+        {id_doc: puntaje} de los documentos que coinciden con todos los
+        términos. Con `prefijo_final` el último término se toma además como
+        prefijo (búsqueda mientras se escribe); los anteriores también admiten
+        prefijo pero pesan menos que la palabra exacta.
+        """
+        terminos = tokenizar(consulta)
+        if not terminos:
+            return {}
+
+        with self._lock:
+            por_termino: List[Dict[int, float]] = []
+            for k, termino in enumerate(terminos):
+                ultimo = k == len(terminos) - 1
+                puntajes: Dict[int, float] = {}
+                for tok, calidad in self._tokens_para(termino, prefijo_final or not ultimo, limite_prefijo):
+                    for id_doc, peso in self._postings[tok].items():
+                        valor = peso * calidad
+                        if valor > puntajes.get(id_doc, 0):
+                            puntajes[id_doc] = valor
+                if not puntajes:
+                    return {}
+                por_termino.append(puntajes)
+
+        por_termino.sort(key=len)
+        resultado = dict(por_termino[0])
+        for puntajes in por_termino[1:]:
+            resultado = {i: v + puntajes[i] for i, v in resultado.items() if i in puntajes}
+            if not resultado:
+                break
+        return resultado
+
+    def _ordenada(self, tok: str) -> list:
+        """[(peso, rango, -id)] del token de mayor a menor (se arma al primer uso)."""
+        lista = self._ordenadas.get(tok)
+        if lista is None:
+            lista = sorted(
+                ((peso, self._rango.get(i, 0.0), -i) for i, peso in self._postings[tok].items()),
+                reverse=True,
+            )
+            self._ordenadas[tok] = lista
+        return lista
+
+    def sugerir(self, consulta: str, limite: int = 8, limite_prefijo: int = 2000) -> List[Tuple[int, float]]:
+        """
+        Los `limite` mejores [(id_doc, puntaje)] para la consulta (todos los
+        términos admiten prefijo), ordenados por puntaje y rango. Mismo
+        puntaje que buscar(prefijo_final=True).
+        """
+        terminos = tokenizar(consulta)
+        if not terminos or limite <= 0:
+            return []
+
+        with self._lock:
+            grupos = []
+            for termino in terminos:
+                tokens = self._tokens_para(termino, True, limite_prefijo)
+                if not tokens:
+                    return []
+                grupos.append(tokens)
+
+            # El término con más documentos guía el recorrido; los demás se evalúan
+            # con los tokens de cada documento (no se arma su conjunto completo)
+            tamanos = [sum(len(self._postings[t]) for t, _ in g) for g in grupos]
+            guia = max(range(len(grupos)), key=tamanos.__getitem__)
+            otros = [dict(g) for j, g in enumerate(grupos) if j != guia]
+            cota = sum(max(self._ordenada(t)[0][0] * c for t, c in calidades.items()) for calidades in otros)
+
+            flujos = [
+                ((peso * c, rango, neg) for peso, rango, neg in self._ordenada(t))
+                for t, c in grupos[guia]
+            ]
+            vistos, mejores = set(), []
+            for puntaje, rango, neg in heapq.merge(*flujos, reverse=True):
+                # Nada de lo que sigue supera al k-ésimo: cortar
+                if len(mejores) >= limite and (puntaje + cota, rango, neg) < mejores[0]:
+                    break
+                if neg in vistos:
+                    continue
+                vistos.add(neg)
+                tokens_doc = self._tokens_doc.get(-neg, ())
+                total = puntaje
+                for calidades in otros:
+                    valor = max(
+                        (self._postings[t][-neg] * calidades[t] for t in tokens_doc if t in calidades),
+                        default=0,
+                    )
+                    if not valor:
+                        break
+                    total += valor
+                else:
+                    clave = (total, rango, neg)
+                    if len(mejores) < limite:
+                        heapq.heappush(mejores, clave)
+                    elif clave > mejores[0]:
+                        heapq.heapreplace(mejores, clave)
+
+        return [(-neg, total) for total, _, neg in sorted(mejores, reverse=True)]
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "documentos": len(self._tokens_doc),
+                "tokens": len(self._postings),
+                "trigramas": len(self._por_trigrama),
+            }
@@ -0,0 +1,93 @@
+# utils/json_incremental.py
+"""
+Extractor incremental de JSON para respuestas en streaming.
+
+Recibe el texto del proveedor por fragmentos y devuelve cada objeto del
+arreglo `clave` (por defecto "dias") en cuanto se cierra su llave, sin esperar
+al final de la respuesta. Lleva el estado léxico entre fragmentos (profundidad,
+dentro de cadena, escape), así que cada carácter se examina una sola vez.
+
+Tolera texto antes del JSON (```json, explicaciones) mientras no tenga comillas
+sin cerrar; el documento completo queda en `texto` para el parseo final.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+
+class ExtractorArrayJSON:
+    def __init__(self, clave: str = "dias"):
+        self.clave = clave
+        self.texto = ""
+        self._pos = 0
+        self._profundidad = 0
+        self._en_cadena = False
+        self._escape = False
+        self._inicio_cadena = 0
+        self._ultima_cadena: Optional[str] = None
+        self._en_arreglo = False
+        self._inicio_objeto: Optional[int] = None
+        self.emitidos = 0
+        self.descartados = 0
+
+    def alimentar(self, fragmento: str) -> List[Dict[str, Any]]:
+        """Agrega un fragmento y devuelve los objetos completados con él."""
+        if not fragmento:
+            return []
+        self.texto += fragmento
+        texto = self.texto
+        salida: List[Dict[str, Any]] = []
+
+        i = self._pos
+        while i < len(texto):
+            c = texto[i]
+            if self._en_cadena:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._en_cadena = False
+                    # Las claves del objeto raíz están a profundidad 1
+                    if self._profundidad == 1 and not self._en_arreglo:
+                        self._ultima_cadena = texto[self._inicio_cadena + 1:i]
+            elif c == '"':
+                self._en_cadena = True
+                self._inicio_cadena = i
+            elif c == "{" or c == "[":
+                self._profundidad += 1
+                if c == "[" and self._profundidad == 2 and self._ultima_cadena == self.clave:
+                    self._en_arreglo = True
+                elif c == "{" and self._en_arreglo and self._profundidad == 3:
+                    self._inicio_objeto = i
+            elif c == "}" or c == "]":
+                if c == "}" and self._en_arreglo and self._profundidad == 3 and self._inicio_objeto is not None:
+                    objeto = self._parsear(texto[self._inicio_objeto:i + 1])
+                    if objeto is not None:
+                        salida.append(objeto)
+                    self._inicio_objeto = None
+                elif c == "]" and self._en_arreglo and self._profundidad == 2:
+                    self._en_arreglo = False
+                    self._ultima_cadena = None
+                self._profundidad = max(0, self._profundidad - 1)
+            i += 1
+
+        self._pos = i
+        return salida
+
+    def _parsear(self, crudo: str) -> Optional[Dict[str, Any]]:
+        try:
+            objeto = json.loads(crudo)
+        except ValueError:
+            self.descartados += 1
+            return None
+        if not isinstance(objeto, dict):
+            self.descartados += 1
+            return None
+        self.emitidos += 1
+        return objeto
+
+    @property
+    def arreglo_cerrado(self) -> bool:
+        """True si ya se vio el arreglo `clave` completo."""
+        return self.emitidos > 0 and not self._en_arreglo
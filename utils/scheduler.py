@@ -0,0 +1,372 @@
+# utils/scheduler.py
+"""
+Programador de tareas en proceso (intervalos y expresiones tipo cron).
+
+- Cada tarea corre en un ThreadPoolExecutor propio, fuera del threadpool de requests.
+- Con varios workers de uvicorn, todos programan las mismas tareas pero solo uno
+  las ejecuta: el turno se reclama en la BD (GET_LOCK + fila única por turno en
+  `jobs_ejecuciones`), así que los demás lo registran como "omitida".
+- Se guarda el historial reciente de cada tarea en memoria y las ejecuciones en la BD.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+from db import get_connection
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+CREAR_TABLA_SQL = """
+    CREATE TABLE IF NOT EXISTS jobs_ejecuciones (
+        id_ejecucion BIGINT AUTO_INCREMENT PRIMARY KEY,
+        job VARCHAR(100) NOT NULL,
+        programada_para DATETIME NULL,
+        inicio DATETIME(3) NOT NULL,
+        fin DATETIME(3) NULL,
+        duracion_ms INT NULL,
+        estado VARCHAR(20) NOT NULL,
+        manual TINYINT(1) NOT NULL DEFAULT 0,
+        worker VARCHAR(150) NULL,
+        resultado TEXT NULL,
+        error TEXT NULL,
+        UNIQUE KEY uq_job_turno (job, programada_para),
+        KEY idx_job_inicio (job, inicio)
+    )
+"""
+
+
+# ============================================================
+# EXPRESIONES CRON (minuto hora día mes día_semana)
+# ============================================================
+
+class ExpresionCron:
+    """
+    Subconjunto de cron de 5 campos: `*`, `*/n`, `a-b`, `a-b/n`, listas `a,b`.
+    Día de semana 0-6 con 0 = domingo. Los campos se combinan con AND.
+    """
+
+    _RANGOS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+    def __init__(self, expresion: str):
+        partes = expresion.split()
+        if len(partes) != 5:
+            raise ValueError(f"Expresión cron inválida: '{expresion}'")
+        self.expresion = expresion
+        self.minutos, self.horas, self.dias, self.meses, self.dias_semana = (
+            self._campo(p, lo, hi) for p, (lo, hi) in zip(partes, self._RANGOS)
+        )
+
+    @staticmethod
+    def _campo(texto: str, lo: int, hi: int) -> set[int]:
+        valores: set[int] = set()
+        for parte in texto.split(","):
+            rango, _, paso = parte.partition("/")
+            paso_n = int(paso) if paso else 1
+            if rango == "*":
+                inicio, fin = lo, hi
+            elif "-" in rango:
+                a, b = rango.split("-", 1)
+                inicio, fin = int(a), int(b)
+            else:
+                inicio = int(rango)
+                fin = hi if paso else inicio
+            if inicio < lo or fin > hi or inicio > fin:
+                raise ValueError(f"Valor fuera de rango en cron: '{parte}'")
+            valores.update(range(inicio, fin + 1, paso_n))
+        return valores
+
+    def siguiente(self, desde: datetime) -> datetime:
+        """Primer minuto estrictamente posterior a `desde` que cumple la expresión."""
+        t = desde.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limite = t + timedelta(days=366 * 5)
+        while t < limite:
+            if t.month not in self.meses:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if t.day not in self.dias or (t.weekday() + 1) % 7 not in self.dias_semana:
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if t.hour not in self.horas:
+                t = t.replace(minute=0) + timedelta(hours=1)
+                continue
+            if t.minute not in self.minutos:
+                t += timedelta(minutes=1)
+                continue
+            return t
+        raise ValueError(f"La expresión cron '{self.expresion}' nunca se cumple")
+
+
+# ============================================================
+# TAREAS
+# ============================================================
+
+class Job:
+    def __init__(
+        self,
+        nombre: str,
+        funcion: Callable[[], Any],
+        intervalo_s: Optional[int] = None,
+        cron: Optional[str] = None,
+        descripcion: str = "",
+        habilitado: bool = True,
+    ):
+        if (intervalo_s is None) == (cron is None):
+            raise ValueError("Indica intervalo_s o cron (solo uno)")
+        self.nombre = nombre
+        self.funcion = funcion
+        self.intervalo_s = intervalo_s
+        self.cron = ExpresionCron(cron) if cron else None
+        self.descripcion = descripcion
+        self.habilitado = habilitado
+        self.proxima: Optional[datetime] = None
+        self.ejecutando = False
+        self.historial: deque[dict] = deque(maxlen=50)
+        self.ejecuciones = 0
+        self.errores = 0
+        self.omitidas = 0
+        self.duracion_total_ms = 0.0
+
+    def calcular_proxima(self, desde: datetime) -> datetime:
+        if self.cron:
+            return self.cron.siguiente(desde)
+        # Alineado a la época para que todos los workers calculen el mismo turno
+        epoch = desde.timestamp()
+        return datetime.fromtimestamp((int(epoch // self.intervalo_s) + 1) * self.intervalo_s)
+
+    def estado(self) -> dict:
+        ultimo = self.historial[-1] if self.historial else None
+        return {
+            "nombre": self.nombre,
+            "descripcion": self.descripcion,
+            "programacion": self.cron.expresion if self.cron else f"cada {self.intervalo_s}s",
+            "habilitado": self.habilitado,
+            "ejecutando": self.ejecutando,
+            "proxima": self.proxima.isoformat() if self.proxima else None,
+            "ejecuciones": self.ejecuciones,
+            "errores": self.errores,
+            "omitidas": self.omitidas,
+            "duracion_promedio_ms": round(self.duracion_total_ms / self.ejecuciones, 2) if self.ejecuciones else None,
+            "ultima": ultimo,
+            "historial": list(self.historial),
+        }
+
+
+class Programador:
+    def __init__(self, max_workers: int = 2, tick_s: float = 1.0):
+        self._jobs: dict[str, Job] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._max_workers = max_workers
+        self._tick_s = tick_s
+        self._hilo: Optional[threading.Thread] = None
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        self._tabla_lista = False
+
+    # ---------- registro ----------
+
+    def agregar(self, job: Job) -> Job:
+        self._jobs[job.nombre] = job
+        return job
+
+    def jobs(self) -> list[Job]:
+        return list(self._jobs.values())
+
+    def obtener(self, nombre: str) -> Optional[Job]:
+        return self._jobs.get(nombre)
+
+    # ---------- ciclo de vida ----------
+
+    def iniciar(self):
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._asegurar_tabla()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="job")
+        ahora = datetime.now()
+        for job in self._jobs.values():
+            job.proxima = job.calcular_proxima(ahora)
+        self._parar.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="programador", daemon=True)
+        self._hilo.start()
+        print(f"✅ Programador iniciado ({len(self._jobs)} tareas, worker {WORKER_ID})")
+
+    def detener(self):
+        self._parar.set()
+        if self._hilo:
+            self._hilo.join(timeout=5)
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        print("🛑 Programador detenido")
+
+    @property
+    def activo(self) -> bool:
+        return bool(self._hilo and self._hilo.is_alive())
+
+    def _bucle(self):
+        while not self._parar.wait(self._tick_s):
+            ahora = datetime.now()
+            for job in self._jobs.values():
+                if not job.habilitado or job.proxima is None or ahora < job.proxima:
+                    continue
+                turno = job.proxima
+                job.proxima = job.calcular_proxima(ahora)
+                if job.ejecutando:
+                    self._anotar(job, turno, "omitida", 0, error="Ejecución anterior aún en curso")
+                    continue
+                self._executor.submit(self._ejecutar, job, turno, False)
+
+    # ---------- ejecución ----------
+
+    def ejecutar_ahora(self, nombre: str) -> Future:
+        job = self._jobs.get(nombre)
+        if not job:
+            raise KeyError(nombre)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="job")
+        return self._executor.submit(self._ejecutar, job, None, True)
+
+    def _ejecutar(self, job: Job, turno: Optional[datetime], manual: bool) -> dict:
+        cn = None
+        cur = None
+        id_ejecucion = None
+        en_curso = False
+        nombre_lock = f"fitman_job:{job.nombre}"
+        try:
+            cn = get_connection()
+            cur = cn.cursor()
+            cur.execute("SELECT GET_LOCK(%s, 0)", (nombre_lock,))
+            if cur.fetchone()[0] != 1:
+                return self._anotar(job, turno, "omitida", 0, error="Otro worker tiene el lock")
+
+            # Reclamar el turno: solo un worker logra insertar la fila (job, programada_para)
+            cur.execute("""
+                INSERT IGNORE INTO jobs_ejecuciones
+                    (job, programada_para, inicio, estado, manual, worker)
+                VALUES (%s, %s, NOW(3), 'ejecutando', %s, %s)
+            """, (job.nombre, turno, int(manual), WORKER_ID))
+            cn.commit()
+            if cur.rowcount == 0:
+                return self._anotar(job, turno, "omitida", 0, error="Turno ya ejecutado por otro worker")
+            id_ejecucion = cur.lastrowid
+
+            job.ejecutando = en_curso = True
+            inicio = time.perf_counter()
+            estado, resultado, error = "ok", None, None
+            try:
+                resultado = job.funcion()
+            except Exception as e:
+                estado, error = "error", f"{type(e).__name__}: {e}"
+                traceback.print_exc()
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+
+            cur.execute("""
+                UPDATE jobs_ejecuciones
+                SET fin = NOW(3), duracion_ms = %s, estado = %s, resultado = %s, error = %s
+                WHERE id_ejecucion = %s
+            """, (int(duracion_ms), estado, _a_json(resultado), error, id_ejecucion))
+            cn.commit()
+            return self._anotar(job, turno, estado, duracion_ms, resultado, error, manual)
+        except Exception as e:
+            print(f"❌ Error ejecutando tarea {job.nombre}: {e}")
+            return self._anotar(job, turno, "error", 0, error=str(e), manual=manual)
+        finally:
+            if en_curso:
+                job.ejecutando = False
+            if cn:
+                try:
+                    cur.execute("SELECT RELEASE_LOCK(%s)", (nombre_lock,))
+                    cur.fetchall()
+                    cur.close()
+                    cn.close()
+                except Exception:
+                    pass
+
+    def _anotar(self, job: Job, turno, estado: str, duracion_ms: float,
+                resultado: Any = None, error: Optional[str] = None, manual: bool = False) -> dict:
+        registro = {
+            "turno": turno.isoformat() if turno else None,
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "estado": estado,
+            "manual": manual,
+            "duracion_ms": round(duracion_ms, 2),
+            "resultado": resultado,
+            "error": error,
+        }
+        with self._lock:
+            job.historial.append(registro)
+            if estado == "omitida":
+                job.omitidas += 1
+            else:
+                job.ejecuciones += 1
+                job.duracion_total_ms += duracion_ms
+                if estado == "error":
+                    job.errores += 1
+        if estado != "omitida":
+            icono = "✅" if estado == "ok" else "❌"
+            print(f"{icono} Tarea {job.nombre}: {estado} en {duracion_ms:.0f} ms")
+        return registro
+
+    def _asegurar_tabla(self):
+        if self._tabla_lista:
+            return
+        cn = None
+        try:
+            cn = get_connection()
+            cur = cn.cursor()
+            cur.execute(CREAR_TABLA_SQL)
+            cn.commit()
+            cur.close()
+            self._tabla_lista = True
+        except Exception as e:
+            print(f"⚠️ No se pudo crear jobs_ejecuciones: {e}")
+        finally:
+            if cn:
+                cn.close()
+
+    def historial_bd(self, nombre: Optional[str] = None, limite: int = 50) -> list[dict]:
+        """Últimas ejecuciones registradas por cualquier worker."""
+        cn = get_connection()
+        cur = cn.cursor(dictionary=True)
+        try:
+            sql = """
+                SELECT id_ejecucion, job, programada_para, inicio, fin, duracion_ms,
+                       estado, manual, worker, resultado, error
+                FROM jobs_ejecuciones
+                {filtro}
+                ORDER BY id_ejecucion DESC
+                LIMIT %s
+            """
+            if nombre:
+                cur.execute(sql.format(filtro="WHERE job = %s"), (nombre, limite))
+            else:
+                cur.execute(sql.format(filtro=""), (limite,))
+            filas = cur.fetchall()
+            for f in filas:
+                for k in ("programada_para", "inicio", "fin"):
+                    if f[k]:
+                        f[k] = f[k].isoformat()
+                f["manual"] = bool(f["manual"])
+            return filas
+        finally:
+            cur.close()
+            cn.close()
+
+
+def _a_json(valor: Any) -> Optional[str]:
+    if valor is None:
+        return None
+    try:
+        return json.dumps(valor, ensure_ascii=False, default=str)
+    except Exception:
+        return str(valor)